@@ -0,0 +1,37 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse
+from app.utils.profiling import get_profile_store
+
+router = APIRouter()
+
+
+@router.get("/profile/")
+async def list_profiles():
+    """
+    List the most recent request profiles, newest first.
+    """
+    return {"profiles": get_profile_store().list()}
+
+
+@router.get("/profile/{request_id}")
+async def get_profile(request_id: str, format: str = "collapsed"):
+    """
+    Return a request profile as collapsed stacks (for flamegraph.pl or
+    speedscope), a speedscope JSON file, or the torch.profiler tables.
+    """
+    profile = get_profile_store().get(request_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail=f"No profile with id {request_id}")
+
+    if format == "collapsed":
+        return PlainTextResponse(profile.sampler.collapsed())
+    if format == "speedscope":
+        return JSONResponse(
+            profile.sampler.speedscope(f"{profile.path} ({request_id})"),
+            headers={"Content-Disposition": f'attachment; filename="{request_id}.speedscope.json"'},
+        )
+    if format == "torch":
+        if profile.mode != "torch":
+            raise HTTPException(status_code=404, detail="Profile was not captured with torch profiling")
+        return PlainTextResponse("\n\n".join(profile.torch_reports) or "No model calls were profiled\n")
+    raise HTTPException(status_code=400, detail="format must be one of collapsed, speedscope, torch")
@@ -0,0 +1,12 @@
+from fastapi import APIRouter
+from app.utils.metrics import collect_metrics
+
+router = APIRouter()
+
+
+@router.get("/")
+async def get_metrics():
+    """
+    Return runtime metrics (admission queues, model usage, caches).
+    """
+    return collect_metrics()
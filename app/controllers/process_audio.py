@@ -1,55 +1,164 @@
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from fastapi.responses import StreamingResponse
 from app.models.transcription_model import WhisperTranscriber
-from app.models.summarization_model import BertSummarizer
+from app.models.summarization_engine import SummarizationEngine
+from app.models.whisper_policy import QUALITY_TIERS
 from app.services.google_cloud.translate_api import GoogleTranslateAPI
 from app.services.assembly_transcriber import AssemblyTranscriber
-from starlette.concurrency import run_in_threadpool
-from app.utils.file_utils import save_upload_to_temp
+from app.services.translation_memory import MemoizedTranslator
+from app.services.search_index import index_lecture, index_translation
+from app.utils.cache import content_key, get_cache
+from app.utils.profiling import run_in_threadpool
+from app.utils.file_utils import audio_info_from_bytes
+from app.utils.latency_budget import remaining_budget
+from typing import Dict, List, Optional
+import asyncio
+import hashlib
+import json
 import os
+import time
 
 router = APIRouter()
 
-@router.post("/audio/file")
-async def process_audio_file(
-    file: UploadFile = File(...),
-    current_language: str = Form("en"),
-    target_language: str = Form("tr"),
-    model: str = Form("assembly")  # Optional model selection
-):
-    try:
-        # Save uploaded file to temp location
-        tmp_path = await save_upload_to_temp(file)
 
-        audio_info = {"file_path": tmp_path}
+def _parse_languages(target_languages: Optional[List[str]]) -> List[str]:
+    """Accept repeated form fields and/or comma separated values, keeping order."""
+    languages = []
+    for value in target_languages or []:
+        languages.extend(language.strip() for language in value.split(","))
+    return list(dict.fromkeys(language for language in languages if language))
+
 
+async def _transcribe_and_summarize(
+    data: bytes,
+    digest: str,
+    filename: str,
+    model: str,
+    quality: str,
+    word_timestamps: bool,
+    latency_budget: Optional[float] = None,
+    received: Optional[float] = None,
+) -> Dict:
+    """
+    Transcribe and summarize an upload once. Results are cached by the
+    sha256 of the file (digest) and the request options, so later calls for
+    the same recording (e.g. for another language) skip both steps.
+
+    The summary gets what transcription left of latency_budget, counted from
+    received. Summaries degraded to meet the budget are returned but not
+    cached, so a later request without a tight budget gets the full one.
+    """
+    cache = get_cache("lecture", default_size=256)
+    key = content_key(digest, model, quality, word_timestamps)
+    cached = cache.get(key)
+    if cached is not None:
+        return {**cached, "cached": True}
+
+    # Short Whisper clips are decoded in memory; everything else goes to a temp file
+    audio_info = await run_in_threadpool(audio_info_from_bytes, data, filename, in_memory=model == "whisper")
+    tmp_path = audio_info.get("file_path")
+    audio_info.update(quality=quality, word_timestamps=word_timestamps)
+    try:
         # --- Transcription ---
         if model == "whisper":
             transcriber = WhisperTranscriber()
-            transcription = transcriber.transcribe(audio_info)
+            transcription = await run_in_threadpool(transcriber.transcribe, audio_info)
         else:
             transcriber = AssemblyTranscriber()
             transcription = await run_in_threadpool(transcriber.transcribe, audio_info)
 
         # --- Summarization ---
-        summarizer = BertSummarizer()
-        summary_result = summarizer.process_lecture(transcription)
+        summarizer = SummarizationEngine()
+        summary_result = await run_in_threadpool(
+            summarizer.process_lecture, transcription, latency_budget=remaining_budget(latency_budget, received)
+        )
         if summary_result["error"]:
             raise HTTPException(status_code=400, detail=summary_result["error"])
-        summary = summary_result["detailed_summary"]
+    finally:
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
 
-        # --- Translation ---
-        translator = GoogleTranslateAPI()
-        translated_summary = translator.translate_text(summary, target_language)
+    lecture = {
+        "transcription": transcription,
+        "model_used": audio_info.get("model_used"),
+        "summary": summary_result["detailed_summary"],
+        "summary_backend": summary_result["backend"],
+        "summary_strategy": summary_result["strategy"],
+        "summary_partial": summary_result["partial"],
+    }
+    if word_timestamps:
+        lecture["words"] = audio_info.get("words", [])
+    if "fingerprint_match" in audio_info:
+        lecture["fingerprint_match"] = audio_info["fingerprint_match"]
+    if summary_result["strategy"] == "full" and not summary_result["partial"]:
+        cache.put(key, lecture)
+    # Searchable under the sha256 of the upload, whatever the request options.
+    await run_in_threadpool(
+        index_lecture,
+        digest,
+        transcript=transcription,
+        summary=lecture["summary"],
+        words=audio_info.get("words"),
+        title=filename,
+        model_used=lecture["model_used"],
+    )
+    return {**lecture, "cached": False}
 
-        return {
-            "transcription": transcription,
-            "summary": summary,
-            "translated_summary": translated_summary
-        }
 
+@router.post("/audio/file")
+async def process_audio_file(
+    file: UploadFile = File(...),
+    current_language: str = Form("en"),
+    target_language: str = Form("tr"),
+    target_languages: Optional[List[str]] = Form(None),  # e.g. "tr,ar,fr" or repeated fields
+    model: str = Form("assembly"),  # Optional model selection
+    quality: str = Form("balanced"),  # Whisper quality tier: fast, balanced, accurate
+    word_timestamps: bool = Form(False),  # Include per-word timing and confidence
+    latency_budget: Optional[float] = Form(None),  # Seconds; the summary degrades to meet it
+):
+    """
+    Transcribe, summarize and translate an audio file.
+
+    With target_languages the transcription and summary are computed once
+    and translated to every language concurrently. The response is then
+    NDJSON: a "lecture" line first, then one "translation" line per language
+    as soon as it is done.
+    """
+    if quality not in QUALITY_TIERS:
+        raise HTTPException(status_code=400, detail=f"Unknown quality tier '{quality}', expected one of {sorted(QUALITY_TIERS)}")
+    received = time.monotonic()
+    languages = _parse_languages(target_languages)
+    try:
+        data = await file.read()
+        digest = hashlib.sha256(data).hexdigest()
+        lecture = await _transcribe_and_summarize(
+            data, digest, file.filename, model, quality, word_timestamps, latency_budget, received
+        )
+
+        # --- Translation ---
+        # Sentences already in the translation memory skip the API call.
+        translator = MemoizedTranslator(GoogleTranslateAPI(), source_language=current_language)
+
+        if not languages:
+            translated_summary = await run_in_threadpool(translator.translate_text, lecture["summary"], target_language)
+            await run_in_threadpool(index_translation, digest, target_language, translated_summary)
+            return {**lecture, "translated_summary": translated_summary}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-    finally:
-        if 'tmp_path' in locals() and os.path.exists(tmp_path):
-            os.remove(tmp_path)
+    async def translate(language: str) -> Dict:
+        try:
+            translated = await run_in_threadpool(translator.translate_text, lecture["summary"], language)
+            await run_in_threadpool(index_translation, digest, language, translated)
+            return {"type": "translation", "language": language, "translated_summary": translated}
+        except Exception as e:
+            return {"type": "translation", "language": language, "error": str(e)}
+
+    async def result_lines():
+        yield json.dumps({"type": "lecture", **lecture}, ensure_ascii=False) + "\n"
+        for finished in asyncio.as_completed([translate(language) for language in languages]):
+            yield json.dumps(await finished, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(result_lines(), media_type="application/x-ndjson")
@@ -0,0 +1,38 @@
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query
+from app.services.search_index import get_search_index
+from app.utils.profiling import run_in_threadpool
+
+router = APIRouter()
+
+SEARCH_KINDS = ("transcript", "summary", "translation")
+
+
+@router.get("/")
+async def search(
+    q: str,
+    limit: int = Query(10, ge=1, le=100),
+    kind: Optional[str] = None,  # transcript, summary or translation
+):
+    """
+    Search every processed lecture. Returns matching sentences ranked by
+    BM25, each with a highlighted snippet, the lecture it belongs to and,
+    for transcripts with word timings, its start and end in seconds.
+    """
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Empty query")
+    if kind is not None and kind not in SEARCH_KINDS:
+        raise HTTPException(status_code=400, detail=f"kind must be one of {', '.join(SEARCH_KINDS)}")
+    results = await run_in_threadpool(get_search_index().search, q, limit, kind)
+    return {"query": q, "results": results}
+
+
+@router.get("/lectures/{lecture_id}")
+async def get_lecture(lecture_id: int):
+    """
+    Return the stored transcript, summary and translations of a lecture.
+    """
+    lecture = await run_in_threadpool(get_search_index().lecture, lecture_id)
+    if lecture is None:
+        raise HTTPException(status_code=404, detail=f"No lecture with id {lecture_id}")
+    return lecture
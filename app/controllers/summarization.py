@@ -1,41 +1,117 @@
 import os
-from fastapi import APIRouter, UploadFile, File, HTTPException, Form
-from app.models.summarization_model import BertSummarizer
-from app.utils.file_utils import save_upload_to_temp
-from starlette.concurrency import run_in_threadpool
+import json
+import hashlib
+import time
+from typing import List, Optional, Tuple
+from fastapi import APIRouter, UploadFile, File, HTTPException, Form, Request
+from fastapi.responses import StreamingResponse
+from app.models.summarization_engine import SummarizationEngine
+from app.models.whisper_policy import QUALITY_TIERS
+from app.services.search_index import index_lecture
+from app.utils.file_utils import audio_info_from_bytes
+from app.utils.latency_budget import remaining_budget
+from app.utils.profiling import iterate_in_threadpool, run_in_threadpool
 import logging
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 @router.post("/text/")
-async def summarize_text(text: str):
+async def summarize_text(text: str, latency_budget: Optional[float] = None):
     try:
-        summarizer = BertSummarizer()
-        result = summarizer.process_lecture(text)
+        summarizer = SummarizationEngine()
+        result = await run_in_threadpool(summarizer.process_lecture, text, latency_budget=latency_budget)
         if result["error"]:
             raise HTTPException(status_code=400, detail=result["error"])
+        await run_in_threadpool(
+            index_lecture, hashlib.sha256(text.encode("utf-8")).hexdigest(),
+            transcript=text, summary=result["detailed_summary"],
+        )
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _parse_batch_documents(body: bytes, content_type: str) -> List[Tuple[str, str]]:
+    """
+    Accept either a JSON list or JSONL (one document per line). Each document
+    is a string or an object with "text" and an optional "id".
+    """
+    text = body.decode("utf-8")
+    if "application/json" in content_type:
+        items = json.loads(text)
+        if not isinstance(items, list):
+            raise ValueError("Expected a JSON list of documents")
+    else:
+        items = [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    documents = []
+    for index, item in enumerate(items):
+        if isinstance(item, str):
+            documents.append((str(index), item))
+        elif isinstance(item, dict) and isinstance(item.get("text"), str):
+            documents.append((str(item.get("id", index)), item["text"]))
+        else:
+            raise ValueError(f"Document {index} must be a string or an object with a 'text' field")
+    if not documents:
+        raise ValueError("No documents provided")
+    return documents
+
+
+@router.post("/batch")
+async def summarize_batch(request: Request, batch_size: Optional[int] = None):
+    """
+    Summarize many documents in one call, streaming one NDJSON line per
+    document as soon as it is done.
+    """
+    try:
+        documents = _parse_batch_documents(await request.body(), request.headers.get("content-type", ""))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        summarizer = SummarizationEngine()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    texts = dict(documents)
+
+    def result_lines():
+        for doc_id, result in summarizer.process_lectures(
+            documents, batch_size=max(1, batch_size) if batch_size else None
+        ):
+            if not result["error"]:
+                index_lecture(
+                    hashlib.sha256(texts[doc_id].encode("utf-8")).hexdigest(),
+                    transcript=texts[doc_id], summary=result["detailed_summary"], title=doc_id,
+                )
+            yield json.dumps({"id": doc_id, **result}) + "\n"
+
+    # Each step of the synchronous generator runs in the threadpool.
+    return StreamingResponse(iterate_in_threadpool(result_lines()), media_type="application/x-ndjson")
+
+
 @router.post("/audio/file")
 async def summarize_audio_file(
     file: UploadFile = File(...),
-    model: str = Form("assembly")
+    model: str = Form("assembly"),
+    quality: str = Form("balanced"),
+    latency_budget: Optional[float] = Form(None),  # seconds for the whole request
 ):
+    if quality not in QUALITY_TIERS:
+        raise HTTPException(status_code=400, detail=f"Unknown quality tier '{quality}', expected one of {sorted(QUALITY_TIERS)}")
+    received = time.monotonic()
     try:
-        # Save the uploaded file temporarily
-        tmp_path = await save_upload_to_temp(file)
-
-        # Prepare audio_info
-        audio_info = {"file_path": tmp_path}
+        # Short Whisper clips are decoded in memory; everything else goes to a temp file
+        data = await file.read()
+        audio_info = await run_in_threadpool(audio_info_from_bytes, data, file.filename, in_memory=model == "whisper")
+        tmp_path = audio_info.get("file_path")
+        audio_info["quality"] = quality
 
         # Choose transcriber based on model
         if model == "whisper":
             from app.models.transcription_model import WhisperTranscriber
             transcriber = WhisperTranscriber()
-            transcription = transcriber.transcribe(audio_info)
+            transcription = await run_in_threadpool(transcriber.transcribe, audio_info)
         else:
             from app.services.assembly_transcriber import AssemblyTranscriber
             transcriber = AssemblyTranscriber()
@@ -44,16 +120,32 @@ async def summarize_audio_file(
         logger.info(f"Transcription completed for {file.filename}")
 
         # Summarize the transcription
-        summarizer = BertSummarizer()
-        summary_result = summarizer.process_lecture(transcription)
+        summarizer = SummarizationEngine()
+        summary_result = await run_in_threadpool(
+            summarizer.process_lecture, transcription, latency_budget=remaining_budget(latency_budget, received)
+        )
         if summary_result["error"]:
             raise HTTPException(status_code=400, detail=summary_result["error"])
 
+        await run_in_threadpool(
+            index_lecture,
+            hashlib.sha256(data).hexdigest(),
+            transcript=transcription,
+            summary=summary_result["detailed_summary"],
+            words=audio_info.get("words"),
+            title=file.filename,
+            model_used=audio_info.get("model_used"),
+        )
+
         return {
             "transcription": transcription,
+            "model_used": audio_info.get("model_used"),
             "summary": summary_result["detailed_summary"],
             "brief_summary": summary_result["brief_summary"],
             "key_points": summary_result["key_points"],
+            "summary_backend": summary_result["backend"],
+            "summary_strategy": summary_result["strategy"],
+            "summary_partial": summary_result["partial"],
         }
 
     except Exception as e:
@@ -61,5 +153,5 @@ async def summarize_audio_file(
         raise HTTPException(status_code=500, detail=str(e))
 
     finally:
-        if os.path.exists(tmp_path):
+        if 'tmp_path' in locals() and tmp_path and os.path.exists(tmp_path):
             os.remove(tmp_path)
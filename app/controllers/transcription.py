@@ -1,8 +1,11 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException, Form
 from app.models.transcription_model import WhisperTranscriber
+from app.models.whisper_policy import QUALITY_TIERS
 from app.services.assembly_transcriber import AssemblyTranscriber
-from app.utils.file_utils import save_upload_to_temp
-from starlette.concurrency import run_in_threadpool
+from app.services.search_index import index_lecture
+from app.utils.file_utils import audio_info_from_bytes
+from app.utils.profiling import run_in_threadpool
+import hashlib
 import tempfile
 import os
 import logging
@@ -13,23 +16,26 @@ router = APIRouter()
 @router.post("/audio/file")
 async def transcribe_audio_file(
     file: UploadFile = File(...),
-    model: str = Form("assembly")
+    model: str = Form("assembly"),
+    quality: str = Form("balanced"),
+    word_timestamps: bool = Form(False),
 ):
+    if quality not in QUALITY_TIERS:
+        raise HTTPException(status_code=400, detail=f"Unknown quality tier '{quality}', expected one of {sorted(QUALITY_TIERS)}")
     try:
         logger.info(f"Received file for transcription: {file.filename}")
         logger.info(f"Transcription model requested: {model}")
 
-        # Save uploaded audio to a temp file
-        tmp_path = await save_upload_to_temp(file)
-        logger.debug(f"Temporary file created at: {tmp_path}")
-
-        # Prepare audio_info dict
-        audio_info = {"file_path": tmp_path}
+        # Short Whisper clips are decoded in memory; everything else goes to a temp file
+        data = await file.read()
+        audio_info = await run_in_threadpool(audio_info_from_bytes, data, file.filename, in_memory=model == "whisper")
+        tmp_path = audio_info.get("file_path")
+        audio_info.update(quality=quality, word_timestamps=word_timestamps)
 
         # Select transcriber dynamically
         if model == "whisper":
             transcriber = WhisperTranscriber()
-            transcription = transcriber.transcribe(audio_info)  # Whisper is sync
+            transcription = await run_in_threadpool(transcriber.transcribe, audio_info)
         else:
             transcriber = AssemblyTranscriber()
             transcription = await run_in_threadpool(transcriber.transcribe, audio_info)
@@ -37,13 +43,27 @@ async def transcribe_audio_file(
         logger.info("Transcription completed successfully")
         logger.info(f"Transcription result: {transcription}")
 
-        return {"transcription": transcription}
+        await run_in_threadpool(
+            index_lecture,
+            hashlib.sha256(data).hexdigest(),
+            transcript=transcription,
+            words=audio_info.get("words"),
+            title=file.filename,
+            model_used=audio_info.get("model_used"),
+        )
+
+        response = {"transcription": transcription, "model_used": audio_info.get("model_used")}
+        if word_timestamps:
+            response["words"] = audio_info.get("words", [])
+        if "fingerprint_match" in audio_info:
+            response["fingerprint_match"] = audio_info["fingerprint_match"]
+        return response
 
     except Exception as e:
         logger.exception("Transcription failed due to an unexpected error")
         raise HTTPException(status_code=500, detail=str(e))
 
     finally:
-        if 'tmp_path' in locals() and os.path.exists(tmp_path):
+        if 'tmp_path' in locals() and tmp_path and os.path.exists(tmp_path):
             os.remove(tmp_path)
             logger.debug(f"Temporary file deleted: {tmp_path}")
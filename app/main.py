@@ -2,6 +2,10 @@ from fastapi import FastAPI
 from app.routes import register_routes
 from fastapi.middleware.cors import CORSMiddleware
 from app.logging_config import setup_logging
+from app.middleware.admission import AdmissionControlMiddleware
+from app.middleware.profiling import ProfilingMiddleware
+from app.middleware.trace import TraceRecordingMiddleware, trace_record_path
+from app.utils.profiling import profiling_enabled
 from dotenv import load_dotenv
 import os
 
@@ -11,6 +15,9 @@ setup_logging()
 
 app = FastAPI()
 
+if profiling_enabled():
+    app.add_middleware(ProfilingMiddleware)
+app.add_middleware(AdmissionControlMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"], # TODO: Restrict to bckend api after deployment
@@ -18,6 +25,10 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Outermost, so traces hold arrival times before admission queueing and
+# include requests that admission control rejects.
+if trace_record_path():
+    app.add_middleware(TraceRecordingMiddleware)
 
 # Register routes
 register_routes(app)
@@ -0,0 +1,299 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import os
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from starlette.responses import JSONResponse
+
+from app.utils.metrics import register_metrics_source
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_HIGH = 0
+PRIORITY_LOW = 1
+PRIORITY_NAMES = {PRIORITY_HIGH: "high", PRIORITY_LOW: "low"}
+
+# Longest prefix wins, so the audio endpoints under /summarize go to the ASR
+# pool while text summaries go to the summarization pool.
+ROUTE_POOLS: List[Tuple[str, str]] = [
+    ("/process/", "asr"),
+    ("/transcribe/", "asr"),
+    ("/summarize/audio", "asr"),
+    ("/summarize/", "summarization"),
+    ("/translate/", "translation"),
+]
+
+# name: (max_concurrency, max_queue, queue_timeout_s, small_request_bytes)
+POOL_DEFAULTS: Dict[str, Tuple[int, int, float, int]] = {
+    "asr": (1, 16, 300.0, 2_000_000),
+    "summarization": (2, 32, 120.0, 16_000),
+    "translation": (8, 64, 30.0, 16_000),
+}
+
+
+class PoolFullError(Exception):
+    """Raised when a pool's wait queue is already at capacity."""
+
+
+class QueueTimeoutError(Exception):
+    """Raised when a request waited longer than the pool's queue timeout."""
+
+
+class ConcurrencyPool:
+    """
+    Bounded concurrency pool with a bounded, priority-ordered wait queue.
+
+    Waiters are served lowest priority value first and FIFO within a
+    priority, so short interactive requests overtake queued bulk work.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        max_queue: int,
+        queue_timeout: float,
+        small_request_bytes: int,
+    ):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.small_request_bytes = small_request_bytes
+
+        self._active = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+
+        self._wait_times: Dict[int, Deque[float]] = {
+            PRIORITY_HIGH: deque(maxlen=1000),
+            PRIORITY_LOW: deque(maxlen=1000),
+        }
+        self._service_time_ewma: Optional[float] = None
+        self.admitted = 0
+        self.rejected_full = 0
+        self.rejected_timeout = 0
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def priority_for(self, request_bytes: int) -> int:
+        return PRIORITY_HIGH if request_bytes <= self.small_request_bytes else PRIORITY_LOW
+
+    async def acquire(self, priority: int) -> float:
+        """Wait for a slot and return the time spent queued, in seconds."""
+        start = time.perf_counter()
+        if self._active < self.max_concurrency and not self._waiters:
+            self._active += 1
+            self._record_admission(priority, 0.0)
+            return 0.0
+
+        if len(self._waiters) >= self.max_queue:
+            self.rejected_full += 1
+            raise PoolFullError(f"{self.name} queue is full")
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (priority, next(self._sequence), future)
+        heapq.heappush(self._waiters, entry)
+        try:
+            # release() hands the slot over by resolving the future, so the
+            # active count is already accounted for when this returns.
+            await asyncio.wait_for(future, timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._remove_waiter(entry)
+            self.rejected_timeout += 1
+            raise QueueTimeoutError(f"{self.name} queue wait exceeded {self.queue_timeout}s")
+        except asyncio.CancelledError:
+            self._remove_waiter(entry)
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+        waited = time.perf_counter() - start
+        self._record_admission(priority, waited)
+        return waited
+
+    def release(self, service_time: Optional[float] = None):
+        if service_time is not None:
+            if self._service_time_ewma is None:
+                self._service_time_ewma = service_time
+            else:
+                self._service_time_ewma = 0.8 * self._service_time_ewma + 0.2 * service_time
+
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._active -= 1
+
+    def retry_after(self) -> int:
+        """Estimate in seconds until a new request could be admitted."""
+        service_time = self._service_time_ewma or 1.0
+        backlog = (self.queued + 1) / self.max_concurrency
+        return max(1, math.ceil(service_time * backlog))
+
+    def _remove_waiter(self, entry):
+        try:
+            self._waiters.remove(entry)
+            heapq.heapify(self._waiters)
+        except ValueError:
+            pass
+
+    def _record_admission(self, priority: int, waited: float):
+        self.admitted += 1
+        self._wait_times[priority].append(waited)
+
+    def snapshot(self) -> Dict:
+        lanes = {}
+        for priority, waits in self._wait_times.items():
+            ordered = sorted(waits)
+            lanes[PRIORITY_NAMES[priority]] = {
+                "queued": sum(1 for p, _, _ in self._waiters if p == priority),
+                "samples": len(ordered),
+                "wait_p50_ms": _percentile(ordered, 50) * 1000,
+                "wait_p95_ms": _percentile(ordered, 95) * 1000,
+                "wait_p99_ms": _percentile(ordered, 99) * 1000,
+            }
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "rejected_full": self.rejected_full,
+            "rejected_timeout": self.rejected_timeout,
+            "service_time_ewma_s": self._service_time_ewma,
+            "lanes": lanes,
+        }
+
+
+def _percentile(ordered: List[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _pool_from_env(name: str) -> ConcurrencyPool:
+    max_concurrency, max_queue, queue_timeout, small_bytes = POOL_DEFAULTS[name]
+    prefix = name.upper()
+    return ConcurrencyPool(
+        name,
+        max_concurrency=int(os.getenv(f"{prefix}_MAX_CONCURRENCY", max_concurrency)),
+        max_queue=int(os.getenv(f"{prefix}_MAX_QUEUE", max_queue)),
+        queue_timeout=float(os.getenv(f"{prefix}_QUEUE_TIMEOUT", queue_timeout)),
+        small_request_bytes=int(os.getenv(f"{prefix}_SMALL_REQUEST_BYTES", small_bytes)),
+    )
+
+
+_pools: Dict[str, ConcurrencyPool] = {}
+
+
+def get_pools() -> Dict[str, ConcurrencyPool]:
+    if not _pools:
+        for name in POOL_DEFAULTS:
+            _pools[name] = _pool_from_env(name)
+        register_metrics_source("admission", lambda: {n: p.snapshot() for n, p in _pools.items()})
+    return _pools
+
+
+def queue_depth(pool_name: str) -> int:
+    """Number of requests waiting for or holding a slot in the given pool."""
+    pool = get_pools().get(pool_name)
+    return pool.queued + pool.active if pool else 0
+
+
+def pool_for_path(path: str) -> Optional[str]:
+    best = None
+    for prefix, name in ROUTE_POOLS:
+        if path.startswith(prefix) and (best is None or len(prefix) > len(best[0])):
+            best = (prefix, name)
+    return best[1] if best else None
+
+
+class AdmissionControlMiddleware:
+    """
+    ASGI middleware that admits heavyweight requests through per-workload
+    concurrency pools and sheds load once the pools' queues are full.
+
+    Requests are placed in the high priority lane when their body (or query
+    string, for text endpoints) is small, unless an `X-Priority: high|low`
+    header says otherwise. A full queue answers 429 and a queue wait past the
+    pool's timeout answers 503, both with a Retry-After estimate.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.pools = get_pools()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        pool_name = pool_for_path(scope["path"])
+        if pool_name is None:
+            await self.app(scope, receive, send)
+            return
+
+        pool = self.pools[pool_name]
+        priority = self._priority(scope, pool)
+        try:
+            waited = await pool.acquire(priority)
+        except PoolFullError as e:
+            await self._reject(scope, receive, send, 429, str(e), pool)
+            return
+        except QueueTimeoutError as e:
+            await self._reject(scope, receive, send, 503, str(e), pool)
+            return
+
+        async def send_with_wait_header(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-queue-wait-ms", f"{waited * 1000:.1f}".encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_wait_header)
+        finally:
+            pool.release(time.perf_counter() - start)
+
+    @staticmethod
+    def _priority(scope, pool: ConcurrencyPool) -> int:
+        headers = dict(scope.get("headers", []))
+        requested = headers.get(b"x-priority", b"").decode().lower()
+        if requested == "high":
+            return PRIORITY_HIGH
+        if requested == "low":
+            return PRIORITY_LOW
+
+        try:
+            content_length = int(headers.get(b"content-length", b"0"))
+        except ValueError:
+            content_length = 0
+        request_bytes = max(content_length, len(scope.get("query_string", b"")))
+        return pool.priority_for(request_bytes)
+
+    @staticmethod
+    async def _reject(scope, receive, send, status_code: int, detail: str, pool: ConcurrencyPool):
+        retry_after = pool.retry_after()
+        logger.warning(f"Rejecting {scope['path']} with {status_code}: {detail}")
+        response = JSONResponse(
+            {"detail": detail, "retry_after": retry_after},
+            status_code=status_code,
+            headers={"Retry-After": str(retry_after)},
+        )
+        await response(scope, receive, send)
@@ -0,0 +1,79 @@
+import logging
+import os
+import threading
+import uuid
+from typing import Optional
+from urllib.parse import parse_qs
+
+from app.utils.profiling import (
+    RequestProfile,
+    activate_profile,
+    deactivate_profile,
+    get_profile_store,
+)
+
+logger = logging.getLogger(__name__)
+
+_MODE_ALIASES = {"1": "stack", "true": "stack", "yes": "stack", "stack": "stack", "torch": "torch"}
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that profiles requests sent with an `X-Profile` header
+    or a `profile` query parameter (`1`/`stack` for stack sampling, `torch`
+    to also run torch.profiler around model calls).
+
+    The profile id is returned in the `X-Profile-Id` response header and the
+    result is served at /debug/profile/{id}. Only added when ENABLE_PROFILING
+    is set; other requests pass straight through.
+    """
+
+    def __init__(self, app, interval: Optional[float] = None):
+        self.app = app
+        self.interval = interval or float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5")) / 1000
+        self.store = get_profile_store()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith("/debug/"):
+            await self.app(scope, receive, send)
+            return
+
+        mode = self._requested_mode(scope)
+        if mode is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(uuid.uuid4().hex, scope["path"], mode, self.interval)
+        profile_id = profile.request_id.encode()
+
+        async def send_with_profile_header(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-id", profile_id))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        # The event loop thread is shared with other requests, so its samples
+        # also show them; the worker threads belong to this request alone.
+        profile.sampler.add_thread(threading.get_ident(), "event_loop")
+        self.store.add(profile)
+        token = activate_profile(profile)
+        profile.start()
+        try:
+            await self.app(scope, receive, send_with_profile_header)
+        finally:
+            profile.stop()
+            deactivate_profile(token)
+            logger.info(
+                f"Profiled {scope['path']} as {profile.request_id} "
+                f"({len(profile.sampler.samples)} samples, mode {mode})"
+            )
+
+    @staticmethod
+    def _requested_mode(scope) -> Optional[str]:
+        headers = dict(scope.get("headers", []))
+        requested = headers.get(b"x-profile", b"").decode().lower()
+        if not requested:
+            query = parse_qs(scope.get("query_string", b"").decode())
+            requested = query.get("profile", [""])[0].lower()
+        return _MODE_ALIASES.get(requested)
@@ -0,0 +1,119 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from app.utils.profiling import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+# Request headers kept in traces; everything else (auth, cookies) is dropped.
+RECORDED_HEADERS = (b"content-type", b"x-priority")
+
+
+def trace_record_path() -> Optional[str]:
+    return os.getenv("TRACE_RECORD_PATH") or None
+
+
+class TraceWriter:
+    """
+    Appends request traces to a JSONL file. Request bodies are stored once
+    each under <trace>.blobs/<sha256>, so repeated uploads of the same file
+    cost one copy, and the JSONL stays small enough to read and edit.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.blob_dir = self.path.with_name(self.path.name + ".blobs")
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def write(self, record: Dict, body: bytes):
+        if body:
+            digest = hashlib.sha256(body).hexdigest()
+            blob = self.blob_dir / digest
+            if not blob.exists():
+                tmp = blob.with_name(f"{digest}.tmp-{threading.get_ident()}")
+                tmp.write_bytes(body)
+                os.replace(tmp, blob)
+            record["body"] = digest
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock, open(self.path, "a") as f:
+            f.write(line)
+
+
+class TraceRecordingMiddleware:
+    """
+    ASGI middleware that records every HTTP request (arrival time, method,
+    path, query string, content type, body) with its response status and
+    latency, for replay with scripts/load_replay.py. Only added when
+    TRACE_RECORD_PATH is set.
+
+    The body is captured as the app reads it, so recording adds no extra
+    buffering in front of the app. Bodies over TRACE_MAX_BODY_BYTES, or that
+    the app did not read in full, are not stored and their requests are
+    marked "truncated". /debug/ and /metrics/ requests are not recorded.
+    """
+
+    def __init__(self, app, path: Optional[str] = None, max_body_bytes: Optional[int] = None):
+        self.app = app
+        self.writer = TraceWriter(path or trace_record_path())
+        self.max_body_bytes = max_body_bytes or int(os.getenv("TRACE_MAX_BODY_BYTES", str(200 * 1024 * 1024)))
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(("/debug/", "/metrics")):
+            await self.app(scope, receive, send)
+            return
+
+        arrived = time.time()
+        start = time.perf_counter()
+        chunks, size, truncated = [], 0, False
+        status = None
+
+        async def recording_receive():
+            nonlocal size, truncated
+            message = await receive()
+            if message["type"] == "http.request" and not truncated:
+                body = message.get("body", b"")
+                size += len(body)
+                if size > self.max_body_bytes:
+                    truncated, chunks[:] = True, []
+                else:
+                    chunks.append(body)
+            return message
+
+        async def recording_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, recording_receive, recording_send)
+        finally:
+            headers = dict(scope.get("headers", []))
+            try:
+                # The app may stop reading early (e.g. on a validation error).
+                truncated = truncated or size < int(headers.get(b"content-length", b"0"))
+            except ValueError:
+                pass
+            record = {
+                "ts": arrived,
+                "method": scope["method"],
+                "path": scope["path"],
+                "query": scope.get("query_string", b"").decode("latin-1"),
+                "headers": {name.decode(): headers[name].decode("latin-1") for name in RECORDED_HEADERS if name in headers},
+                "body": None,
+                "body_bytes": size,
+                "truncated": truncated,
+                "status": status,
+                "latency_ms": round(1000 * (time.perf_counter() - start), 2),
+            }
+            try:
+                await run_in_threadpool(self.writer.write, record, b"" if truncated else b"".join(chunks))
+            except Exception:
+                logger.exception(f"Failed to record trace of {scope['path']}")
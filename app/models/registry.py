@@ -0,0 +1,87 @@
+import gc
+import logging
+import threading
+from typing import Callable, Dict, Iterable, Tuple
+
+from models.bert.load_bert_summarizer import load_bert_summarizer, load_draft_summarizer
+from models.longt5.load_longt5_summarizer import load_longt5_summarizer
+from models.whisper_pretrained.load_whisper import load_whisper_model
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WHISPER_MODEL = "openai/whisper-base"
+DEFAULT_SUMMARIZER_MODEL = "philschmid/bart-large-cnn-samsum"
+DEFAULT_LONG_CONTEXT_MODEL = "pszemraj/long-t5-tglobal-base-16384-book-summary"
+
+_models: Dict[Tuple[str, str], object] = {}
+_lock = threading.Lock()
+
+
+def _get_or_load(kind: str, model_name: str, loader: Callable[[str], object]):
+    """
+    Return the cached model for (kind, model_name), loading it on first use.
+
+    Loading happens under a process-wide lock so concurrent requests never
+    load the same weights twice.
+    """
+    key = (kind, model_name)
+    model = _models.get(key)
+    if model is not None:
+        return model
+
+    with _lock:
+        model = _models.get(key)
+        if model is None:
+            logger.info(f"Loading {kind} model into registry: {model_name}")
+            model = loader(model_name)
+            _models[key] = model
+        return model
+
+
+def get_whisper_model(model_name: str = DEFAULT_WHISPER_MODEL):
+    return _get_or_load("whisper", model_name, load_whisper_model)
+
+
+def get_summarizer_model(model_name: str = DEFAULT_SUMMARIZER_MODEL):
+    return _get_or_load("summarizer", model_name, load_bert_summarizer)
+
+
+def get_draft_summarizer_model(model_name: str):
+    return _get_or_load("draft_summarizer", model_name, load_draft_summarizer)
+
+
+def get_long_context_model(model_name: str = DEFAULT_LONG_CONTEXT_MODEL):
+    return _get_or_load("long_context", model_name, load_longt5_summarizer)
+
+
+def loaded_models() -> Dict[str, str]:
+    """Return the names of the models currently held by the registry."""
+    return {f"{kind}:{name}": type(model).__name__ for (kind, name), model in _models.items()}
+
+
+def preload_models(
+    whisper_models: Iterable[str] = (DEFAULT_WHISPER_MODEL,),
+    summarizer_models: Iterable[str] = (DEFAULT_SUMMARIZER_MODEL,),
+    draft_summarizer_models: Iterable[str] = (),
+    long_context_models: Iterable[str] = (),
+):
+    """
+    Load models before worker processes are forked.
+
+    Weights loaded here live in the parent process and are shared
+    copy-on-write with every forked worker. The objects are moved to the
+    permanent GC generation afterwards so that garbage collection in the
+    workers does not touch (and therefore copy) the pages holding them.
+    """
+    for model_name in whisper_models:
+        get_whisper_model(model_name)
+    for model_name in summarizer_models:
+        get_summarizer_model(model_name)
+    for model_name in draft_summarizer_models:
+        get_draft_summarizer_model(model_name)
+    for model_name in long_context_models:
+        get_long_context_model(model_name)
+
+    gc.collect()
+    gc.freeze()
+    logger.info(f"Preloaded models: {', '.join(loaded_models())}")
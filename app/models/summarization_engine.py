@@ -0,0 +1,108 @@
+import logging
+import os
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from app.models.longT5_model import LongContextSummarizer
+from app.models.registry import DEFAULT_LONG_CONTEXT_MODEL
+from app.models.summarization_model import BertSummarizer
+from models.bert.preprocess_text import preprocess_lecture_text
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("auto", "bart", "long_context")
+
+
+class SummarizationEngine:
+    """
+    Single entry point for lecture summarization.
+
+    Short transcripts that fit BART's 1024-token window go to BART in one
+    chunk. Longer transcripts up to long_context_max_tokens (counted with the
+    long-context model's tokenizer) are summarized in a single pass by the
+    long-context model. Anything longer falls back to chunked BART. The
+    backend can be pinned with `backend` or the SUMMARIZER_BACKEND
+    environment variable; results report which one ran.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[str] = None,
+        long_context_model_name: Optional[str] = None,
+        bart_max_tokens: int = 1024,
+        long_context_max_tokens: int = 16384,
+        **bart_kwargs,
+    ):
+        self.backend = backend or os.getenv("SUMMARIZER_BACKEND", "auto")
+        if self.backend not in BACKENDS:
+            raise ValueError(f"Unknown summarizer backend '{self.backend}', expected one of {BACKENDS}")
+        self.long_context_model_name = long_context_model_name or os.getenv(
+            "LONG_CONTEXT_SUMMARIZER_MODEL", DEFAULT_LONG_CONTEXT_MODEL
+        )
+        self.bart_max_tokens = bart_max_tokens
+        self.long_context_max_tokens = long_context_max_tokens
+        self.bart = BertSummarizer(**bart_kwargs)
+        self._long_context: Optional[LongContextSummarizer] = None
+
+    @property
+    def long_context(self) -> LongContextSummarizer:
+        # Loaded on first use so BART-only deployments never pay for it.
+        if self._long_context is None:
+            self._long_context = LongContextSummarizer(
+                self.long_context_model_name, max_input_tokens=self.long_context_max_tokens
+            )
+        return self._long_context
+
+    def choose_backend(self, text: str, preprocessed: bool = False) -> str:
+        """preprocessed: text is already the output of preprocess_lecture_text."""
+        if self.backend != "auto":
+            return self.backend
+
+        clean_text = text if preprocessed else preprocess_lecture_text(text)
+        tokens = len(self.bart.model.tokenizer(clean_text, verbose=False)["input_ids"])
+        if tokens <= self.bart_max_tokens:
+            return "bart"
+        # The long-context model's own tokenizer decides whether the text fits
+        # its window; it may count more tokens than BART's does.
+        if self.long_context.count_tokens(clean_text) > self.long_context_max_tokens:
+            return "bart"
+        return "long_context"
+
+    def process_lecture(
+        self,
+        text: str,
+        min_length: Optional[int] = None,
+        max_length: Optional[int] = None,
+        latency_budget: Optional[float] = None,
+    ) -> Dict:
+        """
+        latency_budget (seconds) makes chunked BART plan its work against a
+        deadline (see BertSummarizer.process_lecture). A single long-context
+        pass can neither be degraded nor stopped early, so with a budget the
+        "auto" backend always picks BART; a pinned long_context backend runs
+        in full and ignores the budget.
+        """
+        preprocessed = False
+        if self.backend != "auto":
+            backend = self.backend
+        elif latency_budget is not None:
+            backend = "bart"
+        else:
+            # Cleaned once here, for choosing the backend and for the summarizer.
+            text, preprocessed = preprocess_lecture_text(text), True
+            backend = self.choose_backend(text, preprocessed=True)
+        logger.info(f"Summarizing with the {backend} backend")
+        if backend == "long_context":
+            result = self.long_context.process_lecture(text, min_length, max_length, preprocessed=preprocessed)
+            result.update(strategy="full", partial=False)
+        else:
+            result = self.bart.process_lecture(
+                text, min_length, max_length, latency_budget=latency_budget, preprocessed=preprocessed
+            )
+        result["backend"] = backend
+        return result
+
+    def process_lectures(self, documents: Iterable[Tuple[str, str]], **kwargs) -> Iterator[Tuple[str, Dict]]:
+        """Batched multi-document summarization, always on chunked BART."""
+        for doc_id, result in self.bart.process_lectures(documents, **kwargs):
+            result["backend"] = "bart"
+            yield doc_id, result
@@ -1,29 +1,227 @@
-from typing import List, Dict, Optional
+from typing import Iterable, Iterator, List, Dict, Optional, Tuple
+from collections import Counter, defaultdict
+import os
 import logging
-from tqdm import tqdm
+import re
+import time
 import numpy as np
 from nltk.tokenize import sent_tokenize, word_tokenize
-from models.bert.load_bert_summarizer import load_bert_summarizer
 from models.bert.preprocess_text import preprocess_lecture_text, setup_nltk
-from models.bert.chunk_text import create_smart_chunks
+from models.bert.chunk_text import create_dedup_chunks, create_smart_chunks, create_stable_chunks, stable_hash
+from app.models.registry import (
+    DEFAULT_SUMMARIZER_MODEL,
+    get_draft_summarizer_model,
+    get_summarizer_model,
+)
+from app.utils.batching import get_batch_controller, is_out_of_memory
+from app.utils.cache import content_key, get_cache
+from app.utils.latency_budget import GenerationCostModel, get_cost_model
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Chunk strategies under a latency budget, best first: the decoding mode the
+# cost model prices and the share of the chunk's max_length it generates.
+BUDGET_STRATEGIES = {
+    "full": ("sampled", 1.0),
+    "reduced": ("sampled", 0.5),
+    "greedy": ("greedy", 0.5),
+    "extractive": ("extractive", 0.5),
+}
+
+
+def chunk_input_text(chunk: Dict[str, str]) -> str:
+    """Return the text fed to the model for a chunk: its text plus next context."""
+    full_text = chunk["text"]
+    if chunk["next_context"]:
+        full_text += f" {chunk['next_context']}"
+    return full_text
+
+
+def chunk_length_bounds(
+    full_text: str,
+    max_summary_ratio: float,
+    min_length: Optional[int] = None,
+    max_length: Optional[int] = None,
+) -> Tuple[int, int]:
+    """Scale the summary length limits with the length of the chunk."""
+    text_words = len(word_tokenize(full_text))
+    if not min_length:
+        min_length = min(50, max(30, int(text_words * 0.1)))
+    if not max_length:
+        max_length = min(150, max(100, int(text_words * max_summary_ratio)))
+    return min_length, max_length
+
+
+def error_result(message: str) -> Dict:
+    return {
+        "error": message,
+        "detailed_summary": "",
+        "brief_summary": "",
+        "key_points": [],
+    }
+
+
+def strategy_bounds(strategy: str, min_length: int, max_length: int) -> Tuple[int, int]:
+    """Length limits of a chunk summarized with strategy, from its full limits."""
+    scale = BUDGET_STRATEGIES[strategy][1]
+    scaled_max = max(20, int(max_length * scale))
+    return min(max(10, int(min_length * scale)), scaled_max - 1), scaled_max
+
+
+def extractive_summary(text: str, max_words: int) -> str:
+    """
+    Summary made of the text's own sentences: those whose words are most
+    frequent in the text, up to max_words, in their original order. Costs
+    no model call, so it is the last resort under a latency budget.
+    """
+    sentences = sent_tokenize(text)
+    if not sentences:
+        return ""
+    # Words of four letters or more stand in for content words.
+    frequencies = Counter(re.findall(r"\w{4,}", text.lower()))
+
+    def score(sentence: str) -> float:
+        words = re.findall(r"\w{4,}", sentence.lower())
+        return sum(frequencies[word] for word in words) / (len(words) + 1)
+
+    chosen, words = set(), 0
+    for index in sorted(range(len(sentences)), key=lambda i: score(sentences[i]), reverse=True):
+        length = len(sentences[index].split())
+        if chosen and words + length > max_words:
+            continue
+        chosen.add(index)
+        words += length
+    return " ".join(sentences[i] for i in sorted(chosen))
+
+
+def plan_strategies(
+    max_lengths: List[int], min_lengths: List[int], available: float, costs: GenerationCostModel
+) -> List[Optional[str]]:
+    """
+    Strategy per chunk so the estimated cost of all of them fits in
+    available seconds. Every chunk gets the best strategy that the whole
+    remainder can afford, then chunks are upgraded one level in order while
+    the budget allows, so earlier chunks are never worse than later ones.
+    Chunks that not even the extractive strategy can cover are None.
+    """
+    levels = list(BUDGET_STRATEGIES)
+
+    def cost(index: int, strategy: str) -> float:
+        _, length = strategy_bounds(strategy, min_lengths[index], max_lengths[index])
+        return costs.estimate(BUDGET_STRATEGIES[strategy][0], length)
+
+    chunks = range(len(max_lengths))
+    for level, strategy in enumerate(levels):
+        total = sum(cost(i, strategy) for i in chunks)
+        if total <= available:
+            break
+    else:
+        plan, total = [], 0.0
+        for i in chunks:
+            total += cost(i, "extractive")
+            plan.append("extractive" if total <= available else None)
+        return plan
+
+    plan = [strategy] * len(max_lengths)
+    if level > 0:
+        better = levels[level - 1]
+        for i in chunks:
+            extra = cost(i, better) - cost(i, strategy)
+            if total + extra > available:
+                break
+            plan[i] = better
+            total += extra
+    return plan
+
+
+def overall_strategy(strategies: List[Optional[str]]) -> str:
+    used = set(strategy for strategy in strategies if strategy is not None)
+    return used.pop() if len(used) == 1 else "mixed"
+
+
+def extract_key_points(text: str, num_points: int = 5) -> List[str]:
+    """Extract key points from the summary."""
+    try:
+        sentences = sent_tokenize(text)
+        if len(sentences) <= num_points:
+            return sentences
+
+        indices = np.linspace(0, len(sentences) - 1, num_points, dtype=int)
+        return [sentences[i] for i in indices]
+    except Exception as e:
+        logger.error(f"Error extracting key points: {str(e)}")
+        return []
+
+
 class BertSummarizer:
     def __init__(
         self,
-        model_name: str = "philschmid/bart-large-cnn-samsum",
+        model_name: str = DEFAULT_SUMMARIZER_MODEL,
         chunk_size: int = 800,
         overlap_size: int = 100,
         max_summary_ratio: float = 0.3,
+        assistant_model_name: Optional[str] = None,
+        chunking: Optional[str] = None,
+        reduce_group_size: int = 8,
     ):
+        """
+        assistant_model_name enables assisted decoding: a small draft model
+        sharing the BART tokenizer (e.g. "sshleifer/distilbart-cnn-12-6")
+        proposes tokens that the main model verifies. Decoding becomes greedy
+        so the output is exactly what the main model would produce on its own.
+        Defaults to the SUMMARIZER_ASSISTANT_MODEL environment variable.
+
+        chunking selects the chunk planner: "overlap" (default) carries 3
+        sentences of overlap and 3 of look-ahead context per chunk, "dedup"
+        encodes every sentence once with a single sentence of lead-in context,
+        "stable" is like "dedup" but places boundaries by sentence content so
+        edits leave the other chunks unchanged. Defaults to the
+        SUMMARIZER_CHUNKING environment variable.
+
+        Chunk summaries are cached by a hash of the model, generation settings
+        and chunk text, so re-summarizing an edited or extended transcript only
+        runs the model on chunks whose text changed. The brief summary is built
+        from summaries of groups of about reduce_group_size chunks, also
+        cached, so only the groups touched by a change are rebuilt.
+        """
         setup_nltk()
         self.model_name = model_name
         self.chunk_size = chunk_size
         self.overlap_size = overlap_size
         self.max_summary_ratio = max_summary_ratio
-        self.model = load_bert_summarizer(model_name)
+        self.chunking = chunking or os.getenv("SUMMARIZER_CHUNKING", "overlap")
+        if self.chunking not in ("overlap", "dedup", "stable"):
+            raise ValueError(f"Unknown chunking strategy: {self.chunking}")
+        self.reduce_group_size = reduce_group_size
+        self.model = get_summarizer_model(model_name)
+        self.cache = get_cache("summary")
+
+        self.assistant_model_name = assistant_model_name or os.getenv("SUMMARIZER_ASSISTANT_MODEL")
+        self.assistant_model = None
+        if self.assistant_model_name:
+            self.assistant_model = get_draft_summarizer_model(self.assistant_model_name)
+
+    def _generation_kwargs(self, **overrides) -> Dict:
+        if self.assistant_model is not None:
+            # Assisted generation only supports greedy search, while BART
+            # checkpoints default to beam search.
+            kwargs = {"do_sample": False, "num_beams": 1, "assistant_model": self.assistant_model}
+        else:
+            kwargs = {"do_sample": True, "temperature": 0.7, "top_p": 0.9}
+        kwargs.update(overrides)
+        return kwargs
+
+    def _cache_key(self, kind: str, text: str, min_length: int, max_length: int) -> str:
+        # Sampled outputs are cached too: a cached summary is one valid draw.
+        return content_key(self.model_name, self.assistant_model_name, kind, min_length, max_length, text)
+
+    def _create_chunks(self, clean_text: str) -> List[Dict[str, str]]:
+        if self.chunking == "dedup":
+            return create_dedup_chunks(clean_text, self.chunk_size)
+        if self.chunking == "stable":
+            return create_stable_chunks(clean_text, self.chunk_size)
+        return create_smart_chunks(clean_text, self.chunk_size, self.overlap_size)
 
     def _summarize_chunk(
         self,
@@ -35,24 +233,16 @@ class BertSummarizer:
         Summarize a single chunk while considering context.
         """
         try:
-            full_text = chunk["text"]
-            if chunk["next_context"]:
-                full_text += f" {chunk['next_context']}"
-
-            text_words = len(word_tokenize(full_text))
-            if not min_length:
-                min_length = min(50, max(30, int(text_words * 0.1)))
-            if not max_length:
-                max_length = min(150, max(100, int(text_words * self.max_summary_ratio)))
+            full_text = chunk_input_text(chunk)
+            min_length, max_length = chunk_length_bounds(
+                full_text, self.max_summary_ratio, min_length, max_length
+            )
 
             summary = self.model(
                 full_text,
                 min_length=min_length,
                 max_length=max_length,
-                do_sample=True,
-                temperature=0.7,
-                top_p=0.9,
-                repetition_penalty=1.2,
+                **self._generation_kwargs(repetition_penalty=1.2),
             )[0]["summary_text"].strip()
 
             return summary
@@ -65,40 +255,33 @@ class BertSummarizer:
         text: str,
         min_length: Optional[int] = None,
         max_length: Optional[int] = None,
+        latency_budget: Optional[float] = None,
+        preprocessed: bool = False,
     ) -> Dict[str, str]:
         """
-        Process and summarize a complete lecture transcript.
+        Process and summarize a complete lecture transcript. preprocessed
+        means text is already the output of preprocess_lecture_text.
+
+        With latency_budget (seconds) the work is planned against a deadline
+        instead of running every chunk through full generation; see
+        _summarize_chunks_budgeted. "strategy" in the result is the chunk
+        strategy used ("full", "reduced", "greedy", "extractive" or
+        "mixed"), and "partial" is true when the deadline cut the lecture
+        short.
         """
         try:
-            clean_text = preprocess_lecture_text(text)
+            clean_text = text if preprocessed else preprocess_lecture_text(text)
             if not clean_text:
-                return {
-                    "error": "Empty or invalid text after preprocessing",
-                    "detailed_summary": "",
-                    "brief_summary": "",
-                    "key_points": [],
-                }
-
-            chunks = create_smart_chunks(clean_text, self.chunk_size, self.overlap_size)
-            chunk_summaries = []
-            for chunk in tqdm(chunks, desc="Processing lecture chunks"):
-                summary = self._summarize_chunk(chunk, min_length, max_length)
-                chunk_summaries.append(summary)
+                return error_result("Empty or invalid text after preprocessing")
 
-            detailed_summary = " ".join(chunk_summaries)
+            chunks = self._create_chunks(clean_text)
+            if latency_budget is not None:
+                return self._process_lecture_budgeted(chunks, time.monotonic() + latency_budget, min_length, max_length)
 
-            try:
-                brief_summary = self.model(
-                    detailed_summary,
-                    min_length=50,
-                    max_length=150,
-                    do_sample=True,
-                    temperature=0.7,
-                    top_p=0.9,
-                )[0]["summary_text"]
-            except Exception as e:
-                logger.error(f"Error creating brief summary: {str(e)}")
-                brief_summary = chunk_summaries[0]
+            chunk_summaries = self._summarize_chunks_batched(chunks, None, min_length, max_length)
+
+            detailed_summary = " ".join(chunk_summaries)
+            brief_summary = self._reduce(chunk_summaries)
 
             key_points = self._extract_key_points(detailed_summary)
 
@@ -107,28 +290,367 @@ class BertSummarizer:
                 "detailed_summary": detailed_summary,
                 "brief_summary": brief_summary,
                 "key_points": key_points,
+                "strategy": "full",
+                "partial": False,
             }
         except Exception as e:
             logger.error(f"Error processing lecture: {str(e)}")
-            return {
-                "error": f"Processing failed: {str(e)}",
-                "detailed_summary": "",
-                "brief_summary": "",
-                "key_points": [],
-            }
+            return error_result(f"Processing failed: {str(e)}")
+
+    def _process_lecture_budgeted(
+        self,
+        chunks: List[Dict[str, str]],
+        deadline: float,
+        min_length: Optional[int],
+        max_length: Optional[int],
+    ) -> Dict:
+        costs = get_cost_model("bart")
+        summaries, strategies = self._summarize_chunks_budgeted(chunks, deadline, min_length, max_length, costs)
+        covered = summaries[: strategies.index(None)] if None in strategies else summaries
+        if not covered:
+            # Out of time before the first chunk: still return its extract.
+            full_text = chunk_input_text(chunks[0])
+            _, chunk_max = chunk_length_bounds(full_text, self.max_summary_ratio, min_length, max_length)
+            covered = [extractive_summary(full_text, strategy_bounds("extractive", 0, chunk_max)[1])]
+            strategies[0] = "extractive"
+
+        detailed_summary = " ".join(covered)
+        groups = len(self._reduce_groups(covered))
+        reduce_calls = groups + 1 if groups > 1 else 1
+        if deadline - time.monotonic() >= reduce_calls * costs.estimate("sampled", 150):
+            brief_summary, brief_strategy = self._reduce(covered), "full"
+        else:
+            brief_summary, brief_strategy = extractive_summary(detailed_summary, 100), "extractive"
+
+        used = strategies[: len(covered)]
+        logger.info(
+            f"Budgeted summary: {len(covered)}/{len(chunks)} chunks, "
+            f"strategies {dict(Counter(used))}, brief {brief_strategy}"
+        )
+        return {
+            "error": None,
+            "detailed_summary": detailed_summary,
+            "brief_summary": brief_summary,
+            "key_points": self._extract_key_points(detailed_summary),
+            "strategy": overall_strategy(used),
+            "chunk_strategies": dict(Counter(used)),
+            "brief_strategy": brief_strategy,
+            "partial": len(covered) < len(chunks),
+            "chunks_summarized": len(covered),
+            "chunks_total": len(chunks),
+        }
+
+    def _strategy_generation_kwargs(self, strategy: str) -> Dict:
+        if BUDGET_STRATEGIES[strategy][0] == "greedy":
+            kwargs = {"do_sample": False, "num_beams": 1, "repetition_penalty": 1.2}
+            if self.assistant_model is not None:
+                kwargs["assistant_model"] = self.assistant_model
+            return kwargs
+        return self._generation_kwargs(repetition_penalty=1.2)
+
+    def _summarize_chunks_budgeted(
+        self,
+        chunks: List[Dict[str, str]],
+        deadline: float,
+        min_length: Optional[int],
+        max_length: Optional[int],
+        costs: GenerationCostModel,
+    ) -> Tuple[List[Optional[str]], List[Optional[str]]]:
+        """
+        Summarize chunks in order against a deadline (a time.monotonic()
+        value) and return their summaries with the strategy each got.
+
+        Chunks with a cached full summary cost nothing. Before every batch
+        the remaining chunks are planned (see plan_strategies) against the
+        time left, minus a reserve for the brief summary, using the cost
+        model's per-token estimates; each batch's timing refines the
+        estimates for the next plan. The next batch is the run of chunks at
+        the head of the plan sharing one strategy. Chunks still pending at
+        the deadline get None, and only the prefix before the first of them
+        is used, so a cut-short summary still reads in order.
+        """
+        texts = [chunk_input_text(chunk) for chunk in chunks]
+        bounds = [chunk_length_bounds(text, self.max_summary_ratio, min_length, max_length) for text in texts]
+        summaries: List[Optional[str]] = [
+            self.cache.get(self._cache_key("chunk", text, *chunk_bounds)) for text, chunk_bounds in zip(texts, bounds)
+        ]
+        strategies: List[Optional[str]] = ["full" if summary is not None else None for summary in summaries]
+        pending = [i for i, summary in enumerate(summaries) if summary is None]
+
+        controller = get_batch_controller("bart")
+        limit = 1 if self.assistant_model is not None else None
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            # The brief summary falls back to an extract, so it only gets a
+            # reserve when that does not starve the chunks.
+            reserve = costs.estimate("sampled", 150)
+            plan = plan_strategies(
+                [bounds[i][1] for i in pending],
+                [bounds[i][0] for i in pending],
+                remaining - reserve if reserve <= remaining / 4 else remaining,
+                costs,
+            )
+            strategy = plan[0]
+            if strategy is None:
+                break
+            run = 1
+            while run < len(plan) and plan[run] == strategy and bounds[pending[run]] == bounds[pending[0]]:
+                run += 1
+            mode = BUDGET_STRATEGIES[strategy][0]
+            if mode != "extractive":
+                run = min(run, controller.batch_size(limit))
+            batch, pending = pending[:run], pending[run:]
+
+            limits = strategy_bounds(strategy, *bounds[batch[0]])
+            start = time.monotonic()
+            results = self._summarize_with_strategy([texts[i] for i in batch], limits, strategy)
+            costs.record(mode, limits[1], len(batch), time.monotonic() - start)
+            for index, summary in zip(batch, results):
+                summaries[index], strategies[index] = summary, strategy
+        return summaries, strategies
+
+    def _summarize_with_strategy(self, texts: List[str], limits: Tuple[int, int], strategy: str) -> List[str]:
+        """Summarize texts with one strategy and length limits; model failures fall back to extracts."""
+        min_length, max_length = limits
+        if strategy == "extractive":
+            return [extractive_summary(text, max_length) for text in texts]
+
+        kind = "chunk" if BUDGET_STRATEGIES[strategy][0] == "sampled" else f"chunk-{strategy}"
+
+        def summarize(batch):
+            results = self._summarize_batch(
+                [texts[i] for i in batch],
+                min_length=min_length,
+                max_length=max_length,
+                **self._strategy_generation_kwargs(strategy),
+            )
+            for i, summary in zip(batch, results):
+                self.cache.put(self._cache_key(kind, texts[i], min_length, max_length), summary)
+            return results
 
-    def _extract_key_points(self, text: str, num_points: int = 5) -> List[str]:
-        """Extract key points from the summary."""
         try:
-            sentences = sent_tokenize(text)
-            if len(sentences) <= num_points:
-                return sentences
+            return get_batch_controller("bart").map_batches(list(range(len(texts))), summarize, limit=len(texts))
+        except Exception as e:
+            logger.error(f"Error summarizing chunk batch with the {strategy} strategy, using extracts: {str(e)}")
+            return [extractive_summary(text, max_length) for text in texts]
+
+    def _summarize_batch(self, texts: List[str], **generate_kwargs) -> List[str]:
+        """Summarize several inputs sharing the same generation settings in one model call."""
+        outputs = self.model(texts, batch_size=len(texts), **generate_kwargs)
+        return [output["summary_text"].strip() for output in outputs]
+
+    def _summarize_chunks_batched(
+        self,
+        chunks: List[Dict[str, str]],
+        batch_size: Optional[int] = None,
+        min_length: Optional[int] = None,
+        max_length: Optional[int] = None,
+    ) -> List[str]:
+        """
+        Summarize chunks (possibly from several documents) in shared batches.
+
+        Cached summaries are reused and only the remaining chunks reach the
+        model. Those are grouped by their length limits, since one model call
+        takes a single min/max length. Batch sizes come from the adaptive
+        "bart" batch controller, capped at batch_size when given. Summaries are
+        returned in the input order.
+        """
+        if self.assistant_model is not None:
+            # Assisted decoding only supports one sequence at a time.
+            batch_size = 1
+
+        summaries: List[Optional[str]] = [None] * len(chunks)
+        keys: List[str] = [""] * len(chunks)
+        groups = defaultdict(list)
+        for index, chunk in enumerate(chunks):
+            full_text = chunk_input_text(chunk)
+            bounds = chunk_length_bounds(full_text, self.max_summary_ratio, min_length, max_length)
+            keys[index] = self._cache_key("chunk", full_text, *bounds)
+            summaries[index] = self.cache.get(keys[index])
+            if summaries[index] is None:
+                groups[bounds].append((index, full_text))
+
+        controller = get_batch_controller("bart")
+        for (group_min, group_max), items in groups.items():
+
+            def summarize(batch):
+                try:
+                    results = self._summarize_batch(
+                        [full_text for _, full_text in batch],
+                        min_length=group_min,
+                        max_length=group_max,
+                        **self._generation_kwargs(repetition_penalty=1.2),
+                    )
+                    for (index, _), summary in zip(batch, results):
+                        self.cache.put(keys[index], summary)
+                    return results
+                except Exception as e:
+                    if is_out_of_memory(e):
+                        # Let the controller split the batch.
+                        raise
+                    logger.error(f"Error summarizing chunk batch, retrying one by one: {str(e)}")
+                    return [self._summarize_chunk(chunks[index], group_min, group_max) for index, _ in batch]
+
+            for (index, _), summary in zip(items, controller.map_batches(items, summarize, limit=batch_size)):
+                summaries[index] = summary
+        return summaries
+
+    def _cached_summaries(self, texts: List[str], kind: str, fallbacks: List[str]) -> List[str]:
+        """Brief-length summaries of texts, reusing cached ones and batching the rest."""
+        keys = [self._cache_key(kind, text, 50, 150) for text in texts]
+        summaries = [self.cache.get(key) for key in keys]
+        missing = [i for i, summary in enumerate(summaries) if summary is None]
+        if missing:
+            computed = self._brief_summaries_batched(
+                [texts[i] for i in missing], [fallbacks[i] for i in missing], cache_keys=[keys[i] for i in missing]
+            )
+            for i, summary in zip(missing, computed):
+                summaries[i] = summary
+        return summaries
+
+    def _reduce_groups(self, chunk_summaries: List[str]) -> List[List[str]]:
+        """
+        Split chunk summaries into groups with content-defined boundaries, so
+        a changed chunk summary only changes the group it belongs to.
+        """
+        groups, current = [], []
+        for summary in chunk_summaries:
+            current.append(summary)
+            if len(current) >= 2 * self.reduce_group_size or (
+                len(current) > 1 and stable_hash(summary) % self.reduce_group_size == 0
+            ):
+                groups.append(current)
+                current = []
+        if current:
+            groups.append(current)
+        return groups
+
+    def _reduce(self, chunk_summaries: List[str]) -> str:
+        """
+        Build the brief summary. Short lectures summarize the detailed summary
+        directly; longer ones first summarize each group of chunk summaries and
+        then summarize those, with every step cached.
+        """
+        groups = self._reduce_groups(chunk_summaries)
+        if len(groups) > 1:
+            group_texts = [" ".join(group) for group in groups]
+            group_summaries = self._cached_summaries(group_texts, "group", group_texts)
+            reduce_input = " ".join(group_summaries)
+        else:
+            reduce_input = " ".join(chunk_summaries)
+        return self._cached_summaries([reduce_input], "brief", [chunk_summaries[0]])[0]
+
+    def _brief_summaries_batched(
+        self,
+        detailed_summaries: List[str],
+        fallbacks: List[str],
+        batch_size: Optional[int] = None,
+        cache_keys: Optional[List[str]] = None,
+    ) -> List[str]:
+        if self.assistant_model is not None:
+            batch_size = 1
+
+        def summarize(batch):
+            try:
+                results = self._summarize_batch(
+                    [detailed_summaries[i] for i in batch], min_length=50, max_length=150, **self._generation_kwargs()
+                )
+                if cache_keys is not None:
+                    for i, summary in zip(batch, results):
+                        self.cache.put(cache_keys[i], summary)
+                return results
+            except Exception as e:
+                if is_out_of_memory(e):
+                    raise
+                logger.error(f"Error creating brief summaries: {str(e)}")
+                return [fallbacks[i] for i in batch]
 
-            indices = np.linspace(0, len(sentences) - 1, num_points, dtype=int)
-            return [sentences[i] for i in indices]
+        indices = list(range(len(detailed_summaries)))
+        return get_batch_controller("bart").map_batches(indices, summarize, limit=batch_size)
+
+    def _process_window(
+        self,
+        window: List[Tuple[str, List[Dict[str, str]]]],
+        batch_size: Optional[int],
+        min_length: Optional[int],
+        max_length: Optional[int],
+    ) -> Iterator[Tuple[str, Dict]]:
+        all_chunks = [chunk for _, chunks in window for chunk in chunks]
+        try:
+            summaries = self._summarize_chunks_batched(all_chunks, batch_size, min_length, max_length)
         except Exception as e:
-            logger.error(f"Error extracting key points: {str(e)}")
-            return []
+            logger.error(f"Error processing document batch: {str(e)}")
+            for doc_id, _ in window:
+                yield doc_id, error_result(f"Processing failed: {str(e)}")
+            return
+
+        per_document = []
+        offset = 0
+        for _, chunks in window:
+            per_document.append(summaries[offset : offset + len(chunks)])
+            offset += len(chunks)
+
+        detailed = [" ".join(chunk_summaries) for chunk_summaries in per_document]
+        briefs = self._brief_summaries_batched(
+            detailed, [chunk_summaries[0] for chunk_summaries in per_document], batch_size
+        )
+        for (doc_id, _), detailed_summary, brief_summary in zip(window, detailed, briefs):
+            yield doc_id, {
+                "error": None,
+                "detailed_summary": detailed_summary,
+                "brief_summary": brief_summary,
+                "key_points": self._extract_key_points(detailed_summary),
+            }
+
+    def process_lectures(
+        self,
+        documents: Iterable[Tuple[str, str]],
+        batch_size: Optional[int] = None,
+        window_chunks: Optional[int] = None,
+        min_length: Optional[int] = None,
+        max_length: Optional[int] = None,
+    ) -> Iterator[Tuple[str, Dict]]:
+        """
+        Summarize many (doc_id, text) documents, packing chunks from different
+        documents into shared model batches.
+
+        batch_size caps the batch size the adaptive controller picks from
+        available memory. Documents are consumed in windows of about
+        `window_chunks` chunks (default 4 batches). Every window is summarized together, then split
+        back per document, and a (doc_id, result) pair is yielded as each
+        document of the window completes, so results stream while later
+        documents are still being read.
+        """
+        window_chunks = window_chunks or (batch_size or get_batch_controller("bart").max_batch) * 4
+        window: List[Tuple[str, List[Dict[str, str]]]] = []
+        pending_chunks = 0
+
+        for doc_id, text in documents:
+            try:
+                clean_text = preprocess_lecture_text(text)
+                if not clean_text:
+                    yield doc_id, error_result("Empty or invalid text after preprocessing")
+                    continue
+                chunks = self._create_chunks(clean_text)
+            except Exception as e:
+                logger.error(f"Error preparing document {doc_id}: {str(e)}")
+                yield doc_id, error_result(f"Processing failed: {str(e)}")
+                continue
+
+            window.append((doc_id, chunks))
+            pending_chunks += len(chunks)
+            if pending_chunks >= window_chunks:
+                yield from self._process_window(window, batch_size, min_length, max_length)
+                window = []
+                pending_chunks = 0
+
+        if window:
+            yield from self._process_window(window, batch_size, min_length, max_length)
+
+    def _extract_key_points(self, text: str, num_points: int = 5) -> List[str]:
+        return extract_key_points(text, num_points)
         
 if __name__ == "__main__":
     summarizer = BertSummarizer()
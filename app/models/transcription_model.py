@@ -1,10 +1,12 @@
 import os
+import time
 import logging
 from typing import Optional
-from models.whisper_pretrained.load_whisper import (
-    load_whisper_model,
-    transcribe_audio_to_text,
-)
+from models.whisper_pretrained.load_whisper import transcribe_audio_to_text
+from app.models.registry import get_whisper_model
+from app.models.whisper_policy import QUALITY_TIERS, WhisperModelPolicy, get_default_policy, models_at_least
+from app.services.fingerprint_index import transcribe_with_fingerprint
+from app.utils.batching import get_batch_controller
 
 logger = logging.getLogger(__name__)
 
@@ -22,32 +24,73 @@ def assert_audio_duration(audio_file_path: str) -> float:
 
 
 class WhisperTranscriber:
-    def __init__(self, model_name: str = "openai/whisper-base"):
-        logger.info(f"Loading Whisper model: {model_name}")
-        self.whisper_model = load_whisper_model(model_name)
-        logger.info("Whisper model loaded successfully")
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        policy: Optional[WhisperModelPolicy] = None,
+    ):
+        """
+        With a model_name every request uses that model. Otherwise the policy
+        picks one per request from audio_info["duration"] and the optional
+        audio_info["quality"] tier ("fast", "balanced" or "accurate").
+
+        Recordings over 30 s, and any recording with
+        audio_info["word_timestamps"] set, go through LongFormTranscriber
+        (see transcribe_audio_to_text). Their word timings are stored in
+        audio_info["words"].
+
+        audio_info either names a "file_path" or carries audio decoded in
+        memory as "array" and "sampling_rate" (see audio_info_from_bytes).
+
+        Recordings matching an earlier one in the fingerprint index reuse its
+        transcript if a Whisper model at least as accurate as the requested
+        one produced it (see transcribe_with_fingerprint).
+        """
+        self.model_name = model_name
+        self.policy = policy or get_default_policy()
 
     def transcribe(self, audio_info: dict):
         if not isinstance(audio_info, dict):
             logger.error("audio_info is not a dictionary")
             raise TypeError("audio_info must be a dictionary")
-        if "file_path" not in audio_info:
-            logger.error("Missing 'file_path' in audio_info")
-            raise ValueError("audio_info must contain 'file_path'")
+        if "array" not in audio_info:
+            if "file_path" not in audio_info:
+                logger.error("Missing 'file_path' in audio_info")
+                raise ValueError("audio_info must contain 'file_path' or 'array'")
+            if not os.path.isfile(audio_info["file_path"]):
+                logger.error(f"File not found: {audio_info['file_path']}")
+                raise FileNotFoundError(f"Audio file '{audio_info['file_path']}' not found")
 
-        audio_file_path = audio_info["file_path"]
+        # Reuse only transcripts of the model this request may get, or a better one.
+        requested = self.model_name or QUALITY_TIERS.get(audio_info.get("quality", "balanced"))
+        models = models_at_least(requested) if requested else []
+        return transcribe_with_fingerprint(audio_info, self._transcribe, "whisper", models)
 
-        if not os.path.isfile(audio_file_path):
-            logger.error(f"File not found: {audio_file_path}")
-            raise FileNotFoundError(f"Audio file '{audio_file_path}' not found")
+    def _transcribe(self, audio_info: dict):
+        if "array" in audio_info:
+            audio_file_path = "in-memory audio"
+            audio_info.setdefault("duration", len(audio_info["array"]) / audio_info["sampling_rate"])
+        else:
+            audio_file_path = audio_info["file_path"]
 
         if "duration" not in audio_info:
             logger.debug("Duration not provided, calculating...")
             audio_info["duration"] = assert_audio_duration(audio_file_path)
 
+        model_name = self.model_name or self.policy.select(
+            audio_info["duration"], audio_info.get("quality", "balanced")
+        )
+        whisper_model = get_whisper_model(model_name)
+        audio_info["model_used"] = model_name
+
         try:
-            logger.info(f"Transcribing audio: {audio_file_path}")
-            transcription = transcribe_audio_to_text(self.whisper_model, audio_info)
+            logger.info(f"Transcribing audio: {audio_file_path} with {model_name}")
+            start = time.perf_counter()
+            # Long-form window batches are sized by the adaptive controller and split on OOM.
+            transcription = transcribe_audio_to_text(
+                whisper_model, audio_info, batch_controller=get_batch_controller("whisper")
+            )
+            self.policy.record(model_name, audio_info["duration"], time.perf_counter() - start)
             logger.debug(f"Transcription result: {transcription}")
             return transcription
         except Exception as e:
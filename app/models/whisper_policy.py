@@ -0,0 +1,133 @@
+import logging
+import os
+import threading
+from collections import Counter
+from typing import Dict, List, Optional
+
+from app.middleware.admission import get_pools
+from app.utils.metrics import register_metrics_source
+
+logger = logging.getLogger(__name__)
+
+# Ordered from fastest to most accurate.
+WHISPER_MODELS = ["openai/whisper-tiny", "openai/whisper-base", "openai/whisper-small"]
+
+QUALITY_TIERS = {
+    "fast": "openai/whisper-tiny",
+    "balanced": "openai/whisper-base",
+    "accurate": "openai/whisper-small",
+}
+
+# Seconds of processing per second of audio on a CPU node. These are only
+# starting points; observed timings replace them as requests complete.
+DEFAULT_REAL_TIME_FACTORS = {
+    "openai/whisper-tiny": 0.05,
+    "openai/whisper-base": 0.1,
+    "openai/whisper-small": 0.35,
+}
+
+
+def models_at_least(model_name: str) -> List[str]:
+    """Whisper models at least as accurate as model_name (just model_name if it is not ranked)."""
+    if model_name not in WHISPER_MODELS:
+        return [model_name]
+    return WHISPER_MODELS[WHISPER_MODELS.index(model_name) :]
+
+
+def allowed_whisper_models() -> List[str]:
+    configured = os.getenv("WHISPER_ALLOWED_MODELS")
+    if not configured:
+        return list(WHISPER_MODELS)
+    allowed = [name.strip() for name in configured.split(",") if name.strip()]
+    return [name for name in WHISPER_MODELS if name in allowed]
+
+
+class WhisperModelPolicy:
+    """
+    Pick the Whisper model for a request from its audio duration, the
+    current ASR queue depth and the requested quality tier.
+
+    The requested tier is an upper bound: the policy steps down to smaller
+    models while the estimated latency, inflated by the number of requests
+    waiting for the ASR pool, would exceed the latency SLO.
+    """
+
+    def __init__(
+        self,
+        latency_slo_s: Optional[float] = None,
+        allowed_models: Optional[List[str]] = None,
+        pool_name: str = "asr",
+    ):
+        self.latency_slo_s = latency_slo_s or float(os.getenv("WHISPER_LATENCY_SLO", "120"))
+        self.allowed_models = allowed_models or allowed_whisper_models()
+        if not self.allowed_models:
+            raise ValueError("At least one Whisper model must be allowed")
+        self.pool_name = pool_name
+        self.real_time_factors = dict(DEFAULT_REAL_TIME_FACTORS)
+        self.selections = Counter()
+        self._lock = threading.Lock()
+
+    def _queue_depth(self) -> int:
+        pool = get_pools().get(self.pool_name)
+        return pool.queued if pool else 0
+
+    def estimate_latency(self, model_name: str, duration: float, queue_depth: int) -> float:
+        rtf = self.real_time_factors.get(model_name, 1.0)
+        return duration * rtf * (1 + queue_depth)
+
+    def select(self, duration: float, quality: str = "balanced", queue_depth: Optional[int] = None) -> str:
+        if quality not in QUALITY_TIERS:
+            raise ValueError(f"Unknown quality tier '{quality}', expected one of {sorted(QUALITY_TIERS)}")
+        if queue_depth is None:
+            queue_depth = self._queue_depth()
+
+        ceiling = WHISPER_MODELS.index(QUALITY_TIERS[quality])
+        candidates = [m for m in self.allowed_models if WHISPER_MODELS.index(m) <= ceiling]
+        if not candidates:
+            candidates = [self.allowed_models[0]]
+
+        # Largest candidate first; fall back to smaller ones under pressure.
+        selected = candidates[0]
+        for model_name in reversed(candidates):
+            if self.estimate_latency(model_name, duration, queue_depth) <= self.latency_slo_s:
+                selected = model_name
+                break
+
+        with self._lock:
+            self.selections[selected] += 1
+        logger.info(
+            f"Selected {selected} for {duration:.1f}s of audio "
+            f"(quality={quality}, queue_depth={queue_depth})"
+        )
+        return selected
+
+    def record(self, model_name: str, duration: float, elapsed: float):
+        """Update the model's real-time factor from an observed transcription."""
+        if duration <= 0:
+            return
+        observed = elapsed / duration
+        with self._lock:
+            previous = self.real_time_factors.get(model_name, observed)
+            self.real_time_factors[model_name] = 0.8 * previous + 0.2 * observed
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "latency_slo_s": self.latency_slo_s,
+                "allowed_models": list(self.allowed_models),
+                "real_time_factors": dict(self.real_time_factors),
+                "selections": dict(self.selections),
+            }
+
+
+_default_policy: Optional[WhisperModelPolicy] = None
+_default_policy_lock = threading.Lock()
+
+
+def get_default_policy() -> WhisperModelPolicy:
+    global _default_policy
+    with _default_policy_lock:
+        if _default_policy is None:
+            _default_policy = WhisperModelPolicy()
+            register_metrics_source("whisper_policy", _default_policy.snapshot)
+        return _default_policy
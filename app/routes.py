@@ -1,8 +1,13 @@
 from fastapi import FastAPI
-from app.controllers import summarization, transcription, translation, process_audio
+from app.controllers import summarization, transcription, translation, process_audio, metrics, search, debug
+from app.utils.profiling import profiling_enabled
 
 def register_routes(app: FastAPI):
     app.include_router(transcription.router, prefix="/transcribe")
     app.include_router(summarization.router, prefix="/summarize")
     app.include_router(translation.router, prefix="/translate")
-    app.include_router(process_audio.router, prefix="/process")
\ No newline at end of file
+    app.include_router(process_audio.router, prefix="/process")
+    app.include_router(metrics.router, prefix="/metrics")
+    app.include_router(search.router, prefix="/search")
+    if profiling_enabled():
+        app.include_router(debug.router, prefix="/debug")
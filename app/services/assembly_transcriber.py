@@ -1,6 +1,7 @@
 import os
 import logging
 import assemblyai as aai
+from app.services.fingerprint_index import transcribe_with_fingerprint
 
 logger = logging.getLogger(__name__)
 
@@ -13,6 +14,11 @@ class AssemblyTranscriber:
         
         # logging.info(api_key)
         aai.settings.api_key = api_key
+        # Points the SDK at another server, e.g. the local stub of scripts/stub_services.py.
+        if os.getenv("ASSEMBLYAI_BASE_URL"):
+            aai.settings.base_url = os.getenv("ASSEMBLYAI_BASE_URL")
+        if os.getenv("ASSEMBLYAI_POLLING_INTERVAL"):
+            aai.settings.polling_interval = float(os.getenv("ASSEMBLYAI_POLLING_INTERVAL"))
         self.transcriber = aai.Transcriber(config=aai.TranscriptionConfig(
             speech_model=aai.SpeechModel.best
         ))
@@ -30,12 +36,28 @@ class AssemblyTranscriber:
         if not os.path.isfile(audio_file_path):
             raise FileNotFoundError(f"Audio file not found: {audio_file_path}")
 
+        # Re-encoded or trimmed copies of an earlier recording reuse its transcript.
+        return transcribe_with_fingerprint(audio_info, self._transcribe, "assemblyai", ["assemblyai"])
+
+    def _transcribe(self, audio_info: dict):
+        audio_file_path = audio_info["file_path"]
         try:
             logger.info(f"Transcribing local file via AssemblyAI: {audio_file_path}")
             transcript = self.transcriber.transcribe(audio_file_path)
             logger.debug(f"Transcription result: {transcript}")
             if transcript.status == "error":
                 raise RuntimeError(f"Transcription failed: {transcript.error}")
+            audio_info["model_used"] = "assemblyai"
+            if audio_info.get("word_timestamps"):
+                audio_info["words"] = [
+                    {
+                        "word": word.text,
+                        "start": word.start / 1000,
+                        "end": word.end / 1000,
+                        "confidence": word.confidence,
+                    }
+                    for word in transcript.words or []
+                ]
             return transcript.text
             # return "This is a test transcription from AssemblyAI."
         except Exception as e:
@@ -0,0 +1,528 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.utils.cache import result_stores_disabled
+from app.utils.metrics import register_metrics_source
+from models.whisper_pretrained.audio import WHISPER_SAMPLING_RATE, load_audio, resample
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FINGERPRINT_INDEX_PATH = "data/audio_fingerprints.sqlite3"
+
+# Spectrogram: 64 ms frames every 16 ms, 512 bins up to 8 kHz.
+N_FFT = 1024
+HOP = 256
+FREQ_BINS = 512
+FRAME_SECONDS = HOP / WHISPER_SAMPLING_RATE
+
+# A peak is the maximum of its (time x frequency) neighbourhood and at
+# least PEAK_MIN_DB above the median of its block of frames.
+PEAK_NEIGHBOURHOOD = (31, 31)
+PEAK_MIN_DB = 10.0
+PEAK_FLOOR_DB = -60.0
+BLOCK_FRAMES = 4096
+
+# Each peak is paired with the strongest FAN_OUT of the next ZONE_PEAKS
+# peaks that are at most MAX_DT frames later and MAX_DF bins away.
+# hash = f1 (9 bits) | f2 (9 bits) | dt (7 bits)
+FAN_OUT = 5
+ZONE_PEAKS = 16
+MAX_DT = 127
+MAX_DF = 96
+
+# A query considers up to QUERY_CANDIDATES * max_query_hashes of its hashes
+# and keeps the rarest max_query_hashes among those present in the index.
+QUERY_CANDIDATES = 4
+
+# Frame offsets are packed with the recording id as id * OFFSET_SPAN + offset.
+OFFSET_SPAN = 1 << 24
+
+# A match must hold along the whole query, not just in one stretch such as
+# a shared intro: the query is cut into COVERAGE_SEGMENT_S segments and a
+# segment counts as covered when at least MIN_SEGMENT_MATCHES of its hashes
+# re-appear in the stored recording at the matched offset. Segments with
+# fewer than MIN_SEGMENT_HASHES hashes (silence) are not counted. A
+# re-encoded copy keeps about a quarter of its hashes, some 25-45 per
+# segment of speech; unrelated audio matches none.
+COVERAGE_SEGMENT_S = 20.0
+MIN_SEGMENT_HASHES = 10
+MIN_SEGMENT_MATCHES = 3
+
+# SQLite's default limit on bound parameters is 999 in older builds.
+MAX_QUERY_PARAMS = 900
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS recordings (
+    id INTEGER PRIMARY KEY,
+    duration REAL NOT NULL,
+    n_hashes INTEGER NOT NULL,
+    transcript TEXT NOT NULL,
+    words TEXT,
+    transcriber TEXT,
+    model_used TEXT,
+    quality TEXT,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS hashes (
+    hash INTEGER NOT NULL,
+    recording_id INTEGER NOT NULL,
+    frame INTEGER NOT NULL,
+    PRIMARY KEY (hash, recording_id, frame)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS hash_counts (
+    hash INTEGER PRIMARY KEY,
+    postings INTEGER NOT NULL
+);
+"""
+
+
+class Fingerprint:
+    """Landmark hashes of a recording and the frame of each hash's anchor peak."""
+
+    def __init__(self, hashes: np.ndarray, frames: np.ndarray, duration: float):
+        self.hashes = hashes
+        self.frames = frames
+        self.duration = duration
+
+    def __len__(self) -> int:
+        return len(self.hashes)
+
+
+def _sliding_max(x: np.ndarray, width: int, axis: int) -> np.ndarray:
+    pad = [(0, 0)] * x.ndim
+    pad[axis] = (width // 2, width // 2)
+    padded = np.pad(x, pad, mode="constant", constant_values=-np.inf)
+    return np.lib.stride_tricks.sliding_window_view(padded, width, axis=axis).max(axis=-1)
+
+
+def spectral_peaks(audio: np.ndarray):
+    """
+    Spectral peaks of 16 kHz mono audio as ((frame, bin) pairs sorted by
+    frame, their level in dB). The spectrogram is processed in blocks, so
+    memory stays bounded for hour-long recordings.
+    """
+    if len(audio) < N_FFT:
+        return np.empty((0, 2), dtype=np.int64), np.empty(0, dtype=np.float32)
+    frames = np.lib.stride_tricks.sliding_window_view(audio.astype(np.float32, copy=False), N_FFT)[::HOP]
+    window = np.hanning(N_FFT).astype(np.float32)
+    time_width, freq_width = PEAK_NEIGHBOURHOOD
+    margin = time_width // 2
+
+    peaks, levels = [], []
+    for start in range(0, len(frames), BLOCK_FRAMES):
+        lo, hi = max(0, start - margin), min(len(frames), start + BLOCK_FRAMES + margin)
+        spectrum = np.abs(np.fft.rfft(frames[lo:hi] * window, axis=1))[:, :FREQ_BINS]
+        db = 20 * np.log10(spectrum + 1e-10)
+        # Separable maximum filter: exact for a rectangular neighbourhood.
+        local_max = _sliding_max(_sliding_max(db, time_width, axis=0), freq_width, axis=1)
+        threshold = max(float(np.median(db)) + PEAK_MIN_DB, PEAK_FLOOR_DB)
+        is_peak = (db == local_max) & (db > threshold)
+        is_peak[: start - lo] = False
+        is_peak[start - lo + BLOCK_FRAMES :] = False
+        t, f = np.nonzero(is_peak)
+        peaks.append(np.stack([t + lo, f], axis=1))
+        levels.append(db[t, f])
+    return np.concatenate(peaks), np.concatenate(levels)
+
+
+def hash_sample_mask(hashes: np.ndarray, sample_bits: int) -> np.ndarray:
+    """
+    Deterministic 1 / 2**sample_bits subsample by hash value. Query and index
+    keep the same hashes, so matches survive while the index shrinks.
+    """
+    if sample_bits == 0:
+        return np.ones(len(hashes), dtype=bool)
+    mixed = (hashes.astype(np.uint64) * np.uint64(0x9E3779B1)) & np.uint64(0xFFFFFFFF)
+    return (mixed >> np.uint64(32 - sample_bits)) == 0
+
+
+def fingerprint_audio(audio: np.ndarray, sample_bits: int = 3) -> Fingerprint:
+    """
+    Landmark hashes of 16 kHz mono audio. Each anchor peak is paired with
+    the FAN_OUT strongest peaks of its target zone (up to MAX_DT frames
+    later, within MAX_DF bins), so weak peaks added by noise or a lossy
+    codec rarely displace the pairs of the original.
+    """
+    peaks, levels = spectral_peaks(audio)
+    n = len(peaks)
+    # Candidate targets of anchor i are peaks i+1 .. i+ZONE_PEAKS (peaks are sorted by frame).
+    candidates = np.arange(n)[:, None] + np.arange(1, ZONE_PEAKS + 1)[None, :]
+    in_range = candidates < n
+    candidates = np.minimum(candidates, max(n - 1, 0))
+    dt = peaks[candidates, 0] - peaks[:, None, 0]
+    df = peaks[candidates, 1] - peaks[:, None, 1]
+    valid = in_range & (dt > 0) & (dt <= MAX_DT) & (np.abs(df) <= MAX_DF)
+    strength = np.where(valid, levels[candidates], -np.inf)
+
+    fan_out = min(FAN_OUT, ZONE_PEAKS)
+    strongest = np.argpartition(-strength, fan_out - 1, axis=1)[:, :fan_out] if n else np.empty((0, fan_out), dtype=np.int64)
+    rows = np.repeat(np.arange(n), fan_out)
+    chosen = strongest.ravel()
+    keep_pair = valid[rows, chosen]
+    rows, targets = rows[keep_pair], candidates[rows, chosen][keep_pair]
+
+    hashes = (peaks[rows, 1] << 16) | (peaks[targets, 1] << 7) | (peaks[targets, 0] - peaks[rows, 0])
+    anchors = peaks[rows, 0]
+    keep = hash_sample_mask(hashes, sample_bits)
+    hashes, anchors = hashes[keep], anchors[keep]
+    # Duplicate (hash, frame) pairs would collide on the primary key.
+    unique = np.unique(np.stack([hashes, anchors], axis=1), axis=0)
+    return Fingerprint(unique[:, 0], unique[:, 1], len(audio) / WHISPER_SAMPLING_RATE)
+
+
+class FingerprintIndex:
+    """
+    On-disk inverted index from landmark hashes to (recording, frame).
+
+    A query looks up the posting counts of (a sample of) its hashes, keeps
+    the max_query_hashes rarest ones present in the index, fetches their
+    postings and votes per (recording, frame offset). Rare hashes are the
+    most discriminative and have the shortest posting lists. A copy of an
+    indexed recording, re-encoded or trimmed, piles its votes on one offset,
+    which also tells where the query starts inside the stored recording.
+
+    The best (recording, offset) is then verified against all of the query's
+    hashes: at least min_coverage of the query's segments must match there
+    (see COVERAGE_SEGMENT_S), so recordings that only share a stretch of
+    audio are not taken for copies.
+
+    Each recording stores the transcriber, model and quality tier that
+    produced its transcript. Lookups can be restricted to recordings of one
+    transcriber and a set of models, so a transcript is never reused for a
+    request that asked for a better model.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_FINGERPRINT_INDEX_PATH,
+        sample_bits: int = 3,
+        max_query_hashes: int = 200,
+        min_matches: int = 12,
+        min_match_fraction: float = 0.1,
+        min_coverage: float = 0.8,
+        align_tolerance_s: float = 1.0,
+    ):
+        self.path = path
+        self.sample_bits = sample_bits
+        self.max_query_hashes = max_query_hashes
+        self.min_matches = min_matches
+        self.min_match_fraction = min_match_fraction
+        self.min_coverage = min_coverage
+        self.align_tolerance_s = align_tolerance_s
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        # Indexes created before transcripts recorded their transcriber and
+        # quality; their rows have neither and are never reused.
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(recordings)")}
+        for column in ("transcriber", "quality"):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE recordings ADD COLUMN {column} TEXT")
+        self.stats = Counter()
+        self._lookup_seconds = 0.0
+
+    def fingerprint(self, audio: np.ndarray) -> Fingerprint:
+        return fingerprint_audio(audio, self.sample_bits)
+
+    def add(
+        self,
+        fingerprint: Fingerprint,
+        transcript: str,
+        words: Optional[List[Dict]] = None,
+        model_used: Optional[str] = None,
+        transcriber: Optional[str] = None,
+        quality: Optional[str] = None,
+    ) -> int:
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO recordings (duration, n_hashes, transcript, words, transcriber, model_used, quality, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    fingerprint.duration,
+                    len(fingerprint),
+                    transcript,
+                    json.dumps(words) if words else None,
+                    transcriber,
+                    model_used,
+                    quality,
+                    time.time(),
+                ),
+            )
+            recording_id = cursor.lastrowid
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO hashes (hash, recording_id, frame) VALUES (?, ?, ?)",
+                ((int(h), recording_id, int(f)) for h, f in zip(fingerprint.hashes, fingerprint.frames)),
+            )
+            hashes, counts = np.unique(fingerprint.hashes, return_counts=True)
+            self._conn.executemany(
+                "INSERT INTO hash_counts (hash, postings) VALUES (?, ?) "
+                "ON CONFLICT (hash) DO UPDATE SET postings = postings + excluded.postings",
+                zip(hashes.tolist(), counts.tolist()),
+            )
+            self._conn.commit()
+        return recording_id
+
+    def lookup(
+        self, fingerprint: Fingerprint, transcriber: Optional[str] = None, models: Optional[Sequence[str]] = None
+    ) -> Optional[Dict]:
+        """
+        Best matching recording as {"recording_id", "offset_s", "matches",
+        "score", "coverage"}, or None. offset_s is where the query starts
+        inside the stored recording (negative when the query has extra audio
+        in front); coverage is the share of the query's segments that match.
+        With transcriber (and models), only recordings transcribed by it
+        (with one of those models) are considered.
+        """
+        start = time.perf_counter()
+        # One frame per distinct hash, then an even subsample; hash values are
+        # unrelated to time, so the subsample still spans the whole query.
+        hashes, first = np.unique(fingerprint.hashes, return_index=True)
+        frames = fingerprint.frames[first]
+        if len(hashes) > QUERY_CANDIDATES * self.max_query_hashes:
+            picked = np.linspace(0, len(hashes) - 1, QUERY_CANDIDATES * self.max_query_hashes).astype(np.int64)
+            hashes, frames = hashes[picked], frames[picked]
+        expected = min(len(hashes), self.max_query_hashes)
+
+        with self._lock:
+            postings = dict(self._select_in("SELECT hash, postings FROM hash_counts WHERE hash IN ({})", hashes.tolist()))
+            present = sorted(postings, key=postings.get)[: self.max_query_hashes]
+            if transcriber is None:
+                rows = self._select_in("SELECT hash, recording_id, frame FROM hashes WHERE hash IN ({})", present)
+            elif models is None:
+                rows = self._select_in(
+                    "SELECT h.hash, h.recording_id, h.frame FROM hashes h JOIN recordings r ON r.id = h.recording_id "
+                    "WHERE r.transcriber = ? AND h.hash IN ({})",
+                    present,
+                    (transcriber,),
+                )
+            elif models:
+                rows = self._select_in(
+                    "SELECT h.hash, h.recording_id, h.frame FROM hashes h JOIN recordings r ON r.id = h.recording_id "
+                    f"WHERE r.transcriber = ? AND r.model_used IN ({','.join('?' * len(models))}) AND h.hash IN ({{}})",
+                    present,
+                    (transcriber, *models),
+                )
+            else:
+                rows = []
+
+        best = None
+        if rows:
+            rows = np.array(rows, dtype=np.int64)
+            offsets = rows[:, 2] - frames[np.searchsorted(hashes, rows[:, 0])]
+            # One vote per (recording, offset), packed into a single int64 key.
+            votes, counts = np.unique(rows[:, 1] * OFFSET_SPAN + offsets + OFFSET_SPAN // 2, return_counts=True)
+            # Peaks jitter by a frame between encodings; count neighbours too.
+            scores = counts.copy()
+            for shift in (-1, 1):
+                neighbour = np.searchsorted(votes, votes + shift).clip(max=len(votes) - 1)
+                scores += np.where(votes[neighbour] == votes + shift, counts[neighbour], 0)
+            i = int(np.argmax(scores))
+            best = (int(votes[i] // OFFSET_SPAN), int(votes[i] % OFFSET_SPAN - OFFSET_SPAN // 2), int(scores[i]))
+
+        coverage = 0.0
+        if best is not None and best[2] >= max(self.min_matches, self.min_match_fraction * expected):
+            coverage = self._coverage(fingerprint, best[0], best[1])
+
+        with self._lock:
+            self.stats["lookups"] += 1
+            self._lookup_seconds += time.perf_counter() - start
+            if best is None or coverage < self.min_coverage:
+                self.stats["misses"] += 1
+                if coverage > 0:
+                    self.stats["partial_matches"] += 1
+                return None
+            self.stats["matches"] += 1
+        return {
+            "recording_id": best[0],
+            "offset_s": round(best[1] * FRAME_SECONDS, 3),
+            "matches": best[2],
+            "score": round(best[2] / expected, 3),
+            "coverage": round(coverage, 3),
+        }
+
+    def _coverage(self, fingerprint: Fingerprint, recording_id: int, offset: int) -> float:
+        """Share of the query's segments whose hashes re-appear in the recording at offset frames."""
+        with self._lock:
+            rows = self._select_in(
+                "SELECT hash, frame FROM hashes WHERE recording_id = ? AND hash IN ({})",
+                np.unique(fingerprint.hashes).tolist(),
+                (recording_id,),
+            )
+        stored = np.array(rows, dtype=np.int64).reshape(-1, 2)
+        # (hash, frame) packed into one int64; frames stay below OFFSET_SPAN.
+        stored_keys = (stored[:, 0] << 24) | stored[:, 1]
+        matched = np.zeros(len(fingerprint), dtype=bool)
+        for shift in (-1, 0, 1):
+            frames = fingerprint.frames + offset + shift
+            keys = np.where(frames >= 0, (fingerprint.hashes << 24) | frames.clip(min=0), -1)
+            matched |= np.isin(keys, stored_keys)
+
+        segments = (fingerprint.frames * FRAME_SECONDS // COVERAGE_SEGMENT_S).astype(np.int64)
+        hashes_per_segment = np.bincount(segments)
+        matches_per_segment = np.bincount(segments, weights=matched, minlength=len(hashes_per_segment))
+        checked = hashes_per_segment >= MIN_SEGMENT_HASHES
+        if not checked.any():
+            return 0.0
+        return float(np.mean(matches_per_segment[checked] >= MIN_SEGMENT_MATCHES))
+
+    def _select_in(self, query: str, keys: List[int], params: tuple = ()) -> List[tuple]:
+        rows = []
+        for i in range(0, len(keys), MAX_QUERY_PARAMS):
+            batch = keys[i : i + MAX_QUERY_PARAMS]
+            rows.extend(self._conn.execute(query.format(",".join("?" * len(batch))), (*params, *batch)).fetchall())
+        return rows
+
+    def find_transcript(
+        self,
+        fingerprint: Fingerprint,
+        need_words: bool = False,
+        transcriber: Optional[str] = None,
+        models: Optional[Sequence[str]] = None,
+    ) -> Optional[Dict]:
+        """
+        Transcript of a matching recording aligned to the query, or None.
+        transcriber and models restrict the candidates as in lookup.
+
+        The query must lie within the stored recording. A copy of the whole
+        recording reuses its transcript as is; a trimmed copy needs stored
+        word timings, from which the words inside the query's span are cut
+        out and shifted to the query's time base.
+        """
+        match = self.lookup(fingerprint, transcriber, models)
+        if match is None:
+            return None
+        with self._lock:
+            duration, transcript, words, model_used = self._conn.execute(
+                "SELECT duration, transcript, words, model_used FROM recordings WHERE id = ?", (match["recording_id"],)
+            ).fetchone()
+        words = json.loads(words) if words else None
+
+        offset, tolerance = match["offset_s"], self.align_tolerance_s
+        if offset < -tolerance or offset + fingerprint.duration > duration + tolerance:
+            return None
+        whole = abs(offset) <= tolerance and abs(duration - fingerprint.duration) <= tolerance
+        if words is None:
+            if need_words or not whole:
+                return None
+        else:
+            end = offset + fingerprint.duration
+            words = [
+                {**word, "start": round(max(0.0, word["start"] - offset), 3), "end": round(word["end"] - offset, 3)}
+                for word in words
+                if offset <= (word["start"] + word["end"]) / 2 <= end
+            ]
+            if not whole:
+                transcript = " ".join(word["word"].strip() for word in words)
+
+        with self._lock:
+            self.stats["reused"] += 1
+        return {"transcription": transcript, "words": words, "model_used": model_used, "match": match}
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            recordings = self._conn.execute("SELECT COUNT(*) FROM recordings").fetchone()[0]
+            stats = dict(self.stats)
+            lookup_seconds = self._lookup_seconds
+        lookups = stats.get("lookups", 0)
+        return {
+            "recordings": recordings,
+            **stats,
+            "mean_lookup_ms": 1000 * lookup_seconds / lookups if lookups else 0.0,
+        }
+
+
+_index: Optional[FingerprintIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_fingerprint_index() -> Optional[FingerprintIndex]:
+    """
+    The shared index, or None when AUDIO_FINGERPRINT_INDEX_PATH is set to an
+    empty string or result stores are disabled.
+    """
+    global _index
+    path = os.getenv("AUDIO_FINGERPRINT_INDEX_PATH", DEFAULT_FINGERPRINT_INDEX_PATH)
+    if not path or result_stores_disabled():
+        return None
+    with _index_lock:
+        if _index is None:
+            _index = FingerprintIndex(path)
+            register_metrics_source("fingerprint_index", _index.snapshot)
+        return _index
+
+
+def transcribe_with_fingerprint(
+    audio_info: Dict, transcribe: Callable[[Dict], str], transcriber: str, models: Sequence[str]
+) -> str:
+    """
+    Reuse the transcript of an acoustically identical (or trimmed) earlier
+    recording, else run transcribe(audio_info) and index the result.
+
+    Only transcripts made by transcriber with one of models (the requested
+    model or a more accurate one) are reused. The transcript stored for a
+    new recording records transcriber, audio_info["model_used"] and
+    audio_info["quality"].
+
+    Audio given as a file is decoded once here and attached to audio_info as
+    "array", so an in-process transcriber does not decode it again.
+    """
+    index = get_fingerprint_index()
+    if index is None:
+        return transcribe(audio_info)
+
+    try:
+        if "array" in audio_info:
+            audio = resample(audio_info["array"], audio_info["sampling_rate"])
+        else:
+            audio = load_audio(audio_info["file_path"])
+            audio_info.update(array=audio, sampling_rate=WHISPER_SAMPLING_RATE)
+    except Exception as e:
+        # A remote transcriber may accept audio we cannot decode here
+        # (e.g. no ffmpeg installed); transcribe it without a fingerprint.
+        logger.warning(f"Could not decode audio for fingerprinting, skipping the index: {e}")
+        return transcribe(audio_info)
+    audio_info.setdefault("duration", len(audio) / WHISPER_SAMPLING_RATE)
+
+    try:
+        fingerprint = index.fingerprint(audio)
+        reused = index.find_transcript(
+            fingerprint, need_words=bool(audio_info.get("word_timestamps")), transcriber=transcriber, models=models
+        )
+    except Exception:
+        # The index is an optimization; a failing lookup must not fail the request.
+        logger.exception("Fingerprint lookup failed, transcribing without the index")
+        return transcribe(audio_info)
+    if reused is not None:
+        logger.info(f"Reusing transcript of fingerprint match {reused['match']}")
+        audio_info.update(model_used=reused["model_used"], fingerprint_match=reused["match"])
+        if reused["words"] is not None:
+            audio_info["words"] = reused["words"]
+        return reused["transcription"]
+
+    transcription = transcribe(audio_info)
+    try:
+        index.add(
+            fingerprint,
+            transcription,
+            audio_info.get("words"),
+            audio_info.get("model_used"),
+            transcriber=transcriber,
+            quality=audio_info.get("quality"),
+        )
+    except Exception:
+        logger.exception("Failed to add the transcript to the fingerprint index")
+    return transcription
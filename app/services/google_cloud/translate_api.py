@@ -1,7 +1,8 @@
+from google.auth.credentials import AnonymousCredentials
 from google.cloud import translate_v2 as translate
 import os
 import logging
-from typing import Optional
+from typing import List, Optional
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -14,10 +15,18 @@ class GoogleTranslateAPI:
         """
         Initialize the Google Translate API client.
         If no API key is provided, it will use the default credentials.
+        GOOGLE_TRANSLATE_ENDPOINT points the client at another server (e.g.
+        the local stub of scripts/stub_services.py), without credentials.
         """
         if api_key:
             os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = api_key
-        self.client = translate.Client()
+        endpoint = os.getenv("GOOGLE_TRANSLATE_ENDPOINT")
+        if endpoint:
+            self.client = translate.Client(
+                credentials=AnonymousCredentials(), client_options={"api_endpoint": endpoint}
+            )
+        else:
+            self.client = translate.Client()
 
     def translate_text(self, text: str, target_language: str = "en") -> str:
         """
@@ -28,4 +37,18 @@ class GoogleTranslateAPI:
             return result['translatedText']
         except Exception as e:
             logger.error(f"Error translating text: {e}")
-            raise
\ No newline at end of file
+            raise
+
+    def translate_batch(self, texts: List[str], target_language: str = "en", batch_size: int = 100) -> List[str]:
+        """
+        Translate several texts, sending up to batch_size of them per request.
+        """
+        try:
+            translations = []
+            for start in range(0, len(texts), batch_size):
+                results = self.client.translate(texts[start : start + batch_size], target_language=target_language)
+                translations.extend(result["translatedText"] for result in results)
+            return translations
+        except Exception as e:
+            logger.error(f"Error translating batch: {e}")
+            raise
@@ -0,0 +1,282 @@
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from nltk.tokenize import sent_tokenize
+
+from app.utils.metrics import register_metrics_source
+from models.bert.preprocess_text import setup_nltk
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SEARCH_INDEX_PATH = "data/search_index.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS lectures (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    title TEXT,
+    model_used TEXT,
+    transcript TEXT,
+    summary TEXT,
+    translations TEXT NOT NULL DEFAULT '{}',
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS spans (
+    id INTEGER PRIMARY KEY,
+    lecture_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    language TEXT,
+    position INTEGER NOT NULL,
+    start REAL,
+    end REAL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS spans_lecture ON spans (lecture_id, kind, language);
+CREATE VIRTUAL TABLE IF NOT EXISTS spans_fts USING fts5(
+    text, content='spans', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS spans_insert AFTER INSERT ON spans BEGIN
+    INSERT INTO spans_fts (rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS spans_delete AFTER DELETE ON spans BEGIN
+    INSERT INTO spans_fts (spans_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+"""
+
+_SEARCH = """
+SELECT s.lecture_id, l.key, l.title, s.kind, s.language, s.position, s.start, s.end,
+       snippet(spans_fts, 0, '[', ']', '…', {tokens}) AS snippet, bm25(spans_fts) AS score
+FROM spans_fts
+JOIN spans s ON s.id = spans_fts.rowid
+JOIN lectures l ON l.id = s.lecture_id
+WHERE spans_fts MATCH ? {kind_filter}
+ORDER BY score
+LIMIT ?
+"""
+
+
+def match_expression(query: str, any_term: bool = False) -> Optional[str]:
+    """
+    FTS5 expression for a free-text query. Every term is quoted, so user
+    punctuation never reaches the FTS5 query syntax.
+    """
+    terms = re.findall(r"\w+", query.lower())
+    if not terms:
+        return None
+    return (" OR " if any_term else " ").join(f'"{term}"' for term in dict.fromkeys(terms))
+
+
+def sentence_spans(text: str, words: Optional[Sequence[Dict]] = None) -> List[Tuple[str, Optional[float], Optional[float]]]:
+    """
+    Split text into sentences as (sentence, start, end). With word timings
+    (as produced for word_timestamps), sentences are aligned to the words by
+    whitespace-token count, so each sentence gets the start of its first
+    word and the end of its last.
+    """
+    sentences = [sentence for sentence in sent_tokenize(text) if sentence.strip()]
+    if not words:
+        return [(sentence, None, None) for sentence in sentences]
+
+    spans, position = [], 0
+    for sentence in sentences:
+        count = max(1, len(sentence.split()))
+        first = min(position, len(words) - 1)
+        last = min(position + count - 1, len(words) - 1)
+        spans.append((sentence, words[first]["start"], words[last]["end"]))
+        position += count
+    return spans
+
+
+class SearchIndex:
+    """
+    Persistent store of lecture transcripts, summaries and translations
+    with a BM25-ranked full-text index over their sentences.
+
+    Lectures are keyed by the caller (e.g. the sha256 of the upload), so
+    processing the same recording again replaces its spans instead of
+    duplicating them. Each kind of text (transcript, summary, translation
+    per language) is replaced independently, so results can be indexed as
+    they arrive.
+    """
+
+    def __init__(self, path: str = DEFAULT_SEARCH_INDEX_PATH, snippet_tokens: int = 16):
+        setup_nltk()
+        self.path = path
+        self.snippet_tokens = snippet_tokens
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self.stats = Counter()
+        self._search_seconds = 0.0
+
+    def add_lecture(
+        self,
+        key: str,
+        transcript: Optional[str] = None,
+        summary: Optional[str] = None,
+        words: Optional[Sequence[Dict]] = None,
+        title: Optional[str] = None,
+        model_used: Optional[str] = None,
+    ) -> int:
+        """Insert or update a lecture; only the texts passed are replaced."""
+        transcript_spans = sentence_spans(transcript, words) if transcript else None
+        summary_spans = sentence_spans(summary) if summary else None
+        now = time.time()
+        with self._lock:
+            lecture_id = self._upsert_lecture(key, title, model_used, now)
+            if transcript is not None:
+                self._conn.execute("UPDATE lectures SET transcript = ? WHERE id = ?", (transcript, lecture_id))
+                self._replace_spans(lecture_id, "transcript", None, transcript_spans or [])
+            if summary is not None:
+                self._conn.execute("UPDATE lectures SET summary = ? WHERE id = ?", (summary, lecture_id))
+                self._replace_spans(lecture_id, "summary", None, summary_spans or [])
+            self._conn.commit()
+            self.stats["lectures_indexed"] += 1
+        return lecture_id
+
+    def add_translation(self, key: str, language: str, text: str) -> int:
+        spans = sentence_spans(text)
+        with self._lock:
+            lecture_id = self._upsert_lecture(key, None, None, time.time())
+            translations = json.loads(
+                self._conn.execute("SELECT translations FROM lectures WHERE id = ?", (lecture_id,)).fetchone()[0]
+            )
+            translations[language] = text
+            self._conn.execute(
+                "UPDATE lectures SET translations = ? WHERE id = ?", (json.dumps(translations, ensure_ascii=False), lecture_id)
+            )
+            self._replace_spans(lecture_id, "translation", language, spans)
+            self._conn.commit()
+            self.stats["translations_indexed"] += 1
+        return lecture_id
+
+    def _upsert_lecture(self, key: str, title: Optional[str], model_used: Optional[str], now: float) -> int:
+        self._conn.execute(
+            """
+            INSERT INTO lectures (key, title, model_used, created_at, updated_at) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (key) DO UPDATE SET
+                title = COALESCE(excluded.title, title),
+                model_used = COALESCE(excluded.model_used, model_used),
+                updated_at = excluded.updated_at
+            """,
+            (key, title, model_used, now, now),
+        )
+        return self._conn.execute("SELECT id FROM lectures WHERE key = ?", (key,)).fetchone()[0]
+
+    def _replace_spans(self, lecture_id: int, kind: str, language: Optional[str], spans):
+        self._conn.execute(
+            "DELETE FROM spans WHERE lecture_id = ? AND kind = ? AND language IS ?", (lecture_id, kind, language)
+        )
+        self._conn.executemany(
+            "INSERT INTO spans (lecture_id, kind, language, position, start, end, text) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(lecture_id, kind, language, i, start, end, text) for i, (text, start, end) in enumerate(spans)],
+        )
+
+    def search(self, query: str, limit: int = 10, kind: Optional[str] = None) -> List[Dict]:
+        """
+        Best matching sentences, ranked by BM25. All terms must match; when
+        nothing does, any term may match.
+        """
+        start = time.perf_counter()
+        results = []
+        for any_term in (False, True):
+            expression = match_expression(query, any_term)
+            if expression is None:
+                break
+            sql = _SEARCH.format(tokens=self.snippet_tokens, kind_filter="AND s.kind = ?" if kind else "")
+            params = (expression, kind, limit) if kind else (expression, limit)
+            with self._lock:
+                rows = self._conn.execute(sql, params).fetchall()
+            results = [
+                {
+                    "lecture_id": lecture_id,
+                    "key": key,
+                    "title": title,
+                    "kind": span_kind,
+                    "language": language,
+                    "position": position,
+                    "start": start_s,
+                    "end": end_s,
+                    "snippet": snippet,
+                    # bm25() is lower for better matches; report it as a positive score.
+                    "score": round(-score, 4),
+                }
+                for lecture_id, key, title, span_kind, language, position, start_s, end_s, snippet, score in rows
+            ]
+            if results or len(re.findall(r"\w+", query)) < 2:
+                break
+
+        with self._lock:
+            self.stats["searches"] += 1
+            self._search_seconds += time.perf_counter() - start
+        return results
+
+    def lecture(self, lecture_id: int) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, key, title, model_used, transcript, summary, translations, created_at, updated_at "
+                "FROM lectures WHERE id = ?",
+                (lecture_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        columns = ("id", "key", "title", "model_used", "transcript", "summary", "translations", "created_at", "updated_at")
+        lecture = dict(zip(columns, row))
+        lecture["translations"] = json.loads(lecture["translations"])
+        return lecture
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            lectures = self._conn.execute("SELECT COUNT(*) FROM lectures").fetchone()[0]
+            spans = self._conn.execute("SELECT COUNT(*) FROM spans").fetchone()[0]
+            stats = dict(self.stats)
+            search_seconds = self._search_seconds
+        searches = stats.get("searches", 0)
+        return {
+            "lectures": lectures,
+            "spans": spans,
+            **stats,
+            "mean_search_ms": 1000 * search_seconds / searches if searches else 0.0,
+        }
+
+
+_index: Optional[SearchIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_search_index() -> SearchIndex:
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = SearchIndex(os.getenv("SEARCH_INDEX_PATH", DEFAULT_SEARCH_INDEX_PATH))
+            register_metrics_source("search_index", _index.snapshot)
+        return _index
+
+
+def index_lecture(key: str, **fields) -> None:
+    """SearchIndex.add_lecture on the shared index; failures are logged, never raised."""
+    try:
+        get_search_index().add_lecture(key, **fields)
+    except Exception:
+        logger.exception(f"Failed to index lecture {key}")
+
+
+def index_translation(key: str, language: str, text: str) -> None:
+    try:
+        get_search_index().add_translation(key, language, text)
+    except Exception:
+        logger.exception(f"Failed to index {language} translation of lecture {key}")
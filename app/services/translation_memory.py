@@ -0,0 +1,183 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from nltk.tokenize import sent_tokenize
+
+from app.utils.cache import result_stores_disabled
+from app.utils.metrics import register_metrics_source
+from models.bert.preprocess_text import setup_nltk
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TRANSLATION_MEMORY_PATH = "data/translation_memory.sqlite3"
+
+# Keys ignore punctuation, so rows stored under the older keys that kept it
+# (and their near-match trigram index) are left behind in other tables.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS translations (
+    id INTEGER PRIMARY KEY,
+    pair TEXT NOT NULL,
+    normalized TEXT NOT NULL,
+    source TEXT NOT NULL,
+    translation TEXT NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    UNIQUE (pair, normalized)
+);
+"""
+
+
+def normalize_segment(text: str) -> str:
+    """
+    Matching key of a sentence: NFKC, case-folded, punctuation replaced by
+    spaces, whitespace collapsed. Replacing rather than dropping punctuation
+    keeps "3.5" and "35" apart.
+    """
+    text = unicodedata.normalize("NFKC", text).casefold()
+    text = "".join(" " if unicodedata.category(char).startswith("P") else char for char in text)
+    return " ".join(text.split())
+
+
+class TranslationMemory:
+    """
+    Persistent sentence-level translation memory.
+
+    Segments are stored per language pair under their normalized text, so
+    repeated sentences (course intros, boilerplate) are hits even when they
+    differ in case, spacing or punctuation. Any other difference is a miss:
+    a similar sentence can mean the opposite ("is not mandatory" against
+    "is mandatory"), so its translation is never reused.
+    """
+
+    def __init__(self, path: str = DEFAULT_TRANSLATION_MEMORY_PATH):
+        self.path = path
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        if path != ":memory:":
+            # Lets several gunicorn workers read while one writes.
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self.stats = Counter()
+
+    def lookup(self, segments: Sequence[str], source_language: str, target_language: str) -> List[Optional[str]]:
+        """Stored translations for segments, None where there is no match."""
+        pair = f"{source_language}:{target_language}"
+        results: List[Optional[str]] = []
+        with self._lock:
+            for segment in segments:
+                translation = self._exact(pair, normalize_segment(segment))
+                self.stats["hits" if translation is not None else "misses"] += 1
+                results.append(translation)
+            self._conn.commit()
+        return results
+
+    def _exact(self, pair: str, normalized: str) -> Optional[str]:
+        row = self._conn.execute(
+            "SELECT id, translation FROM translations WHERE pair = ? AND normalized = ?", (pair, normalized)
+        ).fetchone()
+        if row is None:
+            return None
+        self._conn.execute("UPDATE translations SET hits = hits + 1 WHERE id = ?", (row[0],))
+        return row[1]
+
+    def store(self, pairs: Sequence[Tuple[str, str]], source_language: str, target_language: str):
+        """Add (source segment, translation) pairs to the memory."""
+        pair = f"{source_language}:{target_language}"
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO translations (pair, normalized, source, translation, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(pair, normalize_segment(source), source, translation, now) for source, translation in pairs],
+            )
+            self._conn.commit()
+
+    def record_backend_call(self, segments: int):
+        with self._lock:
+            self.stats["backend_calls"] += 1
+            self.stats["backend_segments"] += segments
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            segments = self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+            stats = dict(self.stats)
+        lookups = stats.get("hits", 0) + stats.get("misses", 0)
+        return {
+            "segments": segments,
+            **stats,
+            "hit_rate": stats.get("hits", 0) / lookups if lookups else 0.0,
+        }
+
+
+class MemoizedTranslator:
+    """
+    Translator wrapper that splits text into sentences, serves the ones
+    already in the translation memory, and sends only the remaining unique
+    sentences to the backend translator in a single batch. Without a
+    memory (see get_translation_memory) every sentence is translated.
+    """
+
+    def __init__(self, translator, memory: Optional[TranslationMemory] = None, source_language: str = "auto"):
+        setup_nltk()
+        self.translator = translator
+        self.memory = memory or get_translation_memory()
+        self.source_language = source_language
+
+    def translate_text(self, text: str, target_language: str = "en") -> str:
+        sentences = sent_tokenize(text)
+        if not sentences:
+            return text
+        return " ".join(self.translate_segments(sentences, target_language))
+
+    def translate_segments(self, segments: Sequence[str], target_language: str = "en") -> List[str]:
+        if self.memory is None:
+            return self.translator.translate_batch(list(segments), target_language)
+        translations = self.memory.lookup(segments, self.source_language, target_language)
+
+        # Sentences repeated within the text are translated once.
+        missing: Dict[str, str] = {}
+        for segment, translation in zip(segments, translations):
+            if translation is None:
+                missing.setdefault(normalize_segment(segment), segment)
+
+        if missing:
+            sources = list(missing.values())
+            translated = self.translator.translate_batch(sources, target_language)
+            self.memory.record_backend_call(len(sources))
+            self.memory.store(list(zip(sources, translated)), self.source_language, target_language)
+            by_key = dict(zip(missing.keys(), translated))
+            translations = [
+                translation if translation is not None else by_key[normalize_segment(segment)]
+                for segment, translation in zip(segments, translations)
+            ]
+        return translations
+
+
+_memory: Optional[TranslationMemory] = None
+_memory_lock = threading.Lock()
+
+
+def get_translation_memory() -> Optional[TranslationMemory]:
+    """
+    The shared memory, or None when TRANSLATION_MEMORY_PATH is set to an
+    empty string or result stores are disabled.
+    """
+    global _memory
+    path = os.getenv("TRANSLATION_MEMORY_PATH", DEFAULT_TRANSLATION_MEMORY_PATH)
+    if not path or result_stores_disabled():
+        return None
+    with _memory_lock:
+        if _memory is None:
+            _memory = TranslationMemory(path)
+            register_metrics_source("translation_memory", _memory.snapshot)
+        return _memory
@@ -0,0 +1,219 @@
+import gc
+import logging
+import os
+import resource
+import threading
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+import torch
+
+from app.utils.metrics import register_metrics_source
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+MB = 1024 * 1024
+
+
+def available_memory_bytes(device: str) -> int:
+    """Free memory on the device the model runs on."""
+    if device.startswith("cuda"):
+        free, _ = torch.cuda.mem_get_info()
+        return free
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+
+
+def is_out_of_memory(error: BaseException) -> bool:
+    if isinstance(error, MemoryError):
+        return True
+    if hasattr(torch.cuda, "OutOfMemoryError") and isinstance(error, torch.cuda.OutOfMemoryError):
+        return True
+    message = str(error).lower()
+    return isinstance(error, RuntimeError) and (
+        "out of memory" in message or "can't allocate memory" in message or "defaultcpuallocator" in message
+    )
+
+
+def _free_memory(device: str):
+    gc.collect()
+    if device.startswith("cuda"):
+        torch.cuda.empty_cache()
+
+
+class AdaptiveBatchController:
+    """
+    Choose batch sizes from the memory currently available and the measured
+    memory footprint of one item, and recover from allocation failures by
+    splitting the batch instead of failing the request.
+
+    After an out-of-memory error the failed size caps later batches. The cap
+    is relaxed by one item after every `relax_after` successful batches, so
+    a transient spike does not pin the controller to small batches for good.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        item_bytes: int,
+        min_batch: int = 1,
+        max_batch: int = 16,
+        memory_fraction: float = 0.5,
+        relax_after: int = 20,
+        device: Optional[str] = None,
+    ):
+        self.name = name
+        self.item_bytes = item_bytes
+        self.min_batch = min_batch
+        self.max_batch = max_batch
+        self.memory_fraction = memory_fraction
+        self.relax_after = relax_after
+        self.device = device or ("cuda:0" if torch.cuda.is_available() else "cpu")
+
+        self._ceiling = max_batch
+        self._successes_since_oom = 0
+        self._lock = threading.Lock()
+        self.last_batch_size: Optional[int] = None
+        self.chosen_sizes = Counter()
+        self.oom_splits = 0
+
+    def batch_size(self, limit: Optional[int] = None) -> int:
+        budget = available_memory_bytes(self.device) * self.memory_fraction
+        with self._lock:
+            size = int(budget // max(1, self.item_bytes))
+            size = max(self.min_batch, min(size, self._ceiling, self.max_batch))
+            if limit is not None:
+                size = max(self.min_batch, min(size, limit))
+            self.last_batch_size = size
+            self.chosen_sizes[size] += 1
+        return size
+
+    def _measured(self, fn: Callable[[], R]) -> Tuple[R, Optional[int]]:
+        """Run fn and return its result with the peak memory it added, if measurable."""
+        if self.device.startswith("cuda"):
+            torch.cuda.reset_peak_memory_stats()
+            before = torch.cuda.memory_allocated()
+            result = fn()
+            return result, torch.cuda.max_memory_allocated() - before
+
+        # ru_maxrss only ever grows, so it only tells us something when this
+        # call raised the process's high-water mark.
+        peak_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        result = fn()
+        peak_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        return result, (peak_after - peak_before) if peak_after > peak_before else None
+
+    def _record_success(self, size: int, peak_bytes: Optional[int]):
+        with self._lock:
+            if peak_bytes and size:
+                observed = peak_bytes / size
+                # Only grow the estimate from CPU high-water marks, which are lower bounds.
+                if self.device.startswith("cuda") or observed > self.item_bytes:
+                    self.item_bytes = int(0.7 * self.item_bytes + 0.3 * observed)
+            self._successes_since_oom += 1
+            if self._successes_since_oom >= self.relax_after and self._ceiling < self.max_batch:
+                self._ceiling += 1
+                self._successes_since_oom = 0
+
+    def _record_oom(self, size: int):
+        with self._lock:
+            self.oom_splits += 1
+            self._ceiling = max(self.min_batch, size // 2)
+            self._successes_since_oom = 0
+        logger.warning(f"{self.name}: out of memory with batch size {size}, splitting")
+        _free_memory(self.device)
+
+    def call_with_backoff(self, fn: Callable[[int], R], limit: Optional[int] = None) -> R:
+        """
+        Call fn(batch_size) for work whose batching happens inside fn (such as
+        the Whisper pipeline), halving the batch size after out-of-memory errors.
+        """
+        size = self.batch_size(limit)
+        while True:
+            try:
+                result, peak = self._measured(lambda: fn(size))
+                self._record_success(size, peak)
+                return result
+            except Exception as e:
+                if not is_out_of_memory(e) or size <= self.min_batch:
+                    raise
+                self._record_oom(size)
+                size = max(self.min_batch, size // 2)
+                with self._lock:
+                    self.last_batch_size = size
+
+    def map_batches(
+        self,
+        items: Sequence[T],
+        fn: Callable[[List[T]], List[R]],
+        limit: Optional[int] = None,
+    ) -> List[R]:
+        """Apply fn to adaptively sized batches of items, preserving order."""
+        results: List[R] = []
+        start = 0
+        while start < len(items):
+            size = min(self.batch_size(limit), len(items) - start)
+            results.extend(self._run_split(list(items[start : start + size]), fn))
+            start += size
+        return results
+
+    def _run_split(self, batch: List[T], fn: Callable[[List[T]], List[R]]) -> List[R]:
+        try:
+            result, peak = self._measured(lambda: fn(batch))
+            self._record_success(len(batch), peak)
+            return result
+        except Exception as e:
+            if not is_out_of_memory(e) or len(batch) <= 1:
+                raise
+            self._record_oom(len(batch))
+            middle = len(batch) // 2
+            return self._run_split(batch[:middle], fn) + self._run_split(batch[middle:], fn)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "device": self.device,
+                "last_batch_size": self.last_batch_size,
+                "chosen_batch_sizes": dict(self.chosen_sizes),
+                "item_mb": self.item_bytes / MB,
+                "ceiling": self._ceiling,
+                "oom_splits": self.oom_splits,
+                "available_mb": available_memory_bytes(self.device) / MB,
+            }
+
+
+# Starting per-item footprints; refined from measurements at runtime.
+BATCH_DEFAULTS = {
+    "whisper": {"item_bytes": 128 * MB, "max_batch": 16},
+    "bart": {"item_bytes": 256 * MB, "max_batch": 16},
+}
+
+_controllers: Dict[str, AdaptiveBatchController] = {}
+_controllers_lock = threading.Lock()
+
+
+def get_batch_controller(name: str) -> AdaptiveBatchController:
+    with _controllers_lock:
+        if name not in _controllers:
+            defaults = BATCH_DEFAULTS.get(name, {"item_bytes": 128 * MB})
+            prefix = name.upper()
+            _controllers[name] = AdaptiveBatchController(
+                name,
+                item_bytes=int(os.getenv(f"{prefix}_BATCH_ITEM_MB", defaults["item_bytes"] // MB)) * MB,
+                max_batch=int(os.getenv(f"{prefix}_MAX_BATCH", defaults.get("max_batch", 16))),
+                memory_fraction=float(os.getenv("BATCH_MEMORY_FRACTION", "0.5")),
+            )
+            if len(_controllers) == 1:
+                register_metrics_source(
+                    "batching", lambda: {n: c.snapshot() for n, c in _controllers.items()}
+                )
+        return _controllers[name]
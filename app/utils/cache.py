@@ -0,0 +1,79 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Generic, Optional, TypeVar
+
+from app.utils.metrics import register_metrics_source
+
+V = TypeVar("V")
+
+
+def content_key(*parts: Any) -> str:
+    """sha256 over the JSON encoding of parts, for content-addressed cache keys."""
+    encoded = json.dumps(parts, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class LRUCache(Generic[V]):
+    """Thread-safe least-recently-used cache with hit/miss counters."""
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, V]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[V]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: V):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+def result_stores_disabled() -> bool:
+    """
+    True when DISABLE_RESULT_STORES is set, for load tests: the named caches
+    get size 0 and the fingerprint index and translation memory are off, so
+    replayed requests do the full work every time.
+    """
+    return os.getenv("DISABLE_RESULT_STORES", "").lower() in ("1", "true", "yes")
+
+
+_caches: Dict[str, LRUCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(name: str, default_size: int = 4096) -> LRUCache:
+    """Process-wide named cache, sized by the <NAME>_CACHE_SIZE environment variable."""
+    with _caches_lock:
+        if name not in _caches:
+            size = 0 if result_stores_disabled() else int(os.getenv(f"{name.upper()}_CACHE_SIZE", default_size))
+            _caches[name] = LRUCache(size)
+            if len(_caches) == 1:
+                register_metrics_source("caches", lambda: {n: c.snapshot() for n, c in _caches.items()})
+        return _caches[name]
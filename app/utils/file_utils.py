@@ -1,11 +1,43 @@
 import os
+import logging
 import tempfile
+from typing import Dict
 from fastapi import UploadFile
+from models.whisper_pretrained.audio import WHISPER_SAMPLING_RATE, decode_audio_bytes
 
-async def save_upload_to_temp(file: UploadFile) -> str:
-    """Saves an uploaded file to a temporary location and returns the file path."""
-    suffix = os.path.splitext(file.filename)[-1]
+logger = logging.getLogger(__name__)
+
+# Uploads up to this size are tried in memory; 30 s of 44.1 kHz stereo WAV is ~5.3 MB.
+IN_MEMORY_AUDIO_MAX_BYTES = int(os.getenv("IN_MEMORY_AUDIO_MAX_BYTES", "8000000"))
+IN_MEMORY_AUDIO_MAX_SECONDS = 30
+
+def _write_temp(data: bytes, filename: str) -> str:
+    suffix = os.path.splitext(filename or "")[-1]
     with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-        data = await file.read()
         tmp.write(data)
         return tmp.name
+
+async def save_upload_to_temp(file: UploadFile) -> str:
+    """Saves an uploaded file to a temporary location and returns the file path."""
+    return _write_temp(await file.read(), file.filename)
+
+def audio_info_from_bytes(data: bytes, filename: str, in_memory: bool = True) -> Dict:
+    """
+    Return an audio_info dict for uploaded bytes. Short clips are decoded
+    straight from memory into {"array", "sampling_rate", "duration"}; other
+    uploads (long, too large, or in a format soundfile cannot decode) are
+    written to a temp file and returned as {"file_path"}, which the caller
+    must remove.
+
+    Decoding, resampling and the temp-file write all block, so async callers
+    run this with run_in_threadpool.
+    """
+    if in_memory and len(data) <= IN_MEMORY_AUDIO_MAX_BYTES:
+        try:
+            audio = decode_audio_bytes(data)
+            duration = len(audio) / WHISPER_SAMPLING_RATE
+            if duration <= IN_MEMORY_AUDIO_MAX_SECONDS:
+                return {"array": audio, "sampling_rate": WHISPER_SAMPLING_RATE, "duration": duration}
+        except Exception as e:
+            logger.debug(f"In-memory decoding failed for {filename}, using a temp file: {e}")
+    return {"file_path": _write_temp(data, filename)}
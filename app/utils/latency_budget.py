@@ -0,0 +1,82 @@
+import os
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+from app.utils.metrics import register_metrics_source
+
+# Starting costs in seconds per generated token per item, refined from
+# measurements at runtime. "sampled" is the default decoding (beam sampling
+# or assisted), "greedy" a single greedy beam, "extractive" picks sentences
+# without the model (its cost is per word of output).
+COST_DEFAULTS = {
+    "bart": {"sampled": 0.05, "greedy": 0.015, "extractive": 0.0001},
+}
+
+
+class GenerationCostModel:
+    """
+    Running estimate of what generation costs, per decoding mode.
+
+    Costs are kept as seconds per output token per item (an EWMA over recent
+    calls), so one estimate covers chunks with different max_length limits
+    and batches of different sizes. Planners use `estimate` to decide what a
+    latency budget can afford, and report every timed call with `record`.
+    """
+
+    def __init__(self, name: str, defaults: Dict[str, float], alpha: float = 0.3):
+        self.name = name
+        self.alpha = alpha
+        self._per_token = dict(defaults)
+        self._lock = threading.Lock()
+        self.samples = Counter()
+
+    def estimate(self, mode: str, max_length: int, items: int = 1) -> float:
+        with self._lock:
+            return self._per_token[mode] * max_length * items
+
+    def record(self, mode: str, max_length: int, items: int, seconds: float):
+        if max_length <= 0 or items <= 0:
+            return
+        observed = seconds / (max_length * items)
+        with self._lock:
+            previous = self._per_token.get(mode)
+            self._per_token[mode] = observed if previous is None else (1 - self.alpha) * previous + self.alpha * observed
+            self.samples[mode] += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "ms_per_token": {mode: 1000 * cost for mode, cost in self._per_token.items()},
+                "samples": dict(self.samples),
+            }
+
+
+_models: Dict[str, GenerationCostModel] = {}
+_models_lock = threading.Lock()
+
+
+def get_cost_model(name: str) -> GenerationCostModel:
+    with _models_lock:
+        if name not in _models:
+            defaults = dict(COST_DEFAULTS.get(name, COST_DEFAULTS["bart"]))
+            prefix = name.upper()
+            for mode in defaults:
+                # e.g. BART_SAMPLED_MS_PER_TOKEN=30 to start from a measured value
+                value: Optional[str] = os.getenv(f"{prefix}_{mode.upper()}_MS_PER_TOKEN")
+                if value:
+                    defaults[mode] = float(value) / 1000
+            _models[name] = GenerationCostModel(name, defaults)
+            if len(_models) == 1:
+                register_metrics_source(
+                    "generation_cost", lambda: {n: m.snapshot() for n, m in _models.items()}
+                )
+        return _models[name]
+
+
+def remaining_budget(latency_budget: Optional[float], started: float) -> Optional[float]:
+    """What is left of a request's latency budget since started (a time.monotonic() value)."""
+    if latency_budget is None:
+        return None
+    return max(0.0, latency_budget - (time.monotonic() - started))
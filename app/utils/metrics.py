@@ -0,0 +1,23 @@
+import logging
+from typing import Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+_sources: Dict[str, Callable[[], Dict]] = {}
+
+
+def register_metrics_source(name: str, source: Callable[[], Dict]):
+    """Register a callable returning a JSON-serialisable snapshot of metrics."""
+    _sources[name] = source
+
+
+def collect_metrics() -> Dict[str, Dict]:
+    """Return the current snapshot of every registered metrics source."""
+    snapshot = {}
+    for name, source in _sources.items():
+        try:
+            snapshot[name] = source()
+        except Exception as e:
+            logger.error(f"Error collecting metrics from {name}: {e}")
+            snapshot[name] = {"error": str(e)}
+    return snapshot
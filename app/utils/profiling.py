@@ -0,0 +1,293 @@
+import logging
+import os
+import sys
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+from starlette.concurrency import run_in_threadpool as _run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+PROFILE_MODES = ("stack", "torch")
+
+# The profile of the request being handled, if it asked for one. Contextvars
+# are copied into threadpool calls, so the wrappers below see it too.
+_active_profile: ContextVar[Optional["RequestProfile"]] = ContextVar("active_profile", default=None)
+
+# torch.profiler cannot be nested, so only one request at a time gets it.
+_torch_profiler_lock = threading.Lock()
+
+
+def profiling_enabled() -> bool:
+    return os.getenv("ENABLE_PROFILING", "").lower() in ("1", "true", "yes")
+
+
+FrameKey = Tuple[str, str, int]
+
+
+class StackSampler:
+    """
+    Wall-clock stack sampler for a chosen set of threads.
+
+    A daemon thread reads sys._current_frames() every `interval` seconds and
+    records the stack of each registered thread. Frames and stacks are
+    interned, and the timeline is kept as compact arrays of stack ids and
+    sample weights.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.frames: List[FrameKey] = []
+        self._frame_ids: Dict[FrameKey, int] = {}
+        self.stacks: List[Tuple[int, ...]] = []
+        self._stack_ids: Dict[Tuple[int, ...], int] = {}
+        self.samples = array("I")
+        self.weights = array("d")
+        self.start_time: Optional[float] = None
+        self.end_time: Optional[float] = None
+
+        self._threads: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add_thread(self, ident: int, role: str):
+        with self._lock:
+            self._threads[ident] = role
+
+    def remove_thread(self, ident: int):
+        with self._lock:
+            self._threads.pop(ident, None)
+
+    def start(self):
+        self.start_time = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.end_time = time.perf_counter()
+
+    def _run(self):
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            elapsed, last = now - last, now
+            frames = sys._current_frames()
+            with self._lock:
+                for ident, role in self._threads.items():
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        self._record(role, frame, elapsed)
+
+    def _intern_frame(self, key: FrameKey) -> int:
+        frame_id = self._frame_ids.get(key)
+        if frame_id is None:
+            frame_id = self._frame_ids[key] = len(self.frames)
+            self.frames.append(key)
+        return frame_id
+
+    def _record(self, role: str, frame, weight: float):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(self._intern_frame((code.co_name, code.co_filename, code.co_firstlineno)))
+            frame = frame.f_back
+        stack.append(self._intern_frame((f"[{role}]", "", 0)))
+        stack = tuple(reversed(stack))
+
+        stack_id = self._stack_ids.get(stack)
+        if stack_id is None:
+            stack_id = self._stack_ids[stack] = len(self.stacks)
+            self.stacks.append(stack)
+        self.samples.append(stack_id)
+        self.weights.append(weight)
+
+    @staticmethod
+    def frame_label(key: FrameKey) -> str:
+        name, filename, line = key
+        if not filename:
+            return name
+        return f"{name} ({os.path.basename(filename)}:{line})"
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's collapsed stack format, one line per unique stack."""
+        with self._lock:
+            counts: Dict[int, int] = {}
+            for stack_id in self.samples:
+                counts[stack_id] = counts.get(stack_id, 0) + 1
+            lines = [
+                ";".join(self.frame_label(self.frames[i]).replace(";", ":") for i in self.stacks[stack_id])
+                + f" {count}"
+                for stack_id, count in counts.items()
+            ]
+        return "\n".join(sorted(lines)) + "\n"
+
+    def speedscope(self, name: str) -> Dict:
+        """A speedscope "sampled" profile, weighted by wall-clock seconds."""
+        with self._lock:
+            end = (self.end_time or time.perf_counter()) - (self.start_time or 0.0)
+            return {
+                "$schema": "https://www.speedscope.app/file-format-schema.json",
+                "name": name,
+                "exporter": "lecture-api stack sampler",
+                "shared": {
+                    "frames": [
+                        {"name": frame[0], "file": frame[1], "line": frame[2]} if frame[1] else {"name": frame[0]}
+                        for frame in self.frames
+                    ]
+                },
+                "profiles": [
+                    {
+                        "type": "sampled",
+                        "name": name,
+                        "unit": "seconds",
+                        "startValue": 0,
+                        "endValue": end,
+                        "samples": [list(self.stacks[stack_id]) for stack_id in self.samples],
+                        "weights": list(self.weights),
+                    }
+                ],
+            }
+
+
+class RequestProfile:
+    """
+    Profiling state of one request: a stack sampler over the event loop
+    thread and every threadpool thread working for the request, plus
+    torch.profiler reports for model calls when mode is "torch".
+    """
+
+    def __init__(self, request_id: str, path: str, mode: str = "stack", interval: float = 0.005):
+        self.request_id = request_id
+        self.path = path
+        self.mode = mode
+        self.sampler = StackSampler(interval)
+        self.torch_reports: List[str] = []
+        self.notes: List[str] = []
+        self.created_at = time.time()
+        self.running = False
+
+    def start(self):
+        self.running = True
+        self.sampler.start()
+
+    def stop(self):
+        self.sampler.stop()
+        self.running = False
+
+    def call(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """Run func on the current thread with that thread sampled."""
+        ident = threading.get_ident()
+        self.sampler.add_thread(ident, "worker")
+        try:
+            if self.mode == "torch":
+                return self._call_with_torch_profiler(func, *args, **kwargs)
+            return func(*args, **kwargs)
+        finally:
+            self.sampler.remove_thread(ident)
+
+    def _call_with_torch_profiler(self, func: Callable[..., T], *args, **kwargs) -> T:
+        if not _torch_profiler_lock.acquire(blocking=False):
+            self.notes.append("torch profiler was busy with another request, skipped one call")
+            return func(*args, **kwargs)
+        try:
+            import torch
+            from torch.profiler import ProfilerActivity, profile
+
+            activities = [ProfilerActivity.CPU]
+            if torch.cuda.is_available():
+                activities.append(ProfilerActivity.CUDA)
+            with profile(activities=activities) as prof:
+                result = func(*args, **kwargs)
+            sort_by = "self_cuda_time_total" if torch.cuda.is_available() else "self_cpu_time_total"
+            name = getattr(func, "__qualname__", repr(func))
+            self.torch_reports.append(f"# {name}\n{prof.key_averages().table(sort_by=sort_by, row_limit=30)}")
+            return result
+        finally:
+            _torch_profiler_lock.release()
+
+    def summary(self) -> Dict:
+        return {
+            "request_id": self.request_id,
+            "path": self.path,
+            "mode": self.mode,
+            "running": self.running,
+            "created_at": self.created_at,
+            "samples": len(self.sampler.samples),
+            "notes": self.notes,
+        }
+
+
+class ProfileStore:
+    """Bounded in-memory store of recent profiles; the oldest are evicted first."""
+
+    def __init__(self, max_profiles: int = 50):
+        self.max_profiles = max_profiles
+        self._profiles: "OrderedDict[str, RequestProfile]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, profile: RequestProfile):
+        with self._lock:
+            self._profiles[profile.request_id] = profile
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+
+    def get(self, request_id: str) -> Optional[RequestProfile]:
+        with self._lock:
+            return self._profiles.get(request_id)
+
+    def list(self) -> List[Dict]:
+        with self._lock:
+            profiles = list(self._profiles.values())
+        return [profile.summary() for profile in reversed(profiles)]
+
+
+_store: Optional[ProfileStore] = None
+_store_lock = threading.Lock()
+
+
+def get_profile_store() -> ProfileStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ProfileStore(int(os.getenv("PROFILE_STORE_SIZE", "50")))
+        return _store
+
+
+def activate_profile(profile: RequestProfile):
+    return _active_profile.set(profile)
+
+
+def deactivate_profile(token):
+    _active_profile.reset(token)
+
+
+async def run_in_threadpool(func: Callable[..., T], *args, **kwargs) -> T:
+    """
+    starlette's run_in_threadpool that also samples the worker thread when
+    the current request is being profiled. Costs one contextvar lookup
+    otherwise.
+    """
+    profile = _active_profile.get()
+    if profile is None:
+        return await _run_in_threadpool(func, *args, **kwargs)
+    return await _run_in_threadpool(profile.call, func, *args, **kwargs)
+
+
+async def iterate_in_threadpool(iterator: Iterator[T]):
+    """Async iteration over a blocking iterator, one next() per threadpool call."""
+    sentinel = object()
+    while True:
+        item = await run_in_threadpool(next, iterator, sentinel)
+        if item is sentinel:
+            break
+        yield item
@@ -0,0 +1,53 @@
+# Multi-worker deployment: gunicorn -c gunicorn.conf.py app.main:app
+#
+# Models are loaded once in the master process and shared copy-on-write with
+# the forked uvicorn workers, so N workers cost roughly one copy of the
+# Whisper and BART weights instead of N.
+import os
+import multiprocessing
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = int(os.getenv("WORKER_TIMEOUT", "600"))
+graceful_timeout = 30
+
+# Split the CPU cores between workers so their torch thread pools do not
+# oversubscribe the node.
+threads_per_worker = int(
+    os.getenv("TORCH_THREADS_PER_WORKER", max(1, multiprocessing.cpu_count() // workers))
+)
+
+
+def _csv_env(name, default):
+    value = os.getenv(name, default)
+    return tuple(item.strip() for item in value.split(",") if item.strip())
+
+
+def on_starting(server):
+    # Runs in the master before any worker is forked. Only weights are
+    # loaded here; no inference runs in the master, so torch's thread pools
+    # are not started before fork.
+    from app.models.registry import DEFAULT_LONG_CONTEXT_MODEL, DEFAULT_SUMMARIZER_MODEL, preload_models
+    from app.models.whisper_policy import allowed_whisper_models
+
+    # Every model the Whisper policy may pick is preloaded, so switching
+    # models per request never loads weights inside a worker. Likewise the
+    # long-context summarizer, unless the summarizer backend is pinned to BART.
+    long_context_model = ""
+    if os.getenv("SUMMARIZER_BACKEND", "auto") != "bart":
+        long_context_model = os.getenv("LONG_CONTEXT_SUMMARIZER_MODEL", DEFAULT_LONG_CONTEXT_MODEL)
+    preload_models(
+        whisper_models=_csv_env("PRELOAD_WHISPER_MODELS", ",".join(allowed_whisper_models())),
+        summarizer_models=_csv_env("PRELOAD_SUMMARIZER_MODELS", DEFAULT_SUMMARIZER_MODEL),
+        draft_summarizer_models=_csv_env("SUMMARIZER_ASSISTANT_MODEL", ""),
+        long_context_models=_csv_env("PRELOAD_LONG_CONTEXT_MODELS", long_context_model),
+    )
+
+
+def post_fork(server, worker):
+    import torch
+
+    torch.set_num_threads(threads_per_worker)
+    server.log.info(f"Worker {worker.pid} using {threads_per_worker} torch threads")
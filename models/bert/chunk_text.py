@@ -1,3 +1,4 @@
+import hashlib
 from nltk.tokenize import sent_tokenize, word_tokenize
 from typing import List, Dict
 
@@ -32,4 +33,72 @@ def create_smart_chunks(text: str, chunk_size: int = 800, overlap_size: int = 10
     if current_chunk:
         chunks.append({"text": " ".join(current_chunk), "next_context": ""})
 
-    return chunks
\ No newline at end of file
+    return chunks
+
+def create_dedup_chunks(text: str, chunk_size: int = 800, context_sentences: int = 1) -> List[Dict[str, str]]:
+    """
+    Create chunks that partition the sentences so each one is encoded once.
+
+    create_smart_chunks repeats the previous chunk's last 3 sentences and adds
+    the next 3 as context, so boundary regions pass through the encoder two or
+    three times. Here every sentence belongs to exactly one chunk, and only
+    the last `context_sentences` sentences of the previous chunk are carried
+    over as lead-in context.
+    """
+    sentences = sent_tokenize(text)
+    lengths = [len(word_tokenize(s)) for s in sentences]
+    chunks = []
+    start = 0
+
+    while start < len(sentences):
+        end = start
+        current_length = 0
+        while end < len(sentences) and (end == start or current_length + lengths[end] <= chunk_size):
+            current_length += lengths[end]
+            end += 1
+
+        context = sentences[max(0, start - context_sentences) : start]
+        chunks.append({"text": " ".join(context + sentences[start:end]), "next_context": ""})
+        start = end
+
+    return chunks
+
+def stable_hash(text: str) -> int:
+    """A hash of the text that is the same in every process (unlike hash())."""
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big")
+
+def create_stable_chunks(text: str, chunk_size: int = 800, context_sentences: int = 1) -> List[Dict[str, str]]:
+    """
+    Create chunks whose boundaries depend on the content of the sentences
+    rather than on their running word count.
+
+    Once a chunk holds two thirds of chunk_size, it ends after the first
+    sentence whose hash is divisible by a fixed divisor (about one sentence in
+    five), or when the next sentence would overflow chunk_size. An edit
+    therefore only moves the boundaries around it, and chunks elsewhere keep
+    exactly the same text, which lets their summaries be reused.
+    """
+    sentences = sent_tokenize(text)
+    divisor = max(2, chunk_size // 160)
+    min_size = chunk_size * 2 // 3
+    chunks = []
+    start = 0
+    current_length = 0
+
+    for i, sentence in enumerate(sentences):
+        length = len(word_tokenize(sentence))
+        if i > start and current_length + length > chunk_size:
+            context = sentences[max(0, start - context_sentences) : start]
+            chunks.append({"text": " ".join(context + sentences[start:i]), "next_context": ""})
+            start, current_length = i, 0
+        current_length += length
+        if current_length >= min_size and stable_hash(sentence.strip().lower()) % divisor == 0:
+            context = sentences[max(0, start - context_sentences) : start]
+            chunks.append({"text": " ".join(context + sentences[start : i + 1]), "next_context": ""})
+            start, current_length = i + 1, 0
+
+    if start < len(sentences):
+        context = sentences[max(0, start - context_sentences) : start]
+        chunks.append({"text": " ".join(context + sentences[start:]), "next_context": ""})
+
+    return chunks
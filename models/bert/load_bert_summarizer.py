@@ -1,7 +1,8 @@
 import logging
 import torch
-from transformers import pipeline
+from transformers import AutoModelForSeq2SeqLM, pipeline
 from typing import Optional
+from models.snapshots import load_snapshot_model, load_snapshot_pipeline
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -15,11 +16,30 @@ def load_bert_summarizer(model_name: str = "philschmid/bart-large-cnn-samsum") -
         if device == "cpu":
             logger.warning("Running on CPU - processing may be slower")
 
-        model = pipeline(
-            "summarization", model=model_name, device=device, framework="pt"
-        )
+        model = load_snapshot_pipeline("summarization", model_name, device)
+        if model is None:
+            model = pipeline(
+                "summarization", model=model_name, device=device, framework="pt"
+            )
         logger.info(f"Model loaded successfully on {device}")
         return model
     except Exception as e:
         logger.error(f"Error loading model: {str(e)}")
+        raise
+
+def load_draft_summarizer(model_name: str = "sshleifer/distilbart-cnn-12-6"):
+    """
+    Load a small seq2seq model used as the draft model for assisted decoding.
+    It must share the tokenizer of the main summarization model.
+    """
+    try:
+        device = "cuda:0" if torch.cuda.is_available() else "cpu"
+        model = load_snapshot_model("summarization", model_name)
+        if model is None:
+            model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
+        model = model.to(device).eval()
+        logger.info(f"Draft model {model_name} loaded successfully on {device}")
+        return model
+    except Exception as e:
+        logger.error(f"Error loading draft model: {str(e)}")
         raise
\ No newline at end of file
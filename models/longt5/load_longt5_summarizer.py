@@ -0,0 +1,30 @@
+import logging
+import torch
+from transformers import pipeline
+from typing import Optional
+from models.snapshots import load_snapshot_pipeline
+
+logger = logging.getLogger(__name__)
+
+def load_longt5_summarizer(
+    model_name: str = "pszemraj/long-t5-tglobal-base-16384-book-summary",
+) -> Optional[pipeline]:
+    """
+    Load a long-context (LongT5/LED) summarization model that reads up to
+    16k tokens in a single pass.
+    """
+    try:
+        device = "cuda:0" if torch.cuda.is_available() else "cpu"
+        if device == "cpu":
+            logger.warning("Running long-context summarizer on CPU - processing may be slower")
+
+        model = load_snapshot_pipeline("summarization", model_name, device)
+        if model is None:
+            model = pipeline(
+                "summarization", model=model_name, device=device, framework="pt"
+            )
+        logger.info(f"Long-context model loaded successfully on {device}")
+        return model
+    except Exception as e:
+        logger.error(f"Error loading long-context model: {str(e)}")
+        raise
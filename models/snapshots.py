@@ -0,0 +1,319 @@
+import hashlib
+import itertools
+import json
+import logging
+import mmap
+import os
+import shutil
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SNAPSHOT_DIR = "data/model_snapshots"
+MANIFEST_NAME = "snapshot.json"
+
+# Pipeline task -> transformers auto class the weights are loaded with.
+TASK_MODEL_CLASSES = {
+    "automatic-speech-recognition": "AutoModelForSpeechSeq2Seq",
+    "summarization": "AutoModelForSeq2SeqLM",
+}
+
+_SAFETENSORS_DTYPES = {
+    "F64": torch.float64,
+    "F32": torch.float32,
+    "F16": torch.float16,
+    "BF16": torch.bfloat16,
+    "I64": torch.int64,
+    "I32": torch.int32,
+    "I16": torch.int16,
+    "I8": torch.int8,
+    "U8": torch.uint8,
+    "BOOL": torch.bool,
+}
+
+
+class SnapshotError(RuntimeError):
+    pass
+
+
+def _model_class(task: str):
+    import transformers
+
+    if task not in TASK_MODEL_CLASSES:
+        raise ValueError(f"No snapshot support for task '{task}'")
+    return getattr(transformers, TASK_MODEL_CLASSES[task])
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def mmap_safetensors(path: Path) -> Dict[str, torch.Tensor]:
+    """
+    Tensors of a safetensors file as views of a private memory map.
+
+    Nothing is read up front: pages are faulted in from the page cache when
+    a tensor is first used, and clean pages are shared by every process
+    mapping the same file. The mapping is copy-on-write, so a process that
+    writes to a weight gets its own copy of that page only.
+    """
+    with open(path, "rb") as f:
+        (header_size,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(header_size))
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+    base = 8 + header_size
+    tensors = {}
+    for name, info in header.items():
+        if name == "__metadata__":
+            continue
+        dtype = _SAFETENSORS_DTYPES[info["dtype"]]
+        start, end = info["data_offsets"]
+        count = (end - start) // dtype.itemsize
+        if count:
+            tensor = torch.frombuffer(mapped, dtype=dtype, count=count, offset=base + start)
+        else:
+            tensor = torch.empty(0, dtype=dtype)
+        tensors[name] = tensor.reshape(info["shape"])
+    return tensors
+
+
+class SnapshotManager:
+    """
+    Local, pinned safetensors snapshots of Hugging Face models.
+
+    `pin` resolves a model once (hub or HF cache), saves its weights as
+    safetensors together with its tokenizer/feature extractor, generation
+    config and a manifest of file sizes and sha256 digests. Loading a pinned
+    snapshot never touches the hub and maps the weights instead of reading
+    them (see mmap_safetensors).
+
+    verify_mode controls the integrity check at load time: "size" compares
+    file sizes with the manifest, "full" recomputes every sha256, "off"
+    skips the check. `verify(full=True)` is always available explicitly.
+    """
+
+    def __init__(self, root: str = DEFAULT_SNAPSHOT_DIR, verify_mode: str = "size"):
+        self.root = Path(root)
+        self.verify_mode = verify_mode
+
+    def path(self, model_name: str) -> Path:
+        return self.root / model_name.replace("/", "--")
+
+    def manifest(self, model_name: str) -> Optional[Dict]:
+        manifest_path = self.path(model_name) / MANIFEST_NAME
+        if not manifest_path.exists():
+            return None
+        with open(manifest_path) as f:
+            return json.load(f)
+
+    def is_pinned(self, model_name: str) -> bool:
+        return self.manifest(model_name) is not None
+
+    def pin(self, model_name: str, task: str, revision: Optional[str] = None, force: bool = False) -> Path:
+        """Create the snapshot of model_name (a no-op when it already exists)."""
+        from transformers import AutoProcessor
+
+        target = self.path(model_name)
+        if self.is_pinned(model_name) and not force:
+            return target
+
+        logger.info(f"Pinning snapshot of {model_name} ({task}) to {target}")
+        model = _model_class(task).from_pretrained(model_name, revision=revision)
+        # For text models AutoProcessor falls back to the tokenizer.
+        processor = AutoProcessor.from_pretrained(model_name, revision=revision)
+
+        # Build next to the target and rename, so a snapshot with a manifest
+        # is always complete.
+        self.root.mkdir(parents=True, exist_ok=True)
+        staging = target.with_name(f"{target.name}.tmp-{os.getpid()}")
+        shutil.rmtree(staging, ignore_errors=True)
+        model.save_pretrained(staging, safe_serialization=True)
+        processor.save_pretrained(staging)
+
+        files = {
+            str(path.relative_to(staging)): {"size": path.stat().st_size, "sha256": _sha256(path)}
+            for path in sorted(staging.rglob("*"))
+            if path.is_file()
+        }
+        manifest = {
+            "model_name": model_name,
+            "task": task,
+            "revision": revision or getattr(model.config, "_commit_hash", None),
+            "created_at": time.time(),
+            "files": files,
+        }
+        with open(staging / MANIFEST_NAME, "w") as f:
+            json.dump(manifest, f, indent=2)
+
+        if target.exists():
+            shutil.rmtree(target)
+        os.replace(staging, target)
+        return target
+
+    def verify(self, model_name: str, full: bool = True) -> Dict:
+        """Check the snapshot files against the manifest; raises SnapshotError on mismatch."""
+        manifest = self.manifest(model_name)
+        if manifest is None:
+            raise SnapshotError(f"No snapshot of {model_name} in {self.root}")
+        root = self.path(model_name)
+        for name, expected in manifest["files"].items():
+            path = root / name
+            if not path.is_file():
+                raise SnapshotError(f"Snapshot of {model_name} is missing {name}")
+            if path.stat().st_size != expected["size"]:
+                raise SnapshotError(f"Snapshot of {model_name}: size mismatch for {name}")
+            if full and _sha256(path) != expected["sha256"]:
+                raise SnapshotError(f"Snapshot of {model_name}: checksum mismatch for {name}")
+        return manifest
+
+    def load_model(self, model_name: str):
+        """
+        The model of a pinned snapshot, with memory-mapped weights. Falls back
+        to a regular local from_pretrained when the mapped state dict does not
+        cover every parameter and buffer.
+        """
+        from transformers import AutoConfig, GenerationConfig
+
+        manifest = self._checked_manifest(model_name)
+        root = self.path(model_name)
+        model_class = _model_class(manifest["task"])
+
+        config = AutoConfig.from_pretrained(root)
+        # Built on the meta device, so weight initialization costs nothing.
+        # The default-device mode is thread-local: modules built concurrently
+        # by other threads are unaffected.
+        with torch.device("meta"):
+            model = model_class.from_config(config)
+
+        state_dict = {}
+        for path in sorted(root.glob("*.safetensors")):
+            state_dict.update(mmap_safetensors(path))
+        model.load_state_dict(state_dict, strict=False, assign=True)
+        model.tie_weights()
+
+        # Non-persistent buffers are not in the checkpoint; their computed
+        # values were lost on the meta device.
+        missing = [
+            name
+            for name, tensor in itertools.chain(model.named_parameters(), model.named_buffers())
+            if tensor.is_meta
+        ]
+        if missing:
+            logger.warning(
+                f"Memory-mapped load of {model_name} left {len(missing)} parameters or buffers unset "
+                f"(e.g. {missing[0]}); loading the snapshot normally"
+            )
+            model = model_class.from_pretrained(root, local_files_only=True)
+
+        if (root / "generation_config.json").exists():
+            model.generation_config = GenerationConfig.from_pretrained(root)
+        return model.eval()
+
+    def load_pipeline(self, task: str, model_name: str, device: str = "cpu"):
+        """A transformers pipeline built entirely from the pinned snapshot."""
+        from transformers import AutoFeatureExtractor, AutoTokenizer, pipeline
+
+        model = self.load_model(model_name)
+        root = self.path(model_name)
+        components = {"tokenizer": AutoTokenizer.from_pretrained(root)}
+        if (root / "preprocessor_config.json").exists():
+            components["feature_extractor"] = AutoFeatureExtractor.from_pretrained(root)
+        return pipeline(task, model=model, device=device, framework="pt", **components)
+
+    def _checked_manifest(self, model_name: str) -> Dict:
+        if self.verify_mode == "off":
+            manifest = self.manifest(model_name)
+            if manifest is None:
+                raise SnapshotError(f"No snapshot of {model_name} in {self.root}")
+            return manifest
+        return self.verify(model_name, full=self.verify_mode == "full")
+
+
+_manager: Optional[SnapshotManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_snapshot_manager() -> SnapshotManager:
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = SnapshotManager(
+                os.getenv("MODEL_SNAPSHOT_DIR", DEFAULT_SNAPSHOT_DIR),
+                verify_mode=os.getenv("MODEL_SNAPSHOT_VERIFY", "size"),
+            )
+        return _manager
+
+
+def _resolve_snapshot(manager: SnapshotManager, task: str, model_name: str) -> bool:
+    """Whether a usable snapshot exists, pinning it first if MODEL_SNAPSHOT_AUTO_PIN is set."""
+    if manager.is_pinned(model_name):
+        return True
+    if os.getenv("MODEL_SNAPSHOT_AUTO_PIN", "0") == "1":
+        try:
+            manager.pin(model_name, task)
+            return True
+        except Exception:
+            logger.exception(f"Could not pin snapshot of {model_name}")
+    return False
+
+
+def load_snapshot_pipeline(task: str, model_name: str, device: str = "cpu"):
+    """
+    Pipeline for model_name from its local snapshot, or None when there is
+    no usable snapshot and the caller should load through the hub as usual.
+    """
+    manager = get_snapshot_manager()
+    if not _resolve_snapshot(manager, task, model_name):
+        return None
+    try:
+        pipe = manager.load_pipeline(task, model_name, device)
+        logger.info(f"Loaded {model_name} from snapshot {manager.path(model_name)}")
+        return pipe
+    except SnapshotError:
+        logger.exception(f"Ignoring unusable snapshot of {model_name}")
+        return None
+
+
+def load_snapshot_model(task: str, model_name: str):
+    """Like load_snapshot_pipeline, for callers that need the bare model."""
+    manager = get_snapshot_manager()
+    if not _resolve_snapshot(manager, task, model_name):
+        return None
+    try:
+        return manager.load_model(model_name)
+    except SnapshotError:
+        logger.exception(f"Ignoring unusable snapshot of {model_name}")
+        return None
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Pin or verify local model snapshots.")
+    parser.add_argument("command", choices=["pin", "verify"])
+    parser.add_argument("models", nargs="+", help="model_name or task=model_name (task defaults to summarization)")
+    parser.add_argument("--revision")
+    parser.add_argument("--force", action="store_true", help="Re-pin even if a snapshot exists")
+    args = parser.parse_args()
+
+    manager = get_snapshot_manager()
+    for spec in args.models:
+        task, _, model_name = spec.rpartition("=")
+        task = task or ("automatic-speech-recognition" if "whisper" in model_name else "summarization")
+        if args.command == "pin":
+            print(manager.pin(model_name, task, revision=args.revision, force=args.force))
+        else:
+            manifest = manager.verify(model_name, full=True)
+            print(f"{model_name}: {len(manifest['files'])} files OK (revision {manifest['revision']})")
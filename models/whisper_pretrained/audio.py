@@ -0,0 +1,73 @@
+import io
+import logging
+import math
+import numpy as np
+import soundfile as sf
+from transformers.pipelines.audio_utils import ffmpeg_read
+
+logger = logging.getLogger(__name__)
+
+WHISPER_SAMPLING_RATE = 16000
+
+
+def load_audio(audio_file_path: str, sampling_rate: int = WHISPER_SAMPLING_RATE) -> np.ndarray:
+    """
+    Decode an audio file to mono float32 samples at sampling_rate.
+
+    Uses the same ffmpeg decoding as the transformers ASR pipeline, so every
+    format the pipeline accepts is accepted here too.
+    """
+    try:
+        with open(audio_file_path, "rb") as f:
+            return ffmpeg_read(f.read(), sampling_rate).astype(np.float32, copy=False)
+    except Exception as e:
+        logger.exception(f"Failed to decode audio file: {audio_file_path}")
+        raise
+
+
+def _next_fast_length(n: int) -> int:
+    """Smallest 2^a * 3^b * 5^c >= n, a length the FFT handles quickly."""
+    best = 1 << max(0, (n - 1).bit_length())
+    power5 = 1
+    while power5 < best:
+        power35 = power5
+        while power35 < best:
+            length = power35
+            while length < n:
+                length *= 2
+            best = min(best, length)
+            power35 *= 3
+        power5 *= 5
+    return best
+
+
+def resample(audio: np.ndarray, orig_sampling_rate: int, sampling_rate: int = WHISPER_SAMPLING_RATE) -> np.ndarray:
+    """
+    Band-limited FFT resampling, cheap enough for clips of a few tens of
+    seconds. The input is zero-padded to an FFT-friendly length that keeps
+    the rate ratio exact, then the padding is trimmed from the output.
+    """
+    if orig_sampling_rate == sampling_rate or len(audio) == 0:
+        return audio
+    num_out = int(round(len(audio) * sampling_rate / orig_sampling_rate))
+    divisor = math.gcd(orig_sampling_rate, sampling_rate)
+    step_in, step_out = orig_sampling_rate // divisor, sampling_rate // divisor
+    blocks = _next_fast_length(-(-len(audio) // step_in))
+    padded_in, padded_out = blocks * step_in, blocks * step_out
+
+    spectrum = np.fft.rfft(audio, padded_in)
+    resampled = np.zeros(padded_out // 2 + 1, dtype=spectrum.dtype)
+    keep = min(len(resampled), len(spectrum))
+    resampled[:keep] = spectrum[:keep]
+    output = np.fft.irfft(resampled, padded_out)[:num_out] * (padded_out / padded_in)
+    return output.astype(np.float32)
+
+
+def decode_audio_bytes(data: bytes, sampling_rate: int = WHISPER_SAMPLING_RATE) -> np.ndarray:
+    """
+    Decode an in-memory audio file (any format libsndfile reads) to mono
+    float32 samples at sampling_rate, without touching the filesystem.
+    """
+    # BytesIO over bytes shares the buffer instead of copying it.
+    audio, orig_sampling_rate = sf.read(io.BytesIO(data), dtype="float32", always_2d=True)
+    return resample(audio.mean(axis=1), orig_sampling_rate, sampling_rate)
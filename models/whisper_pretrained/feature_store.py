@@ -0,0 +1,304 @@
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import torch
+from torch.utils.data import IterableDataset, get_worker_info
+
+from models.whisper_pretrained.audio import WHISPER_SAMPLING_RATE, decode_audio_bytes, load_audio
+from models.whisper_pretrained.features import BatchedLogMelExtractor
+
+logger = logging.getLogger(__name__)
+
+# Whisper encodes exactly 30 s of audio: 3000 log-mel frames at a 10 ms hop.
+NUM_FRAMES = 3000
+
+INDEX_DTYPE = np.dtype(
+    [
+        ("frame_offset", np.int64),
+        ("num_frames", np.int32),
+        ("pad_value", np.float32),
+        ("label_offset", np.int64),
+        ("num_labels", np.int32),
+    ]
+)
+
+
+def crop_features(features: np.ndarray) -> Tuple[np.ndarray, float]:
+    """
+    Drop the constant tail Whisper's feature extractor produces for the zero
+    padding up to 30 s.
+
+    The extractor clamps log-mel values at (max - 8), and padded frames are
+    exactly that floor, which is also the minimum of the clip. Trailing
+    frames that are entirely at the floor can therefore be dropped and
+    restored exactly from (cropped features, pad value).
+    """
+    floor = features.min()
+    varying = np.flatnonzero((features != floor).any(axis=0))
+    num_frames = int(varying[-1]) + 1 if len(varying) else 0
+    return features[:, :num_frames], float(floor)
+
+
+class FeatureStoreWriter:
+    """
+    Writes (log-mel features, label ids) examples into shards of
+    `shard_size` examples. Each shard directory holds:
+
+    - features.npy: float16 (n_mels, total_frames), cropped clips back to back
+    - labels.npy: int32 label ids back to back
+    - index.npy: one INDEX_DTYPE record per example
+
+    All three are read back with np.load(mmap_mode="r"). index.json at the
+    root lists the shards and the metadata passed in.
+    """
+
+    def __init__(self, root: str, shard_size: int = 1024, n_mels: int = 80, metadata: Optional[Dict] = None):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.shard_size = shard_size
+        self.n_mels = n_mels
+        self.metadata = metadata or {}
+        self.shards: List[Dict] = []
+        self._features: List[np.ndarray] = []
+        self._labels: List[np.ndarray] = []
+        self._pads: List[float] = []
+
+    def add(self, features: np.ndarray, labels: Sequence[int]):
+        cropped, pad_value = crop_features(features)
+        self._features.append(cropped.astype(np.float16))
+        self._labels.append(np.asarray(labels, dtype=np.int32))
+        self._pads.append(pad_value)
+        if len(self._features) >= self.shard_size:
+            self._flush()
+
+    def _flush(self):
+        if not self._features:
+            return
+        name = f"shard-{len(self.shards):05d}"
+        index = np.zeros(len(self._features), dtype=INDEX_DTYPE)
+        index["num_frames"] = [f.shape[1] for f in self._features]
+        index["frame_offset"][1:] = np.cumsum(index["num_frames"])[:-1]
+        index["num_labels"] = [len(labels) for labels in self._labels]
+        index["label_offset"][1:] = np.cumsum(index["num_labels"])[:-1]
+        index["pad_value"] = self._pads
+
+        # Write to a temporary directory and rename, so a crash never leaves
+        # a half-written shard behind.
+        tmp_dir = self.root / f".{name}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir()
+        np.save(tmp_dir / "features.npy", np.concatenate(self._features, axis=1))
+        np.save(tmp_dir / "labels.npy", np.concatenate(self._labels))
+        np.save(tmp_dir / "index.npy", index)
+        os.replace(tmp_dir, self.root / name)
+
+        self.shards.append({"name": name, "examples": len(index), "frames": int(index["num_frames"].sum())})
+        self._features, self._labels, self._pads = [], [], []
+
+    def close(self) -> Dict:
+        self._flush()
+        manifest = {
+            **self.metadata,
+            "n_mels": self.n_mels,
+            "num_frames": NUM_FRAMES,
+            "examples": sum(shard["examples"] for shard in self.shards),
+            "shards": self.shards,
+        }
+        with open(self.root / "index.json", "w") as f:
+            json.dump(manifest, f, indent=2)
+        return manifest
+
+
+class FeatureStore:
+    """Read access to a store written by FeatureStoreWriter."""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        with open(self.root / "index.json") as f:
+            self.manifest = json.load(f)
+        self.n_mels = self.manifest["n_mels"]
+        self.num_frames = self.manifest["num_frames"]
+        self.shards = [shard["name"] for shard in self.manifest["shards"]]
+
+    def __len__(self) -> int:
+        return self.manifest["examples"]
+
+    def open_shard(self, name: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        shard = self.root / name
+        return (
+            np.load(shard / "features.npy", mmap_mode="r"),
+            np.load(shard / "labels.npy", mmap_mode="r"),
+            np.load(shard / "index.npy", mmap_mode="r"),
+        )
+
+    def example(self, shard: str, i: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Full (n_mels, 3000) float32 features and the label ids of one example."""
+        features, labels, index = self.open_shard(shard)
+        entry = index[i]
+        full = np.full((self.n_mels, self.num_frames), entry["pad_value"], dtype=np.float32)
+        start, count = entry["frame_offset"], entry["num_frames"]
+        full[:, :count] = features[:, start : start + count]
+        return full, np.array(labels[entry["label_offset"] : entry["label_offset"] + entry["num_labels"]])
+
+
+class BucketedFeatureDataset(IterableDataset):
+    """
+    Streams padded training batches from a feature store.
+
+    Shards are divided among DataLoader worker processes and read through
+    memory maps, so no audio is decoded during training. Within a shard,
+    examples are shuffled, gathered into buckets of `bucket_batches`
+    batches, sorted by label length within the bucket and cut into batches,
+    so each batch pads its labels to similar lengths. Batch order is
+    shuffled again before yielding. Use with DataLoader(batch_size=None).
+    """
+
+    def __init__(
+        self,
+        root: str,
+        batch_size: int = 16,
+        bucket_batches: int = 50,
+        shuffle: bool = True,
+        seed: int = 0,
+        label_pad_id: int = -100,
+    ):
+        self.root = root
+        self.store = FeatureStore(root)
+        self.batch_size = batch_size
+        self.bucket_batches = bucket_batches
+        self.shuffle = shuffle
+        self.seed = seed
+        self.label_pad_id = label_pad_id
+        self.epoch = 0
+
+    def set_epoch(self, epoch: int):
+        """Reshuffle for a new epoch; call before creating the DataLoader iterator."""
+        self.epoch = epoch
+
+    def num_batches(self) -> int:
+        return sum(-(-shard["examples"] // self.batch_size) for shard in self.store.manifest["shards"])
+
+    def __iter__(self) -> Iterator[Dict[str, torch.Tensor]]:
+        worker = get_worker_info()
+        worker_id, num_workers = (worker.id, worker.num_workers) if worker else (0, 1)
+        rng = np.random.default_rng((self.seed, self.epoch))
+
+        shards = list(self.store.shards)
+        if self.shuffle:
+            # Same permutation in every worker, so each shard is read exactly once.
+            shards = [shards[i] for i in rng.permutation(len(shards))]
+        rng = np.random.default_rng((self.seed, self.epoch, worker_id))
+
+        for name in shards[worker_id::num_workers]:
+            features, labels, index = self.store.open_shard(name)
+            order = rng.permutation(len(index)) if self.shuffle else np.arange(len(index))
+            bucket_size = self.batch_size * self.bucket_batches
+            for start in range(0, len(order), bucket_size):
+                bucket = order[start : start + bucket_size]
+                bucket = bucket[np.argsort(index["num_labels"][bucket], kind="stable")]
+                batches = [bucket[i : i + self.batch_size] for i in range(0, len(bucket), self.batch_size)]
+                if self.shuffle:
+                    batches = [batches[i] for i in rng.permutation(len(batches))]
+                for batch in batches:
+                    yield self._collate(features, labels, index, batch)
+
+    def _collate(self, features, labels, index, batch: np.ndarray) -> Dict[str, torch.Tensor]:
+        entries = index[np.sort(batch)]
+        input_features = np.empty((len(entries), self.store.n_mels, self.store.num_frames), dtype=np.float32)
+        label_ids = np.full((len(entries), int(entries["num_labels"].max())), self.label_pad_id, dtype=np.int64)
+        for row, entry in enumerate(entries):
+            start, count = entry["frame_offset"], entry["num_frames"]
+            input_features[row, :, :count] = features[:, start : start + count]
+            input_features[row, :, count:] = entry["pad_value"]
+            label_start, label_count = entry["label_offset"], entry["num_labels"]
+            label_ids[row, :label_count] = labels[label_start : label_start + label_count]
+        return {"input_features": torch.from_numpy(input_features), "labels": torch.from_numpy(label_ids)}
+
+
+# Per-process state of the preprocessing pool.
+_preprocess: Dict = {}
+
+
+def _init_preprocess(model_name: str, language: Optional[str]):
+    from transformers import WhisperProcessor
+
+    torch.set_num_threads(1)
+    processor = WhisperProcessor.from_pretrained(model_name, language=language, task="transcribe")
+    _preprocess["processor"] = processor
+    _preprocess["log_mel"] = BatchedLogMelExtractor.from_feature_extractor(processor.feature_extractor)
+    _preprocess["decoder_start"] = processor.tokenizer.convert_tokens_to_ids("<|startoftranscript|>")
+
+
+def _decode(path: str) -> np.ndarray:
+    try:
+        with open(path, "rb") as f:
+            return decode_audio_bytes(f.read())
+    except Exception:
+        # Formats libsndfile cannot read go through ffmpeg.
+        return load_audio(path)
+
+
+def _prepare_example(example: Tuple[str, str]) -> Optional[Tuple[np.ndarray, List[int]]]:
+    path, text = example
+    try:
+        audio = _decode(path)
+    except Exception as e:
+        logger.warning(f"Skipping {path}: {e}")
+        return None
+    if len(audio) > NUM_FRAMES * WHISPER_SAMPLING_RATE // 100:
+        logger.warning(f"Skipping {path}: longer than 30 s")
+        return None
+
+    # Copied out of the extractor's buffer, which the next example reuses.
+    features = _preprocess["log_mel"]([audio])[0].copy()
+    labels = _preprocess["processor"].tokenizer(text).input_ids
+    # The model prepends the decoder start token itself when shifting labels.
+    if labels and labels[0] == _preprocess["decoder_start"]:
+        labels = labels[1:]
+    return features, labels
+
+
+def build_feature_store(
+    examples: Iterable[Tuple[str, str]],
+    root: str,
+    model_name: str = "openai/whisper-base",
+    language: Optional[str] = "english",
+    shard_size: int = 1024,
+    workers: Optional[int] = None,
+) -> Dict:
+    """
+    Decode (audio path, transcript) examples once, in a pool of processes,
+    and write their log-mel features and label ids to a feature store.
+    Clips over 30 s and undecodable files are skipped.
+    """
+    workers = workers or os.cpu_count() or 1
+    writer = None
+    skipped = 0
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(workers, initializer=_init_preprocess, initargs=(model_name, language)) as pool:
+        for prepared in pool.imap(_prepare_example, examples, chunksize=8):
+            if prepared is None:
+                skipped += 1
+                continue
+            features, labels = prepared
+            if writer is None:
+                writer = FeatureStoreWriter(
+                    root,
+                    shard_size,
+                    n_mels=features.shape[0],
+                    metadata={"model_name": model_name, "language": language},
+                )
+            writer.add(features, labels)
+
+    if writer is None:
+        raise ValueError("No usable examples to write")
+    manifest = writer.close()
+    manifest["skipped"] = skipped
+    logger.info(f"Wrote {manifest['examples']} examples in {len(manifest['shards'])} shards, skipped {skipped}")
+    return manifest
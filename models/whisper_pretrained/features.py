@@ -0,0 +1,167 @@
+import functools
+import threading
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import torch
+
+from models.whisper_pretrained.audio import WHISPER_SAMPLING_RATE
+
+
+@functools.lru_cache(maxsize=None)
+def mel_filters(n_mels: int, n_fft: int, sampling_rate: int = WHISPER_SAMPLING_RATE) -> np.ndarray:
+    """
+    Slaney mel filterbank as (n_mels, n_fft // 2 + 1) float32, computed once
+    per configuration with the same call WhisperFeatureExtractor makes.
+    """
+    from transformers.audio_utils import mel_filter_bank
+
+    filters = mel_filter_bank(
+        num_frequency_bins=1 + n_fft // 2,
+        num_mel_filters=n_mels,
+        min_frequency=0.0,
+        max_frequency=sampling_rate / 2,
+        sampling_rate=sampling_rate,
+        norm="slaney",
+        mel_scale="slaney",
+    )
+    return np.ascontiguousarray(filters.T, dtype=np.float32)
+
+
+class BatchedLogMelExtractor:
+    """
+    Whisper log-mel features for many windows at once.
+
+    Matches WhisperFeatureExtractor (zero padding to n_samples, reflect-padded
+    centered STFT with a periodic Hann window, power spectrum, Slaney mel
+    filterbank, log10 clamped to 8 below each window's maximum, scaled by
+    (x + 4) / 4) but does the work for a whole batch in a few vectorized
+    calls: frames are strided views of one padded buffer, one FFT covers all
+    frames of all windows, and the mel projection is one batched matmul.
+    The FFT is torch.fft.rfft over a zero-copy view of the frames, several
+    times faster than numpy.fft on CPU; everything else is NumPy.
+
+    Buffers are allocated once per thread and grow with the largest batch
+    seen, so steady-state extraction allocates almost nothing. The returned
+    features are a view of the calling thread's buffer: they stay valid
+    until that thread's next call.
+    """
+
+    def __init__(
+        self,
+        n_mels: int = 80,
+        n_fft: int = 400,
+        hop_length: int = 160,
+        n_samples: int = 30 * WHISPER_SAMPLING_RATE,
+        sampling_rate: int = WHISPER_SAMPLING_RATE,
+    ):
+        self.n_mels = n_mels
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.n_samples = n_samples
+        # The STFT has n_samples // hop + 1 frames and Whisper drops the last.
+        self.num_frames = n_samples // hop_length
+        self.filters = mel_filters(n_mels, n_fft, sampling_rate)
+        self.window = (0.5 - 0.5 * np.cos(2 * np.pi * np.arange(n_fft) / n_fft)).astype(np.float32)
+        self._local = threading.local()
+
+    @classmethod
+    def from_feature_extractor(cls, feature_extractor) -> "BatchedLogMelExtractor":
+        """An extractor with the settings of a transformers WhisperFeatureExtractor."""
+        if getattr(feature_extractor, "dither", 0.0):
+            raise ValueError("Dithering is not supported by the batched extractor")
+        return cls(
+            n_mels=feature_extractor.feature_size,
+            n_fft=feature_extractor.n_fft,
+            hop_length=feature_extractor.hop_length,
+            n_samples=feature_extractor.n_samples,
+            sampling_rate=feature_extractor.sampling_rate,
+        )
+
+    @classmethod
+    def shared(cls, feature_extractor) -> "BatchedLogMelExtractor":
+        """
+        The process-wide extractor for feature_extractor's settings. Every
+        caller with the same configuration gets the same instance, so a
+        thread's buffers are reused across calls instead of being allocated
+        again by each new extractor.
+        """
+        if getattr(feature_extractor, "dither", 0.0):
+            raise ValueError("Dithering is not supported by the batched extractor")
+        return _shared_extractor(
+            feature_extractor.feature_size,
+            feature_extractor.n_fft,
+            feature_extractor.hop_length,
+            feature_extractor.n_samples,
+            feature_extractor.sampling_rate,
+        )
+
+    def _buffers(self, batch: int) -> Dict[str, np.ndarray]:
+        buffers = getattr(self._local, "buffers", None)
+        if buffers is None or buffers["padded"].shape[0] < batch:
+            pad = self.n_fft // 2
+            buffers = {
+                "padded": np.zeros((batch, self.n_samples + 2 * pad), dtype=np.float32),
+                "frames": np.empty((batch, self.num_frames, self.n_fft), dtype=np.float32),
+                "spectrum": torch.empty((batch, self.num_frames, self.n_fft // 2 + 1), dtype=torch.complex64),
+                "power": np.empty((batch, self.num_frames, self.n_fft // 2 + 1), dtype=np.float32),
+                "features": np.empty((batch, self.n_mels, self.num_frames), dtype=np.float32),
+            }
+            self._local.buffers = buffers
+        return buffers
+
+    def __call__(self, windows: Sequence[np.ndarray]) -> np.ndarray:
+        """Features of each 1-D float window as (len(windows), n_mels, num_frames) float32."""
+        batch = len(windows)
+        buffers = self._buffers(batch)
+        pad = self.n_fft // 2
+        padded = buffers["padded"][:batch]
+
+        for row, window in enumerate(windows):
+            length = min(len(window), self.n_samples)
+            padded[row, pad : pad + length] = window[:length]
+            padded[row, pad + length :] = 0.0
+        # Reflect padding for the centered STFT, as torch.stft and numpy's
+        # spectrogram do: the edge sample itself is not repeated.
+        end = pad + self.n_samples
+        padded[:, :pad] = padded[:, pad + 1 : 2 * pad + 1][:, ::-1]
+        padded[:, end:] = padded[:, end - pad - 1 : end - 1][:, ::-1]
+
+        frames = np.lib.stride_tricks.as_strided(
+            padded,
+            shape=(batch, self.num_frames, self.n_fft),
+            strides=(padded.strides[0], self.hop_length * padded.strides[1], padded.strides[1]),
+            writeable=False,
+        )
+        windowed = np.multiply(frames, self.window, out=buffers["frames"][:batch])
+        spectrum = buffers["spectrum"][:batch]
+        torch.fft.rfft(torch.from_numpy(windowed), dim=-1, out=spectrum)
+        parts = torch.view_as_real(spectrum).numpy()
+
+        power = buffers["power"][:batch]
+        np.square(parts[..., 0], out=power)
+        power += np.square(parts[..., 1])
+
+        features = buffers["features"][:batch]
+        np.matmul(self.filters, power.transpose(0, 2, 1), out=features)
+        np.maximum(features, 1e-10, out=features)
+        np.log10(features, out=features)
+        floor = features.max(axis=(1, 2), keepdims=True) - 8.0
+        np.maximum(features, floor, out=features)
+        features += 4.0
+        features /= 4.0
+        return features
+
+    def tensor(self, windows: Sequence[np.ndarray], device: Optional[torch.device] = None, dtype=None) -> torch.Tensor:
+        """
+        Features as a model input. On CPU with the buffer's dtype this shares
+        memory with the buffer instead of copying.
+        """
+        return torch.from_numpy(self(windows)).to(device=device, dtype=dtype)
+
+
+@functools.lru_cache(maxsize=None)
+def _shared_extractor(
+    n_mels: int, n_fft: int, hop_length: int, n_samples: int, sampling_rate: int
+) -> BatchedLogMelExtractor:
+    return BatchedLogMelExtractor(n_mels, n_fft, hop_length, n_samples, sampling_rate)
@@ -1,7 +1,13 @@
 import torch
 import logging
 from transformers import pipeline
-from typing import Dict, Optional
+from typing import Dict, Optional, Union
+from models.whisper_pretrained.audio import resample
+from models.whisper_pretrained.long_form import LongFormTranscriber
+from models.snapshots import load_snapshot_pipeline
+
+# A file path, or {"raw": samples, "sampling_rate": rate} for decoded audio.
+AudioInput = Union[str, Dict]
 
 logger = logging.getLogger(__name__)
 
@@ -11,9 +17,12 @@ def load_whisper_model(
     try:
         device = "cuda:0" if torch.cuda.is_available() else "cpu"
         logger.info(f"Loading Whisper model '{model_name}' on {device}")
-        whisper_model = pipeline(
-            "automatic-speech-recognition", model=model_name, device=device
-        )
+        # A pinned local snapshot loads offline with memory-mapped weights.
+        whisper_model = load_snapshot_pipeline("automatic-speech-recognition", model_name, device)
+        if whisper_model is None:
+            whisper_model = pipeline(
+                "automatic-speech-recognition", model=model_name, device=device
+            )
         logger.info("Whisper model loaded successfully")
         return whisper_model
     except Exception as e:
@@ -21,44 +30,74 @@ def load_whisper_model(
         raise
 
 
+def audio_input_from_info(audio_info: Dict) -> AudioInput:
+    """In-memory audio when audio_info carries a decoded array, else its file path."""
+    if "array" in audio_info:
+        return {"raw": audio_info["array"], "sampling_rate": audio_info["sampling_rate"]}
+    return audio_info["file_path"]
+
+def describe_audio(audio: AudioInput) -> str:
+    return "in-memory audio" if isinstance(audio, dict) else audio
+
 def transcribe_short_audio_to_text(
-    speech_recognition_model, audio_file_path: str
+    speech_recognition_model, audio: AudioInput
 ) -> str:
     try:
-        logger.debug(f"Transcribing short audio file: {audio_file_path}")
-        transcription = speech_recognition_model(audio_file_path)["text"]
+        logger.debug(f"Transcribing short audio: {describe_audio(audio)}")
+        transcription = speech_recognition_model(audio)["text"]
         logger.debug("Short audio transcription complete")
         return transcription.strip()
     except Exception as e:
-        logger.exception(f"Error transcribing short audio file: {audio_file_path}")
+        logger.exception(f"Error transcribing short audio: {describe_audio(audio)}")
         raise
 
 def transcribe_long_audio_to_text(
-    speech_recognition_model, audio_file_path: str
+    speech_recognition_model,
+    audio: AudioInput,
+    batch_size: Optional[int] = None,
+    audio_info: Optional[Dict] = None,
+    batch_controller=None,
 ) -> str:
+    """
+    Transcribe with overlapping windows stitched by word timestamps. When
+    audio_info is given, the word timings are stored in audio_info["words"].
+    batch_size is the fixed batch size (default 8), or the upper limit when
+    a batch_controller sizes the batches (see LongFormTranscriber).
+    """
     try:
-        logger.debug(f"Transcribing long audio file: {audio_file_path}")
-        transcription = speech_recognition_model(
-            audio_file_path, max_new_tokens=256, chunk_length_s=30, batch_size=8
-        )["text"]
+        logger.debug(f"Transcribing long audio: {describe_audio(audio)} (batch size {batch_size or 'auto'})")
+        engine = LongFormTranscriber(speech_recognition_model, batch_controller=batch_controller)
+        if isinstance(audio, dict):
+            transcription, words = engine.transcribe(resample(audio["raw"], audio["sampling_rate"]), batch_size)
+        else:
+            transcription, words = engine.transcribe_file(audio, batch_size)
+        if audio_info is not None:
+            audio_info["words"] = words.to_dicts()
         logger.debug("Long audio transcription complete")
         return transcription.strip()
     except Exception as e:
-        logger.exception(f"Error transcribing long audio file: {audio_file_path}")
+        logger.exception(f"Error transcribing long audio: {describe_audio(audio)}")
         raise
 
-def transcribe_audio_to_text(speech_recognition_model, audio_info: Dict) -> str:
+def transcribe_audio_to_text(speech_recognition_model, audio_info: Dict, batch_controller=None) -> str:
+    """
+    Clips of 30 s or less without word timestamps fit in one window and go
+    straight through the pipeline, with its own feature extractor; longer
+    audio (or any with word_timestamps) uses LongFormTranscriber.
+    """
     try:
         audio_duration = audio_info["duration"]
-        audio_file_path = audio_info["file_path"]
+        audio = audio_input_from_info(audio_info)
 
-        logger.info(f"Starting transcription for file: {audio_file_path} (duration: {audio_duration}s)")
-        if audio_duration <= 30:
-            return transcribe_short_audio_to_text(speech_recognition_model, audio_file_path)
+        logger.info(f"Starting transcription for: {describe_audio(audio)} (duration: {audio_duration}s)")
+        if audio_duration <= 30 and not audio_info.get("word_timestamps"):
+            return transcribe_short_audio_to_text(speech_recognition_model, audio)
         else:
-            return transcribe_long_audio_to_text(speech_recognition_model, audio_file_path)
+            return transcribe_long_audio_to_text(
+                speech_recognition_model, audio, audio_info.get("batch_size"), audio_info, batch_controller
+            )
     except Exception as e:
-        logger.exception(f"Error during transcription for: {audio_info.get('file_path')}")
+        logger.exception(f"Error during transcription for: {audio_info.get('file_path', 'in-memory audio')}")
         raise
 
 def test_transcribe_audio(audio_info):
@@ -0,0 +1,300 @@
+import functools
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import torch
+
+from models.whisper_pretrained.audio import WHISPER_SAMPLING_RATE, load_audio
+from models.whisper_pretrained.features import BatchedLogMelExtractor
+
+logger = logging.getLogger(__name__)
+
+# (start, end) sample indices of a decoding window.
+Span = Tuple[int, int]
+
+
+class WordTimings:
+    """
+    Words of a transcript with start/end times (seconds) and confidences,
+    kept as flat arrays. The word texts are concatenated into one string and
+    `offsets[i]:offsets[i + 1]` slices out word i, so a long lecture costs a
+    few bytes per word instead of a dict per word.
+    """
+
+    __slots__ = ("text", "offsets", "starts", "ends", "confidences")
+
+    def __init__(self, text: str, offsets: np.ndarray, starts: np.ndarray, ends: np.ndarray, confidences: np.ndarray):
+        self.text = text
+        self.offsets = offsets
+        self.starts = starts
+        self.ends = ends
+        self.confidences = confidences
+
+    @classmethod
+    def from_words(cls, words: Sequence[Tuple[str, float, float, float]]) -> "WordTimings":
+        """Build from (word, start, end, confidence) tuples."""
+        offsets = np.zeros(len(words) + 1, dtype=np.int32)
+        np.cumsum([len(word[0]) for word in words], out=offsets[1:])
+        return cls(
+            "".join(word[0] for word in words),
+            offsets,
+            np.array([word[1] for word in words], dtype=np.float32),
+            np.array([word[2] for word in words], dtype=np.float32),
+            np.array([word[3] for word in words], dtype=np.float32),
+        )
+
+    @classmethod
+    def concatenate(cls, parts: Sequence["WordTimings"]) -> "WordTimings":
+        parts = [part for part in parts if len(part)]
+        if not parts:
+            return cls.from_words([])
+        offsets, base = [], 0
+        for part in parts:
+            offsets.append(part.offsets[:-1] + base)
+            base += len(part.text)
+        offsets.append(np.array([base], dtype=np.int32))
+        return cls(
+            "".join(part.text for part in parts),
+            np.concatenate(offsets).astype(np.int32),
+            np.concatenate([part.starts for part in parts]),
+            np.concatenate([part.ends for part in parts]),
+            np.concatenate([part.confidences for part in parts]),
+        )
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def word(self, index: int) -> str:
+        return self.text[self.offsets[index] : self.offsets[index + 1]]
+
+    def select(self, mask: np.ndarray) -> "WordTimings":
+        indices = np.flatnonzero(mask)
+        return WordTimings.from_words(
+            [(self.word(i), self.starts[i], self.ends[i], self.confidences[i]) for i in indices]
+        )
+
+    def transcript(self) -> str:
+        return " ".join(self.word(i) for i in range(len(self)))
+
+    def to_dicts(self) -> List[Dict]:
+        return [
+            {
+                "word": self.word(i),
+                "start": round(float(self.starts[i]), 3),
+                "end": round(float(self.ends[i]), 3),
+                "confidence": round(float(self.confidences[i]), 4),
+            }
+            for i in range(len(self))
+        ]
+
+
+def window_spans(
+    num_samples: int,
+    window_s: float = 30.0,
+    overlap_s: float = 5.0,
+    sampling_rate: int = WHISPER_SAMPLING_RATE,
+) -> List[Span]:
+    """Split num_samples into windows of window_s seconds overlapping by overlap_s."""
+    window = int(window_s * sampling_rate)
+    step = int((window_s - overlap_s) * sampling_rate)
+    spans = []
+    start = 0
+    while True:
+        end = min(start + window, num_samples)
+        spans.append((start, end))
+        if end >= num_samples:
+            return spans
+        start += step
+
+
+def merge_windows(
+    spans: Sequence[Span],
+    results: Sequence[WordTimings],
+    sampling_rate: int = WHISPER_SAMPLING_RATE,
+) -> WordTimings:
+    """
+    Stitch per-window words (already on the absolute timeline) into one
+    transcript. Each overlap is cut at its midpoint: a word belongs to the
+    window whose share of the overlap contains the word's midpoint, so words
+    near a boundary are taken once, from the window where they are furthest
+    from the edge.
+    """
+    pieces = []
+    for i, (span, words) in enumerate(zip(spans, results)):
+        low = -np.inf if i == 0 else (span[0] + spans[i - 1][1]) / 2 / sampling_rate
+        high = np.inf if i == len(spans) - 1 else (spans[i + 1][0] + span[1]) / 2 / sampling_rate
+        midpoints = (words.starts + words.ends) / 2
+        pieces.append(words.select((midpoints >= low) & (midpoints < high)))
+    return WordTimings.concatenate(pieces)
+
+
+@functools.lru_cache(maxsize=None)
+def _decode_pool(threads: int) -> ThreadPoolExecutor:
+    """
+    Long-lived decode threads shared by every LongFormTranscriber in the
+    process. Their per-thread log-mel buffers survive between calls, which
+    they would not with a new pool per call.
+    """
+    return ThreadPoolExecutor(max_workers=threads, thread_name_prefix="whisper-decode")
+
+
+class LongFormTranscriber:
+    """
+    Long-form Whisper transcription with word timestamps and confidences.
+
+    The audio is cut into overlapping windows that are decoded independently
+    (in batches, spread over the calling thread and workers - 1 shared
+    decode threads) with token timestamps from
+    cross-attention alignment and per-token log-probabilities. Tokens are
+    grouped into words, and the windows are stitched by timestamp with
+    merge_windows, so words at a boundary are neither dropped nor
+    duplicated the way fixed 30 s chunks can.
+    """
+
+    def __init__(
+        self,
+        speech_recognition_model,
+        window_s: float = 30.0,
+        overlap_s: float = 5.0,
+        workers: Optional[int] = None,
+        batch_controller=None,
+        max_new_tokens: int = 256,
+    ):
+        """
+        speech_recognition_model is a transformers ASR pipeline; its model
+        and tokenizer are used directly, and log-mel features are computed
+        with the shared BatchedLogMelExtractor configured like its feature
+        extractor, so constructing a transcriber per call is cheap.
+        batch_controller (an AdaptiveBatchController) picks batch sizes and
+        splits batches on out-of-memory errors; without one, batches have a
+        fixed size.
+        """
+        self.model = speech_recognition_model.model
+        self.log_mel = BatchedLogMelExtractor.shared(speech_recognition_model.feature_extractor)
+        self.tokenizer = speech_recognition_model.tokenizer
+        self.window_s = window_s
+        self.overlap_s = overlap_s
+        self.workers = workers or int(os.getenv("WHISPER_DECODE_WORKERS", "2"))
+        self.batch_controller = batch_controller
+        self.max_new_tokens = max_new_tokens
+
+        self.special_ids = set(self.tokenizer.all_special_ids)
+        self.timestamp_begin = self.model.generation_config.no_timestamps_token_id + 1
+
+    def transcribe_file(self, audio_file_path: str, batch_size: Optional[int] = None) -> Tuple[str, WordTimings]:
+        return self.transcribe(load_audio(audio_file_path), batch_size)
+
+    def transcribe(self, audio: np.ndarray, batch_size: Optional[int] = None) -> Tuple[str, WordTimings]:
+        """
+        Transcribe 16 kHz mono samples. batch_size is the fixed batch size, or
+        the upper limit when a batch controller is set. Returns the transcript
+        and its word timings.
+        """
+        spans = window_spans(len(audio), self.window_s, self.overlap_s)
+        workers = max(1, min(self.workers, len(spans)))
+        logger.debug(f"Decoding {len(spans)} windows on {workers} workers")
+
+        def decode(batch: List[Span]) -> List[WordTimings]:
+            return self._decode_batch(audio, batch)
+
+        def decode_part(part: List[Span]) -> List[WordTimings]:
+            if self.batch_controller is not None:
+                return self.batch_controller.map_batches(part, decode, limit=batch_size)
+            size = batch_size or 8
+            return [words for i in range(0, len(part), size) for words in decode(part[i : i + size])]
+
+        if workers == 1:
+            results = decode_part(spans)
+        else:
+            # Contiguous parts, so each worker's batches hold neighbouring windows.
+            # The calling thread decodes the first part itself, so a request
+            # keeps making progress while other requests hold the decode threads.
+            bounds = np.linspace(0, len(spans), workers + 1, dtype=int)
+            parts = [spans[bounds[i] : bounds[i + 1]] for i in range(workers)]
+            futures = [_decode_pool(self.workers - 1).submit(decode_part, part) for part in parts[1:]]
+            results = decode_part(parts[0])
+            for future in futures:
+                results.extend(future.result())
+
+        words = merge_windows(spans, results)
+        return words.transcript(), words
+
+    def _decode_batch(self, audio: np.ndarray, spans: List[Span]) -> List[WordTimings]:
+        features = self.log_mel.tensor(
+            [audio[start:end] for start, end in spans], device=self.model.device, dtype=self.model.dtype
+        )
+
+        with torch.inference_mode():
+            outputs = self.model.generate(
+                features,
+                max_new_tokens=self.max_new_tokens,
+                return_dict_in_generate=True,
+                output_scores=True,
+                return_token_timestamps=True,
+            )
+
+        # scores cover the generated steps only, which are the tail of the
+        # sequences after the forced decoder prompt.
+        steps = len(outputs.scores)
+        sequences = outputs.sequences[:, -steps:]
+        logprobs = torch.stack(
+            [
+                torch.log_softmax(scores.float(), dim=-1).gather(1, sequences[:, i : i + 1]).squeeze(1)
+                for i, scores in enumerate(outputs.scores)
+            ],
+            dim=1,
+        )
+        times = outputs.token_timestamps[:, : outputs.sequences.shape[1]][:, -steps:]
+
+        return [
+            self._words_from_tokens(
+                sequences[row].tolist(),
+                times[row].float().cpu().numpy(),
+                logprobs[row].cpu().numpy(),
+                offset_s=start / WHISPER_SAMPLING_RATE,
+                duration_s=(end - start) / WHISPER_SAMPLING_RATE,
+            )
+            for row, (start, end) in enumerate(spans)
+        ]
+
+    def _words_from_tokens(
+        self,
+        token_ids: List[int],
+        times: np.ndarray,
+        logprobs: np.ndarray,
+        offset_s: float,
+        duration_s: float,
+    ) -> WordTimings:
+        """
+        Group text tokens into words (a token starting with the byte-level BPE
+        space marker starts a new word). A word spans from its first token's
+        timestamp to the next token's, and its confidence is the geometric
+        mean of its token probabilities.
+        """
+        words = []
+        current: List[int] = []
+
+        def add_word(indices: List[int], end_index: int):
+            text = self.tokenizer.decode([token_ids[i] for i in indices]).strip()
+            if not text:
+                return
+            start = float(times[indices[0]])
+            end = float(times[end_index]) if end_index < len(times) else duration_s
+            end = min(max(end, start), duration_s)
+            confidence = float(np.exp(np.mean(logprobs[indices])))
+            words.append((text, offset_s + start, offset_s + end, confidence))
+
+        for i, token_id in enumerate(token_ids):
+            if token_id in self.special_ids or token_id >= self.timestamp_begin:
+                continue
+            if current and self.tokenizer.convert_ids_to_tokens(token_id).startswith("Ġ"):
+                add_word(current, i)
+                current = []
+            current.append(i)
+        if current:
+            add_word(current, current[-1] + 1)
+
+        return WordTimings.from_words(words)
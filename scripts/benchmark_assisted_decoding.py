@@ -0,0 +1,116 @@
+"""
+Benchmark assisted decoding for lecture summarization.
+
+Every chunk of the lecture fixture is summarized twice with greedy decoding:
+once by the main model alone and once with the draft model proposing tokens.
+The script reports generated tokens per second for both, the draft token
+acceptance rate, and whether the assisted output matches the baseline token
+for token (it should, since assisted greedy decoding is exact).
+
+    python scripts/benchmark_assisted_decoding.py \
+        --draft-model sshleifer/distilbart-cnn-12-6
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import torch
+from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from app.models.summarization_model import chunk_input_text, chunk_length_bounds  # noqa: E402
+from models.bert.chunk_text import create_smart_chunks  # noqa: E402
+from models.bert.preprocess_text import preprocess_lecture_text, setup_nltk  # noqa: E402
+
+FIXTURE = Path(__file__).resolve().parent / "fixtures" / "lecture_transcript.txt"
+
+
+class ForwardCounter:
+    """Counts decoder steps by hooking the model's forward pass."""
+
+    def __init__(self, model):
+        self.calls = 0
+        model.register_forward_hook(self._hook)
+
+    def _hook(self, module, inputs, output):
+        self.calls += 1
+
+
+def generate(model, inputs, min_length, max_length, assistant_model=None):
+    start = time.perf_counter()
+    with torch.inference_mode():
+        output = model.generate(
+            **inputs,
+            min_length=min_length,
+            max_length=max_length,
+            do_sample=False,
+            num_beams=1,
+            repetition_penalty=1.2,
+            assistant_model=assistant_model,
+        )
+    return output[0], time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="philschmid/bart-large-cnn-samsum")
+    parser.add_argument("--draft-model", default="sshleifer/distilbart-cnn-12-6")
+    parser.add_argument("--chunk-size", type=int, default=800)
+    parser.add_argument("--max-summary-ratio", type=float, default=0.3)
+    args = parser.parse_args()
+
+    setup_nltk()
+    device = "cuda:0" if torch.cuda.is_available() else "cpu"
+    tokenizer = AutoTokenizer.from_pretrained(args.model)
+    model = AutoModelForSeq2SeqLM.from_pretrained(args.model).to(device).eval()
+    draft = AutoModelForSeq2SeqLM.from_pretrained(args.draft_model).to(device).eval()
+    target_counter = ForwardCounter(model)
+    draft_counter = ForwardCounter(draft)
+
+    text = preprocess_lecture_text(FIXTURE.read_text())
+    chunks = create_smart_chunks(text, args.chunk_size)
+
+    totals = {"tokens": 0, "baseline_s": 0.0, "assisted_s": 0.0, "accepted": 0, "proposed": 0}
+    mismatches = 0
+    for index, chunk in enumerate(chunks):
+        full_text = chunk_input_text(chunk)
+        min_length, max_length = chunk_length_bounds(full_text, args.max_summary_ratio)
+        inputs = tokenizer(full_text, truncation=True, max_length=1024, return_tensors="pt").to(device)
+
+        baseline, baseline_s = generate(model, inputs, min_length, max_length)
+
+        target_counter.calls = 0
+        draft_counter.calls = 0
+        assisted, assisted_s = generate(model, inputs, min_length, max_length, assistant_model=draft)
+
+        # Each verification pass of the main model accepts some draft tokens
+        # and then contributes one token of its own.
+        new_tokens = len(assisted) - 1
+        accepted = max(0, new_tokens - target_counter.calls)
+        totals["tokens"] += new_tokens
+        totals["baseline_s"] += baseline_s
+        totals["assisted_s"] += assisted_s
+        totals["accepted"] += accepted
+        totals["proposed"] += draft_counter.calls
+
+        identical = torch.equal(baseline, assisted)
+        mismatches += not identical
+        print(
+            f"chunk {index}: {new_tokens} tokens, baseline {new_tokens / baseline_s:.1f} tok/s, "
+            f"assisted {new_tokens / assisted_s:.1f} tok/s, "
+            f"accepted {accepted}/{draft_counter.calls}, identical={identical}"
+        )
+
+    print()
+    print(f"baseline tokens/s: {totals['tokens'] / totals['baseline_s']:.2f}")
+    print(f"assisted tokens/s: {totals['tokens'] / totals['assisted_s']:.2f}")
+    print(f"speedup:           {totals['baseline_s'] / totals['assisted_s']:.2f}x")
+    print(f"acceptance rate:   {totals['accepted'] / max(1, totals['proposed']):.1%}")
+    print(f"output mismatches: {mismatches}/{len(chunks)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Throughput of batched multi-document summarization.
+
+Builds --documents documents from overlapping slices of the lecture fixture
+and summarizes them once with sequential process_lecture calls (one document
+at a time, one chunk at a time) and once per batch size with
+process_lectures, which packs chunks from different documents into shared
+model batches.
+
+    python scripts/benchmark_batch_summarization.py --documents 200 --batch-sizes 4 8 16
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from app.models.summarization_model import BertSummarizer  # noqa: E402
+
+FIXTURE = Path(__file__).resolve().parent / "fixtures" / "lecture_transcript.txt"
+
+
+def build_documents(count: int, words_per_document: int):
+    words = FIXTURE.read_text().split()
+    step = max(1, (len(words) - words_per_document) // max(1, count))
+    documents = []
+    for index in range(count):
+        start = (index * step) % max(1, len(words) - words_per_document)
+        documents.append((str(index), " ".join(words[start : start + words_per_document])))
+    return documents
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=200)
+    parser.add_argument("--words-per-document", type=int, default=600)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[4, 8, 16])
+    parser.add_argument("--skip-sequential", action="store_true")
+    args = parser.parse_args()
+
+    documents = build_documents(args.documents, args.words_per_document)
+    summarizer = BertSummarizer()
+
+    # Warm up kernels and allocator before timing.
+    summarizer.process_lecture(documents[0][1])
+
+    rows = []
+    if not args.skip_sequential:
+        start = time.perf_counter()
+        for _, text in documents:
+            summarizer.process_lecture(text)
+        rows.append(("sequential", time.perf_counter() - start))
+
+    for batch_size in args.batch_sizes:
+        start = time.perf_counter()
+        for _ in summarizer.process_lectures(documents, batch_size=batch_size):
+            pass
+        rows.append((f"batch={batch_size}", time.perf_counter() - start))
+
+    baseline = rows[0][1]
+    print(f"{'mode':<12} {'seconds':>9} {'docs/s':>8} {'speedup':>8}")
+    for mode, elapsed in rows:
+        print(f"{mode:<12} {elapsed:>9.1f} {len(documents) / elapsed:>8.2f} {baseline / elapsed:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
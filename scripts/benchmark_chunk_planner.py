@@ -0,0 +1,86 @@
+"""
+Estimate the BART encoder work of the "overlap", "dedup" and "stable" chunk
+planners.
+
+The lecture fixture is repeated to build transcripts of increasing length.
+Each planner chunks each transcript, and the script counts the tokens each
+chunk sends through the encoder (truncated at 1024, as the model does). It
+then reports encoder FLOPs from the BART-large encoder shape. No model
+weights are needed. With --tokenizer the BART tokenizer counts tokens;
+without it words are scaled by 1.3 tokens per word.
+
+    python scripts/benchmark_chunk_planner.py --repeats 1 4 16
+"""
+import argparse
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from nltk.tokenize import word_tokenize  # noqa: E402
+
+from app.models.summarization_model import chunk_input_text  # noqa: E402
+from models.bert.chunk_text import create_dedup_chunks, create_smart_chunks, create_stable_chunks  # noqa: E402
+from models.bert.preprocess_text import preprocess_lecture_text, setup_nltk  # noqa: E402
+
+FIXTURE = Path(__file__).resolve().parent / "fixtures" / "lecture_transcript.txt"
+
+# bart-large encoder
+LAYERS = 12
+D_MODEL = 1024
+D_FFN = 4096
+MAX_POSITIONS = 1024
+
+
+def encoder_flops(tokens: int) -> float:
+    """Multiply-adds counted as 2 FLOPs; embeddings and norms ignored."""
+    n = min(tokens, MAX_POSITIONS)
+    projections = 4 * 2 * n * D_MODEL * D_MODEL
+    attention = 2 * 2 * n * n * D_MODEL
+    ffn = 2 * 2 * n * D_MODEL * D_FFN
+    return LAYERS * (projections + attention + ffn)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--chunk-size", type=int, default=800)
+    parser.add_argument("--tokenizer", help="e.g. philschmid/bart-large-cnn-samsum")
+    args = parser.parse_args()
+
+    setup_nltk()
+    if args.tokenizer:
+        from transformers import AutoTokenizer
+
+        tokenizer = AutoTokenizer.from_pretrained(args.tokenizer)
+
+        def count_tokens(text):
+            return len(tokenizer(text)["input_ids"])
+    else:
+        def count_tokens(text):
+            return int(len(word_tokenize(text)) * 1.3)
+
+    base_text = preprocess_lecture_text(FIXTURE.read_text())
+    print(f"{'repeats':>7} {'source tok':>10} {'planner':>8} {'chunks':>6} {'encoded tok':>11} "
+          f"{'redundancy':>10} {'GFLOPs':>8} {'saved':>6}")
+    for repeats in args.repeats:
+        text = " ".join([base_text] * repeats)
+        source_tokens = count_tokens(text)
+        results = {}
+        planners = (("overlap", create_smart_chunks), ("dedup", create_dedup_chunks), ("stable", create_stable_chunks))
+        for planner, create in planners:
+            chunks = create(text, args.chunk_size)
+            tokens = [count_tokens(chunk_input_text(chunk)) for chunk in chunks]
+            encoded = sum(min(t, MAX_POSITIONS) for t in tokens)
+            flops = sum(encoder_flops(t) for t in tokens)
+            results[planner] = flops
+            saved = 1 - flops / results["overlap"]
+            print(
+                f"{repeats:>7} {source_tokens:>10} {planner:>8} {len(chunks):>6} {encoded:>11} "
+                f"{encoded / source_tokens:>10.2f} {flops / 1e9:>8.1f} {saved:>6.1%}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Cold-start benchmark: loading a model through the hub vs from its pinned
+safetensors snapshot.
+
+For each mode the script starts --processes fresh Python processes one
+after another, each loading the model the way a new worker would. The
+earlier ones stay alive, so the later ones show what happens when several
+workers on a pod map the same snapshot. Each process reports:
+
+- time-to-ready: wall time from process start until the model is loaded
+  (and, with --infer, until its first inference has finished);
+- RSS split into anonymous memory and file-backed pages, plus PSS from
+  /proc/<pid>/smaps_rollup. With the snapshot, weights are file-backed
+  pages shared between the processes, so PSS drops as processes are added.
+
+Pin the snapshot first (this needs the hub or a populated HF cache):
+
+    python -m models.snapshots pin openai/whisper-base
+    python scripts/benchmark_cold_start.py --model openai/whisper-base --processes 3 --infer
+
+Drop the page cache between runs (as root: echo 3 > /proc/sys/vm/drop_caches)
+to measure a truly cold disk.
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict
+
+ROOT = Path(__file__).resolve().parents[1]
+FIXTURE = Path(__file__).resolve().parent / "fixtures" / "lecture_transcript.txt"
+
+
+def read_status_memory() -> Dict[str, int]:
+    """RssAnon and RssFile of this process in KiB."""
+    values = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in ("VmRSS", "RssAnon", "RssFile"):
+                values[key] = int(rest.split()[0])
+    return {"rss_kb": values.get("VmRSS", 0), "anon_kb": values.get("RssAnon", 0), "file_kb": values.get("RssFile", 0)}
+
+
+def read_pss(pid: int) -> int:
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            if line.startswith("Pss:"):
+                return int(line.split()[1])
+    return 0
+
+
+def child(args):
+    """Runs inside a fresh process: load, report, then wait for the parent."""
+    sys.path.insert(0, str(ROOT))
+    start = time.perf_counter()
+    from transformers import pipeline
+
+    from models.snapshots import load_snapshot_pipeline
+
+    imported = time.perf_counter()
+    if args.mode == "hub":
+        pipe = pipeline(args.task, model=args.model, device="cpu")
+    else:
+        pipe = load_snapshot_pipeline(args.task, args.model, "cpu")
+        if pipe is None:
+            raise SystemExit(f"No snapshot of {args.model}; run: python -m models.snapshots pin {args.model}")
+    loaded = time.perf_counter()
+
+    if args.infer:
+        if args.task == "automatic-speech-recognition":
+            import numpy as np
+
+            pipe({"raw": np.zeros(16000, dtype=np.float32), "sampling_rate": 16000})
+        else:
+            pipe(FIXTURE.read_text()[:2000], max_length=60, min_length=10)
+    ready = time.perf_counter()
+
+    result = {
+        "import_s": imported - start,
+        "load_s": loaded - imported,
+        "infer_s": ready - loaded,
+        **read_status_memory(),
+    }
+    print(json.dumps(result), flush=True)
+    sys.stdin.readline()
+
+
+def run_mode(mode: str, args):
+    command = [sys.executable, __file__, "--child", "--mode", mode, "--model", args.model, "--task", args.task]
+    if args.infer:
+        command.append("--infer")
+
+    processes, rows = [], []
+    try:
+        for _ in range(args.processes):
+            started = time.perf_counter()
+            process = subprocess.Popen(command, cwd=ROOT, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+            processes.append(process)
+            line = process.stdout.readline()
+            if not line:
+                raise RuntimeError(f"{mode} process exited with code {process.wait()}")
+            rows.append({**json.loads(line), "ready_s": time.perf_counter() - started})
+        # PSS is read once all processes are up, so shared pages are split among all of them.
+        for process, row in zip(processes, rows):
+            row["pss_kb"] = read_pss(process.pid)
+    finally:
+        for process in processes:
+            if process.poll() is None:
+                process.stdin.close()
+                process.wait(timeout=60)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="openai/whisper-base")
+    parser.add_argument("--task", default=None, help="Pipeline task (inferred from the model name by default)")
+    parser.add_argument("--modes", default="hub,snapshot")
+    parser.add_argument("--processes", type=int, default=2, help="Processes started per mode")
+    parser.add_argument("--infer", action="store_true", help="Include one inference in time-to-ready")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--mode", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    args.task = args.task or ("automatic-speech-recognition" if "whisper" in args.model else "summarization")
+
+    if args.child:
+        child(args)
+        return
+
+    print(f"{args.model}, {args.processes} processes per mode{', first inference included' if args.infer else ''}")
+    print(f"{'mode':<9} {'proc':>4} {'ready s':>8} {'import s':>8} {'load s':>7} {'infer s':>7} "
+          f"{'RSS MB':>7} {'anon MB':>7} {'file MB':>7} {'PSS MB':>7}")
+    for mode in args.modes.split(","):
+        for i, row in enumerate(run_mode(mode, args)):
+            print(
+                f"{mode:<9} {i:>4} {row['ready_s']:>8.2f} {row['import_s']:>8.2f} {row['load_s']:>7.2f} "
+                f"{row['infer_s']:>7.2f} {row['rss_kb'] / 1024:>7.0f} {row['anon_kb'] / 1024:>7.0f} "
+                f"{row['file_kb'] / 1024:>7.0f} {row['pss_kb'] / 1024:>7.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Lookup latency and accuracy of the audio fingerprint index at scale.
+
+The script fills an on-disk index with --recordings filler recordings of
+--minutes each. Filler hashes are drawn from the distributions of anchor
+frequency, frequency step and time step of real fingerprints, so posting
+lists are about as skewed as in production, without computing thousands
+of spectrograms. It then indexes --targets synthetic speech-like
+recordings and queries altered copies of them:
+
+- reencoded: gain change, 16 kHz -> 22.05 kHz -> 16 kHz, added noise;
+- trimmed: the re-encoded copy with a random head and tail cut off;
+- excerpt: a random 20 s piece;
+- shared-intro: the first 15 s followed by other audio (must not match);
+- unrelated: audio that was never indexed (must not match).
+
+It reports the index size, the lookup p50/p95/p99 in milliseconds and the
+share of correct answers (right recording, offset within 0.1 s) per query
+kind.
+
+    python scripts/benchmark_fingerprint.py --recordings 20000 --minutes 5
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from app.services.fingerprint_index import FRAME_SECONDS, Fingerprint, FingerprintIndex, hash_sample_mask  # noqa: E402
+from models.whisper_pretrained.audio import WHISPER_SAMPLING_RATE as SR, resample  # noqa: E402
+
+
+def speechlike(seconds: float, seed: int) -> np.ndarray:
+    """Syllable-length harmonic tones with random pitch and pauses."""
+    rng = np.random.default_rng(seed)
+    segments, total = [], 0
+    while total < seconds * SR:
+        length = int(rng.uniform(0.08, 0.3) * SR)
+        t = np.arange(length) / SR
+        f0 = rng.uniform(90, 250)
+        segment = sum(rng.uniform(0.1, 1) / h * np.sin(2 * np.pi * f0 * h * t + rng.uniform(0, 6)) for h in range(1, 12))
+        segments.append(segment * np.hanning(length) * (rng.uniform() > 0.15))
+        total += length
+    audio = np.concatenate(segments)[: int(seconds * SR)]
+    return (0.2 * audio / np.abs(audio).max()).astype(np.float32)
+
+
+def reencode(audio: np.ndarray, rng) -> np.ndarray:
+    altered = resample(resample(audio * 0.6, SR, 22050), 22050, SR)
+    return altered + 0.003 * rng.standard_normal(len(altered)).astype(np.float32)
+
+
+def filler_hashes(pool: np.ndarray, count: int, sample_bits: int, rng) -> np.ndarray:
+    """Hashes with the per-field distributions of pool that survive the index's subsampling."""
+    f1, f2, dt = pool >> 16, (pool >> 7) & 511, pool & 127
+    df = f2 - f1
+    hashes = np.empty(0, dtype=np.int64)
+    while len(hashes) < count:
+        n = 4 * count << sample_bits
+        anchor = rng.choice(f1, n)
+        candidates = (anchor << 16) | (np.clip(anchor + rng.choice(df, n), 0, 511) << 7) | rng.choice(dt, n)
+        hashes = np.concatenate([hashes, candidates[hash_sample_mask(candidates, sample_bits)]])
+    return hashes[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recordings", type=int, default=20000, help="Filler recordings")
+    parser.add_argument("--minutes", type=float, default=5.0, help="Length of each filler recording")
+    parser.add_argument("--targets", type=int, default=10, help="Real recordings indexed and queried")
+    parser.add_argument("--target-minutes", type=float, default=3.0)
+    parser.add_argument("--index", help="Index path (default: a temporary file)")
+    args = parser.parse_args()
+
+    path = args.index or str(Path(tempfile.mkdtemp()) / "fingerprints.sqlite3")
+    index = FingerprintIndex(path)
+    rng = np.random.default_rng(0)
+
+    targets = [speechlike(args.target_minutes * 60, seed) for seed in range(args.targets)]
+    fingerprints = [index.fingerprint(audio) for audio in targets]
+    pool = np.concatenate([fp.hashes for fp in fingerprints])
+    rate = len(pool) / (args.targets * args.target_minutes * 60)
+
+    start = time.perf_counter()
+    frames_per_recording = int(args.minutes * 60 / FRAME_SECONDS)
+    hashes_per_recording = int(rate * args.minutes * 60)
+    for i in range(args.recordings):
+        hashes = filler_hashes(pool, hashes_per_recording, index.sample_bits, rng)
+        frames = rng.integers(0, frames_per_recording, hashes_per_recording)
+        index.add(Fingerprint(hashes, frames, args.minutes * 60), f"filler {i}")
+    target_ids = [index.add(fp, f"target {i}") for i, fp in enumerate(fingerprints)]
+    print(f"Indexed {args.recordings + args.targets} recordings ({rate:.1f} hashes/s) "
+          f"in {time.perf_counter() - start:.0f} s, {Path(path).stat().st_size / 2**20:.0f} MB")
+
+    print(f"{'query':<12} {'correct':>8} {'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7}")
+    for kind in ("reencoded", "trimmed", "excerpt", "shared-intro", "unrelated"):
+        latencies, correct = [], 0
+        for i, audio in enumerate(targets):
+            offset = 0.0
+            if kind == "reencoded":
+                query = reencode(audio, rng)
+            elif kind == "trimmed":
+                head, tail = rng.uniform(5, 40), rng.uniform(5, 40)
+                query = reencode(audio, rng)[int(head * SR) : len(audio) - int(tail * SR)]
+                offset = int(head * SR) / SR
+            elif kind == "excerpt":
+                offset = rng.uniform(0, len(audio) / SR - 20)
+                query = audio[int(offset * SR) : int((offset + 20) * SR)]
+                offset = int(offset * SR) / SR
+            elif kind == "shared-intro":
+                query = np.concatenate([audio[: 15 * SR], speechlike(150, 20_000 + i)])
+            else:
+                query = speechlike(60, 10_000 + i)
+
+            fingerprint = index.fingerprint(query)
+            start = time.perf_counter()
+            match = index.lookup(fingerprint)
+            latencies.append(time.perf_counter() - start)
+            if kind in ("shared-intro", "unrelated"):
+                correct += match is None
+            else:
+                correct += match is not None and match["recording_id"] == target_ids[i] and abs(match["offset_s"] - offset) < 0.1
+
+        latencies_ms = np.array(latencies) * 1000
+        print(
+            f"{kind:<12} {correct / len(targets):>8.0%} {statistics.median(latencies_ms):>7.1f} "
+            f"{np.percentile(latencies_ms, 95):>7.1f} {np.percentile(latencies_ms, 99):>7.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Log-mel feature extraction: transformers' WhisperFeatureExtractor vs the
+BatchedLogMelExtractor used for long-form transcription and the feature
+store.
+
+The audio is --minutes of synthetic speech-like sound cut into the 30 s
+windows with 5 s overlap that long-form transcription decodes. For each
+batch size the script first checks that both extractors produce the same
+features (max absolute difference within --tolerance; the script exits
+with an error otherwise) and then reports milliseconds per batch and per
+window for:
+
+- default: WhisperFeatureExtractor.__call__ (torch.stft when torch is
+  installed);
+- default-numpy: its NumPy fallback, a spectrogram per window;
+- batched: BatchedLogMelExtractor.
+
+    python scripts/benchmark_log_mel.py --minutes 10 --batch-sizes 1,4,8,16
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from models.whisper_pretrained.audio import WHISPER_SAMPLING_RATE as SR  # noqa: E402
+from models.whisper_pretrained.features import BatchedLogMelExtractor  # noqa: E402
+from models.whisper_pretrained.long_form import window_spans  # noqa: E402
+
+
+def speechlike(seconds: float, seed: int = 0) -> np.ndarray:
+    """Syllable-length harmonic tones with random pitch and pauses."""
+    rng = np.random.default_rng(seed)
+    segments, total = [], 0
+    while total < seconds * SR:
+        length = int(rng.uniform(0.08, 0.3) * SR)
+        t = np.arange(length) / SR
+        f0 = rng.uniform(90, 250)
+        segment = sum(rng.uniform(0.1, 1) / h * np.sin(2 * np.pi * f0 * h * t) for h in range(1, 12))
+        segments.append(segment * np.hanning(length) * (rng.uniform() > 0.15))
+        total += length
+    audio = np.concatenate(segments)[: int(seconds * SR)]
+    return (0.2 * audio / np.abs(audio).max()).astype(np.float32)
+
+
+def timed(fn, repeats: int) -> float:
+    """Median seconds per call, after one warm-up call."""
+    fn()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="openai/whisper-base", help="Feature extractor config to load")
+    parser.add_argument("--minutes", type=float, default=10.0)
+    parser.add_argument("--batch-sizes", default="1,4,8,16")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--tolerance", type=float, default=1e-4)
+    parser.add_argument("--skip-numpy", action="store_true", help="Skip the slow NumPy fallback")
+    args = parser.parse_args()
+
+    from transformers import WhisperFeatureExtractor
+
+    try:
+        feature_extractor = WhisperFeatureExtractor.from_pretrained(args.model)
+    except OSError:
+        print(f"Could not load the {args.model} feature extractor, using the default 80-mel configuration")
+        feature_extractor = WhisperFeatureExtractor()
+    batched = BatchedLogMelExtractor.from_feature_extractor(feature_extractor)
+
+    audio = speechlike(args.minutes * 60)
+    # The last window is usually short, so padding is covered too.
+    windows = [audio[start:end] for start, end in window_spans(len(audio))]
+    print(f"{len(windows)} windows from {args.minutes:g} min of audio, {feature_extractor.feature_size} mel bins")
+
+    def default(batch):
+        return feature_extractor(batch, sampling_rate=SR, return_tensors="np").input_features
+
+    def default_numpy(batch):
+        padded = np.zeros((len(batch), feature_extractor.n_samples), dtype=np.float32)
+        for row, window in enumerate(batch):
+            padded[row, : len(window)] = window[: feature_extractor.n_samples]
+        return feature_extractor._np_extract_fbank_features(padded, "cpu")
+
+    extractors = {"default": default, "batched": batched}
+    if not args.skip_numpy:
+        extractors["default-numpy"] = default_numpy
+
+    print(f"{'batch':>5} {'extractor':<14} {'max diff':>9} {'ms/batch':>9} {'ms/window':>9}")
+    failed = False
+    for batch_size in [int(size) for size in args.batch_sizes.split(",")]:
+        batch = (windows * (batch_size // len(windows) + 1))[:batch_size]
+        reference = default(batch)
+        for name, extract in extractors.items():
+            difference = float(np.abs(extract(batch) - reference).max())
+            failed |= difference > args.tolerance
+            seconds = timed(lambda: extract(batch), args.repeats)
+            print(
+                f"{batch_size:>5} {name:<14} {difference:>9.1e} {1000 * seconds:>9.1f} "
+                f"{1000 * seconds / batch_size:>9.2f}"
+            )
+
+    # The whole recording, batched the way long-form transcription does.
+    for name, extract in extractors.items():
+        seconds = timed(lambda: [extract(windows[i : i + 8]) for i in range(0, len(windows), 8)], args.repeats)
+        print(f"All {len(windows)} windows in batches of 8 with {name}: {seconds:.2f} s")
+
+    if failed:
+        raise SystemExit(f"Features differ from WhisperFeatureExtractor by more than {args.tolerance}")
+
+
+if __name__ == "__main__":
+    main()
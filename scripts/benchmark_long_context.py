@@ -0,0 +1,80 @@
+"""
+Compare chunked BART with single-pass long-context summarization.
+
+Each (backend, transcript length) pair runs in a fresh subprocess so peak
+memory (ru_maxrss) covers exactly one model. The transcripts repeat the
+lecture fixture to reach the requested lengths.
+
+    python scripts/benchmark_long_context.py --repeats 1 2 4
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+FIXTURE = Path(__file__).resolve().parent / "fixtures" / "lecture_transcript.txt"
+
+
+def run_single(backend: str, repeats: int) -> dict:
+    from app.models.summarization_engine import SummarizationEngine
+
+    text = " ".join([FIXTURE.read_text()] * repeats)
+    start = time.perf_counter()
+    engine = SummarizationEngine(backend=backend)
+    if backend == "long_context":
+        engine.long_context  # load before timing the summary
+    load_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = engine.process_lecture(text)
+    latency_s = time.perf_counter() - start
+
+    tokens = len(engine.bart.model.tokenizer(text, verbose=False)["input_ids"])
+    return {
+        "backend": backend,
+        "repeats": repeats,
+        "input_tokens": tokens,
+        "load_s": load_s,
+        "latency_s": latency_s,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "summary_words": len(result["detailed_summary"].split()),
+        "error": result["error"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--backends", nargs="+", default=["bart", "long_context"])
+    parser.add_argument("--single", nargs=2, metavar=("BACKEND", "REPEATS"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        print(json.dumps(run_single(args.single[0], int(args.single[1]))))
+        return
+
+    print(f"{'backend':<13} {'tokens':>7} {'load s':>7} {'latency s':>10} {'peak RSS MB':>12} {'words':>6}")
+    for repeats in args.repeats:
+        for backend in args.backends:
+            output = subprocess.run(
+                [sys.executable, __file__, "--single", backend, str(repeats)],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            r = json.loads(output.strip().splitlines()[-1])
+            suffix = f"  error: {r['error']}" if r["error"] else ""
+            print(
+                f"{r['backend']:<13} {r['input_tokens']:>7} {r['load_s']:>7.1f} {r['latency_s']:>10.1f} "
+                f"{r['peak_rss_mb']:>12.0f} {r['summary_words']:>6}{suffix}"
+            )
+
+
+if __name__ == "__main__":
+    main()
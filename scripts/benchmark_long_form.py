@@ -0,0 +1,110 @@
+"""
+Benchmark long-form Whisper transcription on concatenated clips.
+
+Each clip (30 s or shorter) is first transcribed on its own, which gives a
+reference free of any window boundary. The clips are then concatenated,
+with optional silence between them, into one long recording. That
+recording is transcribed by the pipeline's fixed 30 s chunking and by
+LongFormTranscriber. Both outputs are aligned word by word against the
+joined references, and the script reports:
+
+- throughput as a real-time factor;
+- the boundary error rate: inserted plus deleted words per reference word.
+  The clips were decoded by the same model with and without boundaries, so
+  duplicated or dropped words at window edges show up as insertions and
+  deletions, while ordinary recognition differences mostly stay
+  substitutions.
+
+    python scripts/benchmark_long_form.py clip1.wav clip2.wav clip3.wav \\
+        --count 12 --gap 0.5 --workers 2
+"""
+import argparse
+import difflib
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from models.whisper_pretrained.audio import WHISPER_SAMPLING_RATE, load_audio  # noqa: E402
+from models.whisper_pretrained.load_whisper import load_whisper_model  # noqa: E402
+from models.whisper_pretrained.long_form import LongFormTranscriber  # noqa: E402
+
+
+def normalize(text: str) -> List[str]:
+    return re.findall(r"[\w']+", text.lower())
+
+
+def alignment_errors(reference: List[str], hypothesis: List[str]) -> Dict[str, int]:
+    errors = {"insertions": 0, "deletions": 0, "substitutions": 0}
+    matcher = difflib.SequenceMatcher(a=reference, b=hypothesis, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "insert":
+            errors["insertions"] += j2 - j1
+        elif tag == "delete":
+            errors["deletions"] += i2 - i1
+        elif tag == "replace":
+            common = min(i2 - i1, j2 - j1)
+            errors["substitutions"] += common
+            errors["deletions"] += (i2 - i1) - common
+            errors["insertions"] += (j2 - j1) - common
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("clips", nargs="+", type=Path, help="Audio clips of at most 30 s")
+    parser.add_argument("--model", default="openai/whisper-base")
+    parser.add_argument("--count", type=int, default=10, help="Clips in the long recording (cycled)")
+    parser.add_argument("--gap", type=float, default=0.0, help="Seconds of silence between clips")
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--overlap", type=float, default=5.0, help="Window overlap in seconds")
+    args = parser.parse_args()
+
+    pipe = load_whisper_model(args.model)
+    clips = [load_audio(str(path)) for path in args.clips]
+    too_long = [str(path) for path, clip in zip(args.clips, clips) if len(clip) > 30 * WHISPER_SAMPLING_RATE]
+    if too_long:
+        raise SystemExit(f"Clips must be 30 s or shorter: {', '.join(too_long)}")
+
+    references = [pipe({"raw": clip, "sampling_rate": WHISPER_SAMPLING_RATE})["text"] for clip in clips]
+    silence = np.zeros(int(args.gap * WHISPER_SAMPLING_RATE), dtype=np.float32)
+    order = [i % len(clips) for i in range(args.count)]
+    audio = np.concatenate([part for i in order for part in (clips[i], silence)])
+    reference = [word for i in order for word in normalize(references[i])]
+    duration = len(audio) / WHISPER_SAMPLING_RATE
+    print(f"{args.count} clips, {duration:.0f} s of audio, {len(reference)} reference words")
+
+    def run_pipeline():
+        return pipe(
+            {"raw": audio, "sampling_rate": WHISPER_SAMPLING_RATE},
+            max_new_tokens=256,
+            chunk_length_s=30,
+            batch_size=args.batch_size,
+        )["text"]
+
+    def run_long_form():
+        engine = LongFormTranscriber(pipe, overlap_s=args.overlap, workers=args.workers)
+        return engine.transcribe(audio, args.batch_size)[0]
+
+    print(f"{'system':<10} {'time s':>7} {'RTF':>6} {'ins':>5} {'del':>5} {'sub':>5} {'boundary err':>13}")
+    for name, run in (("pipeline", run_pipeline), ("long_form", run_long_form)):
+        start = time.perf_counter()
+        text = run()
+        elapsed = time.perf_counter() - start
+        errors = alignment_errors(reference, normalize(text))
+        boundary_rate = (errors["insertions"] + errors["deletions"]) / max(1, len(reference))
+        print(
+            f"{name:<10} {elapsed:>7.1f} {elapsed / duration:>6.3f} {errors['insertions']:>5} "
+            f"{errors['deletions']:>5} {errors['substitutions']:>5} {boundary_rate:>13.2%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Indexing throughput and query latency of the lecture search index at scale.
+
+The script indexes --lectures synthetic lectures into an on-disk index.
+Each lecture has a transcript built from sentences of the fixture lecture,
+mixed with sentences about a few topics drawn from a Zipf-distributed
+vocabulary, so common and rare terms are both represented. It also has a
+summary and, for every tenth lecture, a translation. Transcripts carry
+word timings, like uploads processed with word_timestamps.
+
+It reports:
+
+- indexing throughput and the final index size;
+- query latency p50/p95/p99 in milliseconds, per query kind (one rare
+  term, common terms, a phrase from the fixture, and terms matching no
+  document, which take the any-term fallback);
+- latency of adding one more lecture to the full index (the incremental
+  update made when a lecture finishes processing).
+
+    python scripts/benchmark_search.py --lectures 10000
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+FIXTURE = Path(__file__).resolve().parent / "fixtures" / "lecture_transcript.txt"
+sys.path.insert(0, str(ROOT))
+
+from nltk.tokenize import sent_tokenize  # noqa: E402
+
+from app.services.search_index import SearchIndex  # noqa: E402
+
+SYLLABLES = ["ka", "lo", "mi", "ren", "tas", "vo", "du", "pel", "sin", "gor", "ath", "bri", "cu", "zen"]
+
+
+def vocabulary(size: int, rng) -> list:
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES, rng.integers(2, 5))))
+    return sorted(words)
+
+
+def timed_words(text: str, rng) -> list:
+    words, t = [], 0.0
+    for word in text.split():
+        duration = rng.uniform(0.15, 0.5)
+        words.append({"word": word, "start": round(t, 2), "end": round(t + duration, 2)})
+        t += duration + rng.uniform(0, 0.2)
+    return words
+
+
+def percentiles(latencies) -> str:
+    ms = np.array(latencies) * 1000
+    return f"{statistics.median(ms):>7.2f} {np.percentile(ms, 95):>7.2f} {np.percentile(ms, 99):>7.2f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lectures", type=int, default=10000)
+    parser.add_argument("--sentences", type=int, default=60, help="Transcript sentences per lecture")
+    parser.add_argument("--vocabulary", type=int, default=5000, help="Distinct topic terms")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per kind")
+    parser.add_argument("--index", help="Index path (default: a temporary file)")
+    args = parser.parse_args()
+
+    path = args.index or str(Path(tempfile.mkdtemp()) / "search_index.sqlite3")
+    index = SearchIndex(path)
+    rng = np.random.default_rng(0)
+    fixture = sent_tokenize(FIXTURE.read_text())
+    vocab = vocabulary(args.vocabulary, rng)
+    # Zipf weights: a few topic terms are everywhere, most are rare.
+    weights = 1.0 / np.arange(1, len(vocab) + 1)
+    weights /= weights.sum()
+
+    def lecture(i: int):
+        topics = rng.choice(vocab, 8, p=weights)
+        sentences = []
+        for _ in range(args.sentences):
+            if rng.uniform() < 0.5:
+                sentences.append(fixture[rng.integers(len(fixture))])
+            else:
+                terms = " ".join(rng.choice(topics, rng.integers(1, 4)))
+                sentences.append(f"In lecture {i} we discuss {terms} and how it relates to the previous part.")
+        transcript = " ".join(sentences)
+        summary = " ".join(sentences[:: max(1, args.sentences // 5)])
+        return transcript, summary
+
+    start = time.perf_counter()
+    for i in range(args.lectures):
+        transcript, summary = lecture(i)
+        key = f"lecture-{i}"
+        index.add_lecture(key, transcript=transcript, summary=summary, words=timed_words(transcript, rng), title=key)
+        if i % 10 == 0:
+            index.add_translation(key, "es", summary)
+    elapsed = time.perf_counter() - start
+    snapshot = index.snapshot()
+    print(
+        f"Indexed {args.lectures} lectures ({snapshot['spans']} spans) in {elapsed:.0f} s "
+        f"({args.lectures / elapsed:.0f} lectures/s), {Path(path).stat().st_size / 2**20:.0f} MB"
+    )
+
+    phrase_sources = [s for s in fixture if len(s.split()) >= 6]
+    queries = {
+        "rare": lambda: vocab[rng.integers(100, 1000)],
+        "common": lambda: " ".join(vocab[j] for j in rng.integers(0, 20, 2)),
+        "phrase": lambda: " ".join(phrase_sources[rng.integers(len(phrase_sources))].split()[1:5]),
+        "no match": lambda: f"{vocab[rng.integers(len(vocab))]} xyzzy{rng.integers(1 << 20)}",
+    }
+    print(f"{'query':<9} {'hits':>5} {'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7}")
+    for kind, make_query in queries.items():
+        latencies, hits = [], 0
+        for _ in range(args.queries):
+            query = make_query()
+            start = time.perf_counter()
+            hits += bool(index.search(query, limit=10))
+            latencies.append(time.perf_counter() - start)
+        print(f"{kind:<9} {hits / args.queries:>5.0%} {percentiles(latencies)}")
+
+    latencies = []
+    for i in range(args.lectures, args.lectures + 50):
+        transcript, summary = lecture(i)
+        words = timed_words(transcript, rng)
+        start = time.perf_counter()
+        index.add_lecture(f"lecture-{i}", transcript=transcript, summary=summary, words=words)
+        latencies.append(time.perf_counter() - start)
+    print(f"{'add':<9} {'':>5} {percentiles(latencies)}")
+
+
+if __name__ == "__main__":
+    main()
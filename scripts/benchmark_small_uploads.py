@@ -0,0 +1,107 @@
+"""
+Latency of preparing small uploads for Whisper: temp file vs in memory.
+
+For every simulated request the script takes the raw bytes of a short WAV
+clip through one of two paths:
+
+- tempfile: write a NamedTemporaryFile, read its duration with soundfile,
+  decode it again with ffmpeg (as the pipeline does for a file path), delete it;
+- memory: decode the bytes with soundfile from a BytesIO and take the
+  duration from the array, as audio_info_from_bytes does.
+
+Requests run on a thread pool, like the server's threadpool. The script
+reports requests per second and p50/p95/p99 latency per path. With --model
+each request also runs the Whisper pipeline on the prepared input.
+
+    python scripts/benchmark_small_uploads.py --requests 500 --concurrency 8
+"""
+import argparse
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from models.whisper_pretrained.audio import WHISPER_SAMPLING_RATE, decode_audio_bytes, load_audio  # noqa: E402
+
+
+def make_clip(seconds: float, sampling_rate: int, seed: int) -> bytes:
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sampling_rate)) / sampling_rate
+    # Speech-band tones plus noise, enough for the decoders to do real work.
+    audio = 0.3 * np.sin(2 * np.pi * rng.uniform(100, 300) * t) + 0.05 * rng.standard_normal(len(t))
+    buffer = io.BytesIO()
+    sf.write(buffer, audio.astype(np.float32), sampling_rate, format="WAV", subtype="PCM_16")
+    return buffer.getvalue()
+
+
+def prepare_tempfile(data: bytes):
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp:
+        tmp.write(data)
+        path = tmp.name
+    try:
+        duration = sf.info(path).duration
+        return load_audio(path), duration
+    finally:
+        os.remove(path)
+
+
+def prepare_memory(data: bytes):
+    audio = decode_audio_bytes(data)
+    return audio, len(audio) / WHISPER_SAMPLING_RATE
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0, help="Clip length")
+    parser.add_argument("--sampling-rate", type=int, default=16000, help="Sampling rate of the uploaded clips")
+    parser.add_argument("--model", help="Also run this Whisper model, e.g. openai/whisper-tiny")
+    args = parser.parse_args()
+
+    clips = [make_clip(args.seconds, args.sampling_rate, seed) for seed in range(16)]
+    pipe = None
+    if args.model:
+        from models.whisper_pretrained.load_whisper import load_whisper_model
+
+        pipe = load_whisper_model(args.model)
+
+    print(f"{args.requests} requests of {args.seconds:.0f} s clips ({len(clips[0]) / 1024:.0f} KB), "
+          f"concurrency {args.concurrency}")
+    print(f"{'path':<9} {'req/s':>7} {'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7}")
+    for name, prepare in (("tempfile", prepare_tempfile), ("memory", prepare_memory)):
+
+        def handle(i):
+            start = time.perf_counter()
+            audio, _ = prepare(clips[i % len(clips)])
+            if pipe is not None:
+                pipe({"raw": audio, "sampling_rate": WHISPER_SAMPLING_RATE})
+            return time.perf_counter() - start
+
+        handle(0)  # warm up
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            latencies = list(pool.map(handle, range(args.requests)))
+        elapsed = time.perf_counter() - start
+        print(
+            f"{name:<9} {args.requests / elapsed:>7.1f} {statistics.median(latencies) * 1000:>7.2f} "
+            f"{percentile(latencies, 95):>7.2f} {percentile(latencies, 99):>7.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Memory-per-worker and throughput scaling benchmark for the multi-worker
+(gunicorn pre-fork) deployment.
+
+For every worker count from 1 to --max-workers this script starts
+`gunicorn -c gunicorn.conf.py app.main:app`, waits for it to become ready,
+records the memory of the master and each worker from /proc (Linux only),
+then fires summarization requests at the service and reports throughput.
+
+    python scripts/benchmark_workers.py --max-workers 4 --requests 32
+"""
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+FIXTURE = Path(__file__).resolve().parent / "fixtures" / "lecture_transcript.txt"
+
+
+def read_smaps_rollup(pid: int) -> Dict[str, int]:
+    """Return Rss, Pss and Uss (private pages) of a process in KiB."""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(":"):
+                values[parts[0][:-1]] = int(parts[1])
+    return {
+        "rss_kb": values.get("Rss", 0),
+        "pss_kb": values.get("Pss", 0),
+        "uss_kb": values.get("Private_Clean", 0) + values.get("Private_Dirty", 0),
+    }
+
+
+def child_pids(parent_pid: int) -> List[int]:
+    pids = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            if int(fields[1]) == parent_pid:
+                pids.append(int(entry))
+        except (FileNotFoundError, ProcessLookupError, IndexError):
+            continue
+    return pids
+
+
+def wait_until_ready(base_url: str, timeout: float) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"{base_url}/docs", timeout=5) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            pass
+        time.sleep(1)
+    raise TimeoutError(f"Service at {base_url} did not become ready in {timeout}s")
+
+
+def summarize_request(base_url: str, text: str) -> float:
+    query = urllib.parse.urlencode({"text": text})
+    request = urllib.request.Request(f"{base_url}/summarize/text/?{query}", method="POST")
+    start = time.perf_counter()
+    with urllib.request.urlopen(request, timeout=3600) as response:
+        response.read()
+    return time.perf_counter() - start
+
+
+def run_load(base_url: str, text: str, total_requests: int, concurrency: int) -> Dict[str, float]:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(lambda _: summarize_request(base_url, text), range(total_requests)))
+    elapsed = time.perf_counter() - start
+    return {
+        "requests_per_s": total_requests / elapsed,
+        "mean_latency_s": sum(latencies) / len(latencies),
+    }
+
+
+def benchmark_worker_count(workers: int, args, text: str) -> Dict[str, float]:
+    port = args.port
+    base_url = f"http://127.0.0.1:{port}"
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), BIND=f"127.0.0.1:{port}")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app.main:app"],
+        cwd=ROOT,
+        env=env,
+    )
+    try:
+        ready_start = time.perf_counter()
+        wait_until_ready(base_url, args.ready_timeout)
+        time_to_ready = time.perf_counter() - ready_start
+
+        # Warm every worker once so lazily-touched pages are counted.
+        run_load(base_url, text, workers * 2, workers)
+
+        master = read_smaps_rollup(server.pid)
+        worker_mem = [read_smaps_rollup(pid) for pid in child_pids(server.pid)]
+        load = run_load(base_url, text, args.requests, workers * args.concurrency_per_worker)
+
+        total_pss = master["pss_kb"] + sum(m["pss_kb"] for m in worker_mem)
+        return {
+            "workers": workers,
+            "time_to_ready_s": time_to_ready,
+            "master_rss_mb": master["rss_kb"] / 1024,
+            "worker_rss_mb": sum(m["rss_kb"] for m in worker_mem) / len(worker_mem) / 1024,
+            "worker_pss_mb": sum(m["pss_kb"] for m in worker_mem) / len(worker_mem) / 1024,
+            "worker_uss_mb": sum(m["uss_kb"] for m in worker_mem) / len(worker_mem) / 1024,
+            "total_pss_mb": total_pss / 1024,
+            **load,
+        }
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=32, help="Requests per worker count")
+    parser.add_argument("--concurrency-per-worker", type=int, default=2)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--ready-timeout", type=float, default=900)
+    parser.add_argument("--text-chars", type=int, default=3000, help="Characters of the fixture to summarize")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON lines")
+    args = parser.parse_args()
+
+    text = FIXTURE.read_text()[: args.text_chars]
+    results = []
+    for workers in range(1, args.max_workers + 1):
+        result = benchmark_worker_count(workers, args, text)
+        results.append(result)
+        if args.json:
+            print(json.dumps(result), flush=True)
+
+    if not args.json:
+        header = (
+            f"{'workers':>7} {'ready s':>8} {'master RSS':>10} {'wrk RSS':>8} {'wrk PSS':>8} "
+            f"{'wrk USS':>8} {'total PSS':>9} {'req/s':>7} {'speedup':>7}"
+        )
+        print(header)
+        baseline = results[0]["requests_per_s"]
+        for r in results:
+            print(
+                f"{r['workers']:>7} {r['time_to_ready_s']:>8.1f} {r['master_rss_mb']:>10.0f} "
+                f"{r['worker_rss_mb']:>8.0f} {r['worker_pss_mb']:>8.0f} {r['worker_uss_mb']:>8.0f} "
+                f"{r['total_pss_mb']:>9.0f} {r['requests_per_s']:>7.2f} {r['requests_per_s'] / baseline:>7.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
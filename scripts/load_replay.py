@@ -0,0 +1,201 @@
+"""
+Replay recorded request traces against the app and report, per endpoint,
+throughput, latency percentiles and error rates for capacity planning.
+
+Traces are JSONL files written by the app with TRACE_RECORD_PATH set (see
+app/middleware/trace.py); request bodies are read from <trace>.blobs/.
+Run the external services as stubs (scripts/stub_services.py) so a replay
+never reaches the paid APIs.
+
+Arrivals are open-loop: each request is sent at its scheduled time whether
+or not earlier ones have finished, so a slow server shows up as latency
+instead of as a lower arrival rate. The schedule is either
+
+- the recorded inter-arrival times, compressed by --speed (default), or
+- a Poisson process at --rate requests per second.
+
+At most --concurrency requests are in flight; a request scheduled while
+all slots are busy waits for one, and that wait counts towards its
+latency. --duration stops scheduling after that many seconds and --loop
+repeats the trace until then.
+
+    python scripts/load_replay.py data/traces/requests.jsonl --target http://127.0.0.1:8000 \\
+        --rate 2 --concurrency 16 --duration 300 --loop
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import httpx
+import numpy as np
+
+
+def load_trace(path: Path, include: List[str], exclude: List[str]) -> List[Dict]:
+    blob_dir = path.with_name(path.name + ".blobs")
+    requests, skipped = [], 0
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if include and not record["path"].startswith(tuple(include)):
+                continue
+            if record["path"].startswith(tuple(exclude)):
+                continue
+            if record.get("truncated"):
+                skipped += 1
+                continue
+            if record.get("body"):
+                record["blob"] = blob_dir / record["body"]
+            requests.append(record)
+    if skipped:
+        print(f"Skipped {skipped} requests whose body was not recorded", file=sys.stderr)
+    requests.sort(key=lambda record: record["ts"])
+    return requests
+
+
+def schedule(requests: List[Dict], args) -> Iterator[tuple]:
+    """(send offset in seconds, request) pairs in order."""
+    rng = np.random.default_rng(args.seed)
+    base, offset = 0.0, 0.0
+    while True:
+        first = requests[0]["ts"]
+        for record in requests:
+            if args.rate:
+                offset += rng.exponential(1 / args.rate)
+            else:
+                offset = base + (record["ts"] - first) / args.speed
+            if args.duration and offset > args.duration:
+                return
+            yield offset, record
+        if not args.loop:
+            return
+        # The next pass starts one mean inter-arrival gap after this one.
+        base = offset + (requests[-1]["ts"] - first) / args.speed / max(1, len(requests) - 1)
+
+
+def endpoint(record: Dict) -> str:
+    return f"{record['method']} {record['path']}"
+
+
+async def send(client: httpx.AsyncClient, record: Dict, bodies: Dict[Path, bytes]) -> Optional[int]:
+    """Send one request and read the whole response; returns the status."""
+    content = None
+    if "blob" in record:
+        content = bodies.get(record["blob"])
+        if content is None:
+            content = bodies[record["blob"]] = record["blob"].read_bytes()
+    url = record["path"] + (f"?{record['query']}" if record.get("query") else "")
+    async with client.stream(record["method"], url, content=content, headers=record.get("headers", {})) as response:
+        await response.aread()
+        return response.status_code
+
+
+async def replay(requests: List[Dict], args) -> Dict[str, Dict]:
+    results: Dict[str, Dict] = defaultdict(lambda: {"latencies": [], "statuses": defaultdict(int), "errors": 0})
+    slots = asyncio.Semaphore(args.concurrency)
+    bodies: Dict[Path, bytes] = {}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    async with httpx.AsyncClient(base_url=args.target, timeout=args.timeout, limits=limits) as client:
+        start = time.perf_counter()
+
+        async def run(offset: float, record: Dict):
+            # Latency counts from the scheduled send time, including any wait for a slot.
+            scheduled = start + offset
+            async with slots:
+                result = results[endpoint(record)]
+                try:
+                    status = await send(client, record, bodies)
+                    result["statuses"][status] += 1
+                    result["errors"] += status >= 400
+                except Exception as e:
+                    result["statuses"][type(e).__name__] += 1
+                    result["errors"] += 1
+                result["latencies"].append(time.perf_counter() - scheduled)
+
+        tasks = []
+        for offset, record in schedule(requests, args):
+            delay = start + offset - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(run(offset, record)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+
+    for result in results.values():
+        result["elapsed"] = elapsed
+    return results
+
+
+def summarize(results: Dict[str, Dict]) -> List[Dict]:
+    rows = []
+    everything = {"latencies": [], "errors": 0, "statuses": defaultdict(int), "elapsed": 0.0}
+    for name, result in sorted(results.items()):
+        everything["latencies"] += result["latencies"]
+        everything["errors"] += result["errors"]
+        everything["elapsed"] = result["elapsed"]
+        for status, count in result["statuses"].items():
+            everything["statuses"][status] += count
+        rows.append({"endpoint": name, **_stats(result)})
+    if len(results) > 1:
+        rows.append({"endpoint": "all", **_stats(everything)})
+    return rows
+
+
+def _stats(result: Dict) -> Dict:
+    latencies_ms = np.array(result["latencies"]) * 1000
+    count = len(latencies_ms)
+    return {
+        "requests": count,
+        "throughput_rps": count / result["elapsed"] if result["elapsed"] else 0.0,
+        "error_rate": result["errors"] / count if count else 0.0,
+        "p50_ms": float(np.percentile(latencies_ms, 50)) if count else 0.0,
+        "p95_ms": float(np.percentile(latencies_ms, 95)) if count else 0.0,
+        "p99_ms": float(np.percentile(latencies_ms, 99)) if count else 0.0,
+        "statuses": {str(status): n for status, n in result["statuses"].items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("trace", type=Path, help="Trace JSONL written with TRACE_RECORD_PATH")
+    parser.add_argument("--target", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=16, help="Most requests in flight at once")
+    parser.add_argument("--rate", type=float, default=0.0, help="Poisson arrivals per second (0: recorded timing)")
+    parser.add_argument("--speed", type=float, default=1.0, help="Compression of the recorded timing")
+    parser.add_argument("--duration", type=float, default=0.0, help="Stop scheduling after this many seconds")
+    parser.add_argument("--loop", action="store_true", help="Repeat the trace until --duration")
+    parser.add_argument("--include", action="append", default=[], help="Only replay paths with this prefix")
+    parser.add_argument("--exclude", action="append", default=[], help="Skip paths with this prefix")
+    parser.add_argument("--timeout", type=float, default=600.0, help="Per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+    if args.loop and not args.duration:
+        parser.error("--loop needs --duration")
+
+    requests = load_trace(args.trace, args.include, args.exclude)
+    if not requests:
+        raise SystemExit(f"No requests to replay in {args.trace}")
+    rows = summarize(asyncio.run(replay(requests, args)))
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    print(f"{'endpoint':<32} {'requests':>8} {'req/s':>7} {'errors':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}  statuses")
+    for row in rows:
+        statuses = " ".join(f"{status}:{n}" for status, n in sorted(row["statuses"].items()))
+        print(
+            f"{row['endpoint']:<32} {row['requests']:>8} {row['throughput_rps']:>7.2f} {row['error_rate']:>7.1%} "
+            f"{row['p50_ms']:>9.0f} {row['p95_ms']:>9.0f} {row['p99_ms']:>9.0f}  {statuses}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Open-loop load test for the admission-controlled API.
+
+Requests arrive as a Poisson process at --rate regardless of how fast the
+service answers, mixing short text summaries (high priority lane) with audio
+uploads (low priority lane). Because admission control bounds concurrency and sheds load
+with 429/503 instead of queueing without limit, the latency of admitted
+requests should stay bounded as the arrival rate grows.
+
+    python scripts/load_test.py --rate 4 --duration 60 --audio sample.wav
+"""
+import argparse
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+
+FIXTURE = Path(__file__).resolve().parent / "fixtures" / "lecture_transcript.txt"
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def multipart_body(fields: Dict[str, str], file_field: str, file_path: Path):
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+        )
+    parts.append(
+        (
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{file_field}"; '
+            f'filename="{file_path.name}"\r\nContent-Type: application/octet-stream\r\n\r\n'
+        ).encode()
+        + file_path.read_bytes()
+        + b"\r\n"
+    )
+    parts.append(f"--{boundary}--\r\n".encode())
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+def send(request: urllib.request.Request):
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=3600) as response:
+            response.read()
+            status = response.status
+            queue_wait = response.headers.get("x-queue-wait-ms")
+    except urllib.error.HTTPError as e:
+        status = e.code
+        queue_wait = None
+    except OSError:
+        status = 0
+        queue_wait = None
+    return status, time.perf_counter() - start, float(queue_wait) if queue_wait else None
+
+
+def text_request(base_url: str, text: str) -> urllib.request.Request:
+    query = urllib.parse.urlencode({"text": text})
+    return urllib.request.Request(f"{base_url}/summarize/text/?{query}", method="POST")
+
+
+def audio_request(base_url: str, audio: Path, model: str) -> urllib.request.Request:
+    body, content_type = multipart_body({"model": model}, "file", audio)
+    return urllib.request.Request(
+        f"{base_url}/transcribe/audio/file",
+        data=body,
+        headers={"Content-Type": content_type},
+        method="POST",
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--rate", type=float, default=2.0, help="Arrivals per second")
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds to generate load for")
+    parser.add_argument("--audio", type=Path, help="Audio file to upload for the low priority lane")
+    parser.add_argument("--audio-share", type=float, default=0.3, help="Fraction of arrivals that upload audio")
+    parser.add_argument("--model", default="whisper")
+    parser.add_argument("--text-chars", type=int, default=1500)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    text = FIXTURE.read_text()[: args.text_chars]
+    results = defaultdict(list)
+    lock = threading.Lock()
+
+    def run(kind: str, request: urllib.request.Request):
+        outcome = send(request)
+        with lock:
+            results[kind].append(outcome)
+
+    with ThreadPoolExecutor(max_workers=256) as pool:
+        start = time.perf_counter()
+        next_arrival = start
+        while next_arrival - start < args.duration:
+            time.sleep(max(0.0, next_arrival - time.perf_counter()))
+            if args.audio and random.random() < args.audio_share:
+                pool.submit(run, "audio", audio_request(args.base_url, args.audio, args.model))
+            else:
+                pool.submit(run, "text", text_request(args.base_url, text))
+            next_arrival += random.expovariate(args.rate)
+
+    print(f"{'lane':<6} {'sent':>5} {'ok':>5} {'429':>5} {'503':>5} {'err':>5} "
+          f"{'p50 s':>7} {'p95 s':>7} {'p99 s':>7} {'wait p99 ms':>11}")
+    for kind, outcomes in sorted(results.items()):
+        ok_latencies = [latency for status, latency, _ in outcomes if status == 200]
+        waits = [wait for status, _, wait in outcomes if wait is not None]
+        counts = defaultdict(int)
+        for status, _, _ in outcomes:
+            counts[status] += 1
+        errors = len(outcomes) - counts[200] - counts[429] - counts[503]
+        print(
+            f"{kind:<6} {len(outcomes):>5} {counts[200]:>5} {counts[429]:>5} {counts[503]:>5} {errors:>5} "
+            f"{percentile(ok_latencies, 50):>7.2f} {percentile(ok_latencies, 95):>7.2f} "
+            f"{percentile(ok_latencies, 99):>7.2f} {percentile(waits, 99):>11.1f}"
+        )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+"""
+Local stand-ins for AssemblyAI and Google Translate, for load tests that
+must not reach the paid APIs.
+
+One server answers both APIs, on the endpoints their Python clients call:
+
+- AssemblyAI: POST /v2/upload, POST /v2/transcript and
+  GET /v2/transcript/{id}. A job completes after a turnaround of
+  (--assembly-base-s + --assembly-rtf * audio seconds), times lognormal
+  noise with sigma --assembly-sigma. Its transcript is fixture text of
+  about 2.5 words per second, with word timings.
+- Google Translate v2: POST /language/translate/v2. It answers after
+  (--translate-base-ms + --translate-ms-per-char * characters), times
+  lognormal noise with sigma --translate-sigma. Each translation is the
+  input with a "[<target>] " prefix.
+
+--assembly-error-rate and --translate-error-rate make that share of
+jobs or requests fail the way the real services report failures.
+
+Point the app at the stubs and start it:
+
+    python scripts/stub_services.py --port 8100 &
+    ASSEMBLYAI_API_KEY=stub ASSEMBLYAI_BASE_URL=http://127.0.0.1:8100 \\
+    ASSEMBLYAI_POLLING_INTERVAL=0.5 GOOGLE_TRANSLATE_ENDPOINT=http://127.0.0.1:8100 \\
+    uvicorn app.main:app --port 8000
+"""
+import argparse
+import asyncio
+import io
+import itertools
+import time
+import uuid
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+import soundfile as sf
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+FIXTURE = Path(__file__).resolve().parent / "fixtures" / "lecture_transcript.txt"
+WORDS_PER_SECOND = 2.5
+
+
+def audio_seconds(data: bytes) -> float:
+    try:
+        return sf.info(io.BytesIO(data)).duration
+    except Exception:
+        # Formats libsndfile cannot read: assume 128 kbit/s compressed audio.
+        return len(data) / 16000
+
+
+def create_app(args) -> FastAPI:
+    app = FastAPI(title="AssemblyAI and Google Translate stubs")
+    rng = np.random.default_rng(args.seed)
+    words = FIXTURE.read_text().split()
+    uploads: Dict[str, float] = {}
+    jobs: Dict[str, Dict] = {}
+
+    def noisy(seconds: float, sigma: float) -> float:
+        return seconds * float(rng.lognormal(0.0, sigma))
+
+    def transcript(duration: float) -> Dict:
+        count = max(1, int(duration * WORDS_PER_SECOND))
+        step_ms = 1000 / WORDS_PER_SECOND
+        timed = [
+            {"text": word, "start": int(i * step_ms), "end": int((i + 0.8) * step_ms), "confidence": 0.9}
+            for i, word in zip(range(count), itertools.cycle(words))
+        ]
+        return {"text": " ".join(word["text"] for word in timed), "words": timed}
+
+    @app.post("/v2/upload")
+    async def upload(request: Request):
+        data = await request.body()
+        upload_id = uuid.uuid4().hex
+        uploads[upload_id] = audio_seconds(data)
+        await asyncio.sleep(len(data) / (args.upload_mb_per_s * 2**20))
+        return {"upload_url": f"{str(request.base_url).rstrip('/')}/uploads/{upload_id}"}
+
+    @app.post("/v2/transcript")
+    async def create_transcript(request: Request):
+        body = await request.json()
+        audio_url = body.get("audio_url", "")
+        duration = uploads.get(audio_url.rsplit("/", 1)[-1], 60.0)
+        job_id = uuid.uuid4().hex
+        jobs[job_id] = {
+            "audio_url": audio_url,
+            "duration": duration,
+            "ready_at": time.monotonic() + noisy(args.assembly_base_s + args.assembly_rtf * duration, args.assembly_sigma),
+            "failed": rng.uniform() < args.assembly_error_rate,
+        }
+        return {"id": job_id, "audio_url": audio_url, "status": "queued"}
+
+    @app.get("/v2/transcript/{job_id}")
+    async def get_transcript(job_id: str):
+        job = jobs.get(job_id)
+        if job is None:
+            return JSONResponse({"error": "Transcript not found"}, status_code=404)
+        response = {"id": job_id, "audio_url": job["audio_url"], "status": "processing"}
+        if time.monotonic() < job["ready_at"]:
+            return response
+        if job["failed"]:
+            return {**response, "status": "error", "error": "Stub transcription failure"}
+        return {**response, "status": "completed", "audio_duration": job["duration"], **transcript(job["duration"])}
+
+    @app.post("/language/translate/v2")
+    async def translate(request: Request):
+        body = await request.json()
+        values = body.get("q", [])
+        values = [values] if isinstance(values, str) else values
+        characters = sum(len(value) for value in values)
+        await asyncio.sleep(noisy((args.translate_base_ms + args.translate_ms_per_char * characters) / 1000, args.translate_sigma))
+        if rng.uniform() < args.translate_error_rate:
+            error = {"code": 503, "message": "Stub translation failure", "status": "UNAVAILABLE"}
+            return JSONResponse({"error": error}, status_code=503)
+        target = body.get("target", "en")
+        translations = [{"translatedText": f"[{target}] {value}", "detectedSourceLanguage": "en"} for value in values]
+        return {"data": {"translations": translations}}
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--upload-mb-per-s", type=float, default=50.0)
+    parser.add_argument("--assembly-base-s", type=float, default=3.0)
+    parser.add_argument("--assembly-rtf", type=float, default=0.05, help="Turnaround seconds per audio second")
+    parser.add_argument("--assembly-sigma", type=float, default=0.3)
+    parser.add_argument("--assembly-error-rate", type=float, default=0.0)
+    parser.add_argument("--translate-base-ms", type=float, default=80.0)
+    parser.add_argument("--translate-ms-per-char", type=float, default=0.02)
+    parser.add_argument("--translate-sigma", type=float, default=0.4)
+    parser.add_argument("--translate-error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    uvicorn.run(create_app(args), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+"""
+Offline bulk processing of lecture recordings.
+
+Walks a directory (or reads a manifest of paths) and runs decoding, ASR,
+summarization and optional translation for every audio file across a pool
+of worker processes. Each finished file is appended to a JSONL results file
+right away, so an interrupted run picks up where it stopped: files already
+recorded with status "ok" and the same size/mtime are skipped.
+
+    python scripts/transcribe_audio.py data/lectures --output results.jsonl \\
+        --workers 4 --model whisper --translate tr,ar --parquet results.parquet
+
+A manifest is a .txt file with one path per line or a .jsonl file with a
+"path" field per line.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+AUDIO_EXTENSIONS = {".wav", ".flac", ".mp3", ".m4a", ".ogg", ".opus", ".webm", ".mp4"}
+
+# Per-process state, created once by the pool initializer.
+_worker: Dict = {}
+
+
+def discover_inputs(source: Path) -> List[Path]:
+    if source.is_dir():
+        return sorted(p.resolve() for p in source.rglob("*") if p.suffix.lower() in AUDIO_EXTENSIONS)
+
+    paths = []
+    with open(source) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            path = json.loads(line)["path"] if source.suffix == ".jsonl" else line
+            paths.append((source.parent / path).resolve() if not os.path.isabs(path) else Path(path))
+    return paths
+
+
+def file_fingerprint(path: Path) -> str:
+    stat = path.stat()
+    return f"{stat.st_size}:{int(stat.st_mtime)}"
+
+
+def load_checkpoint(output: Path) -> Dict[str, str]:
+    """Map path -> fingerprint of files already processed successfully."""
+    done = {}
+    if not output.exists():
+        return done
+    with open(output) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A line cut short by an interrupted run.
+                continue
+            if record.get("status") == "ok":
+                done[record["path"]] = record["fingerprint"]
+    return done
+
+
+def init_worker(options: Dict):
+    import torch
+
+    torch.set_num_threads(options["torch_threads"])
+    _worker["options"] = options
+
+    if options["model"] == "whisper":
+        from app.models.transcription_model import WhisperTranscriber
+
+        _worker["transcriber"] = WhisperTranscriber(model_name=options["whisper_model"])
+    else:
+        from app.services.assembly_transcriber import AssemblyTranscriber
+
+        _worker["transcriber"] = AssemblyTranscriber()
+
+    if options["summarize"]:
+        from app.models.summarization_engine import SummarizationEngine
+
+        _worker["summarizer"] = SummarizationEngine()
+
+    if options["translate"]:
+        from app.services.google_cloud.translate_api import GoogleTranslateAPI
+        from app.services.translation_memory import MemoizedTranslator
+
+        _worker["translator"] = MemoizedTranslator(GoogleTranslateAPI())
+
+
+def process_file(path: str, fingerprint: str) -> Dict:
+    from app.models.transcription_model import assert_audio_duration
+
+    options = _worker["options"]
+    record = {"path": path, "fingerprint": fingerprint, "status": "ok", "timings": {}}
+    try:
+        start = time.perf_counter()
+        audio_info = {"file_path": path, "quality": options["quality"]}
+        try:
+            audio_info["duration"] = assert_audio_duration(path)
+        except Exception:
+            # Formats soundfile cannot read are still accepted by the ASR backends.
+            audio_info["duration"] = None
+        record["duration"] = audio_info["duration"]
+        record["timings"]["decode_s"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        if audio_info["duration"] is None:
+            audio_info.pop("duration")
+        record["transcription"] = _worker["transcriber"].transcribe(audio_info)
+        record["model_used"] = audio_info.get("model_used")
+        record["timings"]["asr_s"] = time.perf_counter() - start
+
+        summary = None
+        if "summarizer" in _worker:
+            start = time.perf_counter()
+            result = _worker["summarizer"].process_lecture(record["transcription"])
+            if result["error"]:
+                raise RuntimeError(result["error"])
+            summary = result["detailed_summary"]
+            record["summary"] = summary
+            record["brief_summary"] = result["brief_summary"]
+            record["key_points"] = result["key_points"]
+            record["summary_backend"] = result["backend"]
+            record["timings"]["summarize_s"] = time.perf_counter() - start
+
+        if "translator" in _worker:
+            start = time.perf_counter()
+            source = summary if summary is not None else record["transcription"]
+            languages = options["translate"]
+            with ThreadPoolExecutor(max_workers=len(languages)) as pool:
+                translated = pool.map(lambda language: _worker["translator"].translate_text(source, language), languages)
+                record["translations"] = dict(zip(languages, translated))
+            record["timings"]["translate_s"] = time.perf_counter() - start
+    except Exception as e:
+        record["status"] = "error"
+        record["error"] = f"{type(e).__name__}: {e}"
+    return record
+
+
+def format_duration(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "--:--:--"
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+class Progress:
+    """Throughput and ETA report, weighted by file size."""
+
+    def __init__(self, total_files: int, total_bytes: int):
+        self.total_files = total_files
+        self.total_bytes = total_bytes
+        self.done_files = 0
+        self.done_bytes = 0
+        self.failed = 0
+        self.audio_seconds = 0.0
+        self.start = time.perf_counter()
+
+    def update(self, size: int, record: Dict):
+        self.done_files += 1
+        self.done_bytes += size
+        self.failed += record["status"] != "ok"
+        self.audio_seconds += record.get("duration") or 0.0
+
+        elapsed = time.perf_counter() - self.start
+        rate = self.done_bytes / elapsed if elapsed else 0
+        eta = (self.total_bytes - self.done_bytes) / rate if rate else None
+        print(
+            f"[{self.done_files}/{self.total_files}] {self.done_files / elapsed:.2f} files/s, "
+            f"{self.audio_seconds / 3600:.2f} h audio ({self.audio_seconds / elapsed:.1f}x realtime), "
+            f"{self.failed} failed, elapsed {format_duration(elapsed)}, ETA {format_duration(eta)}",
+            file=sys.stderr,
+            flush=True,
+        )
+
+
+def write_parquet(jsonl_path: Path, parquet_path: Path):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise SystemExit("pyarrow is required for --parquet (pip install pyarrow)")
+
+    # Resumed runs append retries, so keep only the latest record per file.
+    latest = {}
+    with open(jsonl_path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            for key in ("timings", "translations", "key_points"):
+                if key in record:
+                    record[key] = json.dumps(record[key], ensure_ascii=False)
+            latest[record["path"]] = record
+    records = list(latest.values())
+    pq.write_table(pa.Table.from_pylist(records), parquet_path)
+    print(f"Wrote {len(records)} records to {parquet_path}", file=sys.stderr)
+
+
+def run(paths: List[Path], args) -> int:
+    done = load_checkpoint(args.output)
+    todo = []
+    for path in paths:
+        fingerprint = file_fingerprint(path)
+        if done.get(str(path)) != fingerprint:
+            todo.append((path, fingerprint))
+    print(f"{len(todo)} files to process, {len(paths) - len(todo)} already done", file=sys.stderr)
+    if not todo:
+        return 0
+
+    cores = os.cpu_count() or 1
+    options = {
+        "model": args.model,
+        "whisper_model": args.whisper_model,
+        "quality": args.quality,
+        "summarize": not args.no_summarize,
+        "translate": [lang for lang in args.translate.split(",") if lang] if args.translate else [],
+        "torch_threads": args.torch_threads or max(1, cores // args.workers),
+    }
+    sizes = {str(path): path.stat().st_size for path, _ in todo}
+    progress = Progress(len(todo), sum(sizes.values()))
+
+    # spawn keeps torch state out of the parent and gives every worker a
+    # clean interpreter with its own model copy.
+    context = multiprocessing.get_context("spawn")
+
+    def new_pool() -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=args.workers, mp_context=context, initializer=init_worker, initargs=(options,)
+        )
+
+    failures = 0
+    with open(args.output, "a") as out:
+        # Keep a bounded number of files in flight so huge archives do not
+        # queue every path up front.
+        queue = iter(todo)
+        in_flight: Dict = {}
+        pool = new_pool()
+
+        def submit_next():
+            item = next(queue, None)
+            if item is not None:
+                in_flight[pool.submit(process_file, str(item[0]), item[1])] = item
+
+        def collect(future) -> bool:
+            """Write the record of a finished file; False if its worker died."""
+            nonlocal failures
+            path, fingerprint = in_flight.pop(future)
+            crashed = False
+            try:
+                record = future.result()
+            except BrokenProcessPool as e:
+                crashed = True
+                record = {
+                    "path": str(path),
+                    "fingerprint": fingerprint,
+                    "status": "error",
+                    "error": f"BrokenProcessPool: {e}",
+                    "timings": {},
+                }
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            os.fsync(out.fileno())
+            failures += record["status"] != "ok"
+            progress.update(sizes[record["path"]], record)
+            return not crashed
+
+        try:
+            for _ in range(args.workers * 2):
+                submit_next()
+
+            while in_flight:
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                if all([collect(future) for future in finished]):
+                    for _ in finished:
+                        submit_next()
+                    continue
+
+                # A worker died (e.g. killed for running out of memory) and
+                # took the pool down: every file still in flight fails with
+                # it. Record them all and go on with a fresh pool; failed
+                # files are retried on the next run.
+                for future in wait(list(in_flight)).done:
+                    collect(future)
+                pool.shutdown()
+                pool = new_pool()
+                for _ in range(args.workers * 2):
+                    submit_next()
+        finally:
+            pool.shutdown()
+
+    return 1 if failures else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", type=Path, help="Directory of audio files or manifest (.txt/.jsonl)")
+    parser.add_argument("--output", type=Path, default=Path("results.jsonl"), help="JSONL results and checkpoint")
+    parser.add_argument("--parquet", type=Path, help="Also export all results to this Parquet file")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--torch-threads", type=int, help="Torch threads per worker (default: cores / workers)")
+    parser.add_argument("--model", choices=["whisper", "assembly"], default="whisper")
+    parser.add_argument("--whisper-model", help="Fixed Whisper model (default: picked per file by quality tier)")
+    parser.add_argument("--quality", default="balanced", choices=["fast", "balanced", "accurate"])
+    parser.add_argument("--no-summarize", action="store_true")
+    parser.add_argument("--translate", default="", help="Comma separated target languages, e.g. tr,ar")
+    args = parser.parse_args()
+
+    paths = discover_inputs(args.source)
+    if not paths:
+        print(f"No audio files found in {args.source}", file=sys.stderr)
+        return 1
+
+    status = run(paths, args)
+    if args.parquet:
+        write_parquet(args.output, args.parquet)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())